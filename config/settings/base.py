@@ -41,7 +41,6 @@ THIRD_PARTY_APPS = [
     "djcelery_email",
     "django_celery_beat",
     "corsheaders",
-    "debug_toolbar",
 ]
 
 LOCAL_APPS = [
@@ -50,15 +49,16 @@ LOCAL_APPS = [
     "core_apps.user_profile",
     "core_apps.accounts",
     "core_apps.cards",
+    "core_apps.notifications",
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    "core_apps.common.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.middleware.gzip.GZipMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -193,6 +193,9 @@ SIMPLE_JWT = {
     "USER_ID_CLAIM": "user_id",
 }
 
+# Authenticated users are cached for this many seconds, see CookieAuthentication
+AUTH_USER_CACHE_TIMEOUT = int(getenv("AUTH_USER_CACHE_TIMEOUT", 300))
+
 DJOSER = {
     "USER_ID_FIELD": "id",
     "LOGIN_FIELD": "email",
@@ -224,6 +227,23 @@ SPECTACULAR_SETTINGS = {
 if USE_TZ:
     CELERY_TIMEZONE = TIME_ZONE
 
+REDIS_URL = getenv("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": REDIS_URL,
+            "OPTIONS": {"CLIENT_CLASS": "django_redis.client.DefaultClient"},
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 CELERY_BROKER_URL = getenv("CELERY_BROKER_URL")
 CELERY_RESULT_BACKEND = getenv("CELERY_RESULT_BACKEND")
 CELERY_ACCEPT_CONTENT = ["application/json"]
@@ -237,13 +257,64 @@ CELERY_TASK_TIME_LIMIT = 5 * 60
 CELERY_TASK_SOFT_TIME_LIMIT = 60
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers.DatabaseScheduler"
 CELERY_WORKER_SEND_TASK_EVENTS = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+INTEREST_RUN_SHARDS = int(getenv("INTEREST_RUN_SHARDS", 8))
+
+BALANCE_REFRESH_DELAY = int(getenv("BALANCE_REFRESH_DELAY", 30))
+BALANCE_SNAPSHOT_LOCK_TIMEOUT = int(getenv("BALANCE_SNAPSHOT_LOCK_TIMEOUT", 2))
+
+STATEMENT_ARTIFACT_ROOT = getenv(
+    "STATEMENT_ARTIFACT_ROOT", str(BASE_DIR / "artifacts" / "statements")
+)
+STATEMENT_ARTIFACT_MAX_AGE = timedelta(
+    days=int(getenv("STATEMENT_ARTIFACT_MAX_AGE_DAYS", 7))
+)
+STATEMENT_ARTIFACT_MAX_BYTES = int(
+    getenv("STATEMENT_ARTIFACT_MAX_BYTES", 512 * 1024 * 1024)
+)
+
+REQUEST_METRICS_FLUSH_INTERVAL = int(getenv("REQUEST_METRICS_FLUSH_INTERVAL", 15))
+METRICS_SCRAPE_TOKEN = getenv("METRICS_SCRAPE_TOKEN")
+
+# Seconds an SMTP connection may block, so a stalled server fails the send
+EMAIL_TIMEOUT = int(getenv("EMAIL_TIMEOUT", 10))
+EMAIL_DISPATCH_BATCH_SIZE = int(getenv("EMAIL_DISPATCH_BATCH_SIZE", 100))
+EMAIL_DISPATCH_DELAY = int(getenv("EMAIL_DISPATCH_DELAY", 2))
+EMAIL_DISPATCH_MAX_ATTEMPTS = int(getenv("EMAIL_DISPATCH_MAX_ATTEMPTS", 6))
+EMAIL_DISPATCH_RETRY_DELAY = timedelta(
+    seconds=int(getenv("EMAIL_DISPATCH_RETRY_DELAY", 30))
+)
+DELIVERY_FAILED_RETENTION = timedelta(
+    days=int(getenv("DELIVERY_FAILED_RETENTION_DAYS", 7))
+)
 
 CELERY_BEAT_SCHEDULE = {
     "apply-daily-interest": {
         "task": "apply_daily_interest",
     },
     "detect-suspicious-activities": {"task": "detect_suspicious_activities"},
-    "record-month-end-balance": {"task": "record_month_end_balance"}
+    "record-month-end-balance": {"task": "record_month_end_balance"},
+    "snapshot-account-balances": {
+        "task": "snapshot_account_balances",
+        "schedule": timedelta(minutes=15),
+    },
+    "purge-expired-otp-challenges": {
+        "task": "purge_expired_otp_challenges",
+        "schedule": timedelta(minutes=10),
+    },
+    "relay-outbox": {
+        "task": "relay_outbox",
+        "schedule": timedelta(minutes=1),
+    },
+    "drain-email-queue": {
+        "task": "drain_email_queue",
+        "schedule": timedelta(minutes=1),
+    },
+    "purge-failed-deliveries": {
+        "task": "purge_failed_deliveries",
+        "schedule": timedelta(hours=1),
+    },
 }
 
 CLOUDINARY_CLOUD_NAME = getenv("CLOUDINARY_CLOUD_NAME")
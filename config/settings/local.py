@@ -1,7 +1,7 @@
 from os import getenv, path
 from dotenv import load_dotenv
 from .base import * # noqa
-from .base import BASE_DIR
+from .base import BASE_DIR, INSTALLED_APPS, MIDDLEWARE
 
 local_env_file = path.join(BASE_DIR, ".envs", ".env.local")
 
@@ -18,6 +18,7 @@ ALLOWED_HOSTS = ['localhost', '127.0.0.1', '0.0.0.0']
 ADMIN_URL = getenv("ADMIN_URL")
 
 EMAIL_BACKEND = "djcelery_email.backends.CeleryEmailBackend"
+EMAIL_DISPATCH_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = getenv("EMAIL_HOST")
 EMAIL_PORT = getenv("EMAIL_PORT")
 DEFAULT_FROM_EMAIL = getenv("DEFAULT_FROM_EMAIL")
@@ -32,8 +33,19 @@ LOCKOUT_DURATION = timedelta(minutes=1)
 
 LOGIN_ATTEMPTS = 3
 
+LOGIN_ATTEMPTS_WINDOW = timedelta(hours=1)
+
 OTP_EXPIRATION = timedelta(minutes=3)
 
+OTP_MAX_ATTEMPTS = 5
+
+INSTALLED_APPS += ["debug_toolbar"]
+
+MIDDLEWARE.insert(
+  MIDDLEWARE.index("corsheaders.middleware.CorsMiddleware"),
+  "debug_toolbar.middleware.DebugToolbarMiddleware",
+)
+
 INTERNAL_IPS = [
     '127.0.0.1'
 ]
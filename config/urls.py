@@ -6,7 +6,7 @@ from drf_spectacular.views import (
     SpectacularRedocView,
     SpectacularSwaggerView,
 )
-from debug_toolbar.toolbar import debug_toolbar_urls
+from core_apps.common.views import MetricsView
 
 urlpatterns = [
     path(settings.ADMIN_URL, admin.site.urls),
@@ -26,9 +26,10 @@ urlpatterns = [
     path("api/v1/profiles/", include("core_apps.user_profile.urls")),
     path("api/v1/accounts/", include("core_apps.accounts.urls")),
     path("api/v1/cards/", include("core_apps.cards.urls")),
+    path("api/v1/metrics/", MetricsView.as_view(), name="metrics"),
 ]
 
-if settings.DEBUG:
+if "debug_toolbar" in settings.INSTALLED_APPS:
     urlpatterns.append(path('__debug__/', include('debug_toolbar.urls')))
 
 admin.site.site_header = "SecureBank Admin"
@@ -34,7 +34,8 @@ class BankAccountAdmin(admin.ModelAdmin):
         "user__first_name",
         "user__last_name",
     ]
-    readonly_fields = ["account_number", "created_at", "updated_at"]
+    # The balance is cached from the ledger, so money only moves by posting
+    readonly_fields = ["account_number", "account_balance", "created_at", "updated_at"]
     fieldsets = (
         (
             None,
@@ -1,7 +1,11 @@
 from django.apps import AppConfig
 from django.utils.translation import gettext_lazy as _
 
+
 class AccountsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core_apps.accounts"
     verbose_name = _("Accounts")
+
+    def ready(self) -> None:
+        import core_apps.accounts.signals
@@ -1,25 +1,23 @@
+from decimal import Decimal
+
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 from django.utils.translation import gettext_lazy as _
 from loguru import logger
 
+from core_apps.notifications.dispatcher import queue_email, queue_emails
+from core_apps.notifications.rendering import build_email
+
 from core_apps.accounts.models import BankAccount
 
 
 def send_account_creation_email(user, bank_account):
     subject = _("Your New Bank Account has been Created")
-    from_email = settings.DEFAULT_FROM_EMAIL
     recipient_list = [user.email]
     context = {"user": user, "account": bank_account, "site_name": settings.SITE_NAME}
-    html_email = render_to_string("emails/account_created.html", context)
-    plain_email = strip_tags(html_email)
-    email = EmailMultiAlternatives(subject, plain_email, from_email, recipient_list)
-    email.attach_alternative(html_email, "text/html")
+    email = build_email(subject, "account_created", context, recipient_list)
     try:
-        email.send()
-        logger.info(f"Account Created email sent to: {user.email}")
+        queue_email(email)
+        logger.info(f"Account Created email queued for: {user.email}")
     except Exception as e:
         logger.error(
             f"Failed to send account created email to {email}: Error: {str(e)}"
@@ -28,16 +26,12 @@ def send_account_creation_email(user, bank_account):
 
 def send_full_activation_email(account: BankAccount) -> None:
     subject = _("Your Bank Account is now fully activated")
-    from_email = settings.DEFAULT_FROM_EMAIL
     recipient_list = [account.user.email]
     context = {"account": account, "site_name": settings.SITE_NAME}
-    html_email = render_to_string("emails/bank_account_activated.html", context)
-    plain_email = strip_tags(html_email)
-    email = EmailMultiAlternatives(subject, plain_email, from_email, recipient_list)
-    email.attach_alternative(html_email, "text/html")
+    email = build_email(subject, "bank_account_activated", context, recipient_list)
     try:
-        email.send()
-        logger.info(f"Account Fully Activated email sent to: {account.user.email}")
+        queue_email(email)
+        logger.info(f"Account Fully Activated email queued for: {account.user.email}")
     except Exception as e:
         logger.error(
             f"Failed to send Fully Activated email to  {account.user.email}: Error: {str(e)}"
@@ -48,7 +42,6 @@ def send_deposit_email(
     user, user_email, amount, currency, new_balance, account_number, reference_number
 ) -> None:
     subject = _("Deposit Confirmation")
-    from_email = settings.DEFAULT_FROM_EMAIL
     recipient_list = [user_email]
     context = {
         "user": user,
@@ -59,13 +52,10 @@ def send_deposit_email(
         "site_name": settings.SITE_NAME,
         "reference_number": reference_number,
     }
-    html_email = render_to_string("emails/deposit_confirmation.html", context)
-    plain_email = strip_tags(html_email)
-    email = EmailMultiAlternatives(subject, plain_email, from_email, recipient_list)
-    email.attach_alternative(html_email, "text/html")
+    email = build_email(subject, "deposit_confirmation", context, recipient_list)
     try:
-        email.send()
-        logger.info(f"Deposit Confirmation email sent to: {user_email}")
+        queue_email(email)
+        logger.info(f"Deposit Confirmation email queued for: {user_email}")
     except Exception as e:
         logger.error(
             f"Failed to send Deposit Confirmation email to {user_email}: Error: {str(e)}"
@@ -76,7 +66,6 @@ def send_withdrawal_email(
     user, user_email, amount, currency, new_balance, account_number, reference_number
 ) -> None:
     subject = _("Withdrawal Confirmation")
-    from_email = settings.DEFAULT_FROM_EMAIL
     recipient_list = [user_email]
     context = {
         "user": user,
@@ -87,13 +76,10 @@ def send_withdrawal_email(
         "site_name": settings.SITE_NAME,
         "reference_number": reference_number,
     }
-    html_email = render_to_string("emails/withdrawal_confirmation.html", context)
-    plain_email = strip_tags(html_email)
-    email = EmailMultiAlternatives(subject, plain_email, from_email, recipient_list)
-    email.attach_alternative(html_email, "text/html")
+    email = build_email(subject, "withdrawal_confirmation", context, recipient_list)
     try:
-        email.send()
-        logger.info(f"Withdrawal Confirmation email sent to: {user_email}")
+        queue_email(email)
+        logger.info(f"Withdrawal Confirmation email queued for: {user_email}")
     except Exception as e:
         logger.error(
             f"Failed to send Withdrawal Confirmation email to {user_email}. Error: {str(e)}"
@@ -114,7 +100,6 @@ def send_transfer_email(
     reference_number,
 ) -> None:
     subject = _("Transfer Notification ")
-    from_email = settings.DEFAULT_FROM_EMAIL
     common_context = {
         "amount": amount,
         "currency": currency,
@@ -131,61 +116,29 @@ def send_transfer_email(
         "is_sender": True,
         "new_balance": sender_new_balance,
     }
-    sender_html_email = render_to_string(
-        "emails/transfer_notification.html", sender_context
-    )
-    sender_plain_email = strip_tags(sender_html_email)
-    sender_email_obj = EmailMultiAlternatives(
-        subject, sender_plain_email, from_email, [sender_email]
+    sender_email_obj = build_email(
+        subject, "transfer_notification", sender_context, [sender_email]
     )
-    sender_email_obj.attach_alternative(sender_html_email, "text/html")
     receiver_context = {
         **common_context,
         "user": receiver_name,
         "is_sender": False,
         "new_balance": receiver_new_balance,
     }
-    receiver_html_email = render_to_string(
-        "emails/transfer_notification.html", receiver_context
+    receiver_email_obj = build_email(
+        subject, "transfer_notification", receiver_context, [receiver_email]
     )
-    receiver_plain_email = strip_tags(receiver_html_email)
-    receiver_email_obj = EmailMultiAlternatives(
-        subject, receiver_plain_email, from_email, [receiver_email]
-    )
-    receiver_email_obj.attach_alternative(receiver_html_email, "text/html")
     try:
-        sender_email_obj.send()
-        receiver_email_obj.send()
+        queue_emails([sender_email_obj, receiver_email_obj])
         logger.info(
-            f"Transfer Notification emails sent to sender: {sender_email} and receiver: {receiver_email}"
+            f"Transfer Notification emails queued for sender: {sender_email} and receiver: {receiver_email}"
         )
     except Exception as e:
         logger.error(f"Failed to send Transfer Notification emails. Error: {str(e)}")
 
 
-def send_transfer_otp_email(email, otp) -> None:
-    subject = _("Your OTP for Transfer Authorization")
-    from_email = settings.DEFAULT_FROM_EMAIL
-    recipient_list = [email]
-    context = {
-        "otp": otp,
-        "expiry_time": settings.OTP_EXPIRATION,
-        "site_name": settings.SITE_NAME,
-    }
-    html_email = render_to_string("emails/transfer_otp_email.html", context)
-    plain_email = strip_tags(html_email)
-    email = EmailMultiAlternatives(subject, plain_email, from_email, recipient_list)
-    email.attach_alternative(html_email, "text/html")
-    try:
-        email.send()
-        logger.info(f"Transfer OTP email sent to: {email}")
-    except Exception as e:
-        logger.error(f"Failed to send Transfer OTP email to {email}. Error: {str(e)}")
-
-
 def send_suspicious_activity_alert(suspicious_activities):
     subject = _("Suspicious Activity Alert")
-    from_email = settings.DEFAULT_FROM_EMAIL
     recipient_list = [settings.ADMIN_EMAIL]
 
     context = {
@@ -193,19 +146,48 @@ def send_suspicious_activity_alert(suspicious_activities):
         "site_name": settings.SITE_NAME,
     }
 
-    html_email = render_to_string("emails/suspicious_activity_alert.html", context)
-    plain_email = strip_tags(html_email)
-    email = EmailMultiAlternatives(subject, plain_email, from_email, recipient_list)
-    email.attach_alternative(html_email, "text/html")
+    email = build_email(subject, "suspicious_activity_alert", context, recipient_list)
 
     try:
-        email.send()
-        logger.info(
-            f"Suspicious activity alert sent successfully to: {settings.ADMIN_EMAIL}"
-        )
+        queue_email(email)
+        logger.info(f"Suspicious activity alert queued for: {settings.ADMIN_EMAIL}")
         return len(suspicious_activities)
     except Exception as e:
         logger.error(
             f"Failed to send suspicious activity alert to {settings.ADMIN_EMAIL}. Error: {str(e)}"
         )
         return 0
+
+
+def deliver_account_creation_email(account_id) -> None:
+    """Outbox handler for send_account_creation_email"""
+    account = BankAccount.objects.select_related("user__profile").get(pk=account_id)
+    send_account_creation_email(account.user, account)
+
+
+def deliver_deposit_email(account_id, amount, new_balance, reference_number) -> None:
+    """Outbox handler for send_deposit_email"""
+    account = BankAccount.objects.select_related("user").get(pk=account_id)
+    send_deposit_email(
+        user=account.user,
+        user_email=account.user.email,
+        amount=Decimal(amount),
+        currency=account.currency,
+        new_balance=Decimal(new_balance),
+        account_number=account.account_number,
+        reference_number=reference_number,
+    )
+
+
+def deliver_withdrawal_email(account_id, amount, new_balance, reference_number) -> None:
+    """Outbox handler for send_withdrawal_email"""
+    account = BankAccount.objects.select_related("user").get(pk=account_id)
+    send_withdrawal_email(
+        user=account.user,
+        user_email=account.user.email,
+        amount=Decimal(amount),
+        currency=account.currency,
+        new_balance=Decimal(new_balance),
+        account_number=account.account_number,
+        reference_number=reference_number,
+    )
@@ -0,0 +1,33 @@
+import csv
+from typing import Iterable, Iterator, Sequence
+
+from core_apps.common.encoders import fast_dumps
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """File-like object whose write() hands back the line instead of storing it"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def stream_csv(rows: Iterable[dict], fields: Sequence[str]) -> Iterator[str]:
+    """Encode representations as CSV one line at a time, header first"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([row[field] for field in fields])
+
+
+def stream_ndjson(rows: Iterable[dict], fields: Sequence[str]) -> Iterator[bytes]:
+    """Encode representations as newline delimited JSON, one object per line"""
+    for row in rows:
+        yield fast_dumps(row) + b"\n"
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", stream_csv),
+    "ndjson": ("application/x-ndjson", stream_ndjson),
+}
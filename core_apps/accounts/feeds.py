@@ -0,0 +1,175 @@
+from typing import Optional, Sequence
+
+from .models import BankAccount, Transaction
+
+FEED_HYDRATE_CHUNK_SIZE = 500
+FEED_STREAM_CHUNK_SIZE = 2000
+
+
+class PartyFeed:
+    """
+    Transactions in which a user or an account is either party.
+
+    Filtering with Q(sender=user) | Q(receiver=user) makes Postgres fall back
+    to a sequential or bitmap scan. The feed is instead a UNION ALL of one
+    branch per side, each of which is an index scan on
+    (party, created_at, id). The union is sorted and sliced in the database
+    and only the ids of the requested page are returned; the page is then
+    loaded through hydrate_queryset, so select_related/only apply as usual,
+    or a .values() queryset yields plain dicts for projection serializers.
+
+    The feed supports the parts of the QuerySet API used by filters and
+    paginators: filter, exclude, order_by, count, slicing and iteration.
+    """
+
+    model = Transaction
+
+    def __init__(
+        self,
+        branches: Sequence,
+        hydrate_queryset=None,
+        ordering: Sequence[str] = ("-created_at",),
+    ):
+        self.branches = [branch.order_by() for branch in branches]
+        self.hydrate_queryset = (
+            Transaction.objects.all() if hydrate_queryset is None else hydrate_queryset
+        )
+        self.ordering = tuple(ordering)
+
+    @classmethod
+    def for_user(cls, user, queryset=None, hydrate_queryset=None) -> "PartyFeed":
+        if queryset is None:
+            queryset = Transaction.objects.all()
+        return cls(
+            [
+                queryset.filter(sender=user),
+                # Rows where the user is also the sender come from the first branch
+                queryset.filter(receiver=user).exclude(sender=user),
+            ],
+            hydrate_queryset,
+        )
+
+    @classmethod
+    def for_account(
+        cls, account: BankAccount, queryset=None, hydrate_queryset=None
+    ) -> "PartyFeed":
+        if queryset is None:
+            queryset = Transaction.objects.all()
+        return cls(
+            [
+                queryset.filter(sender_account=account),
+                queryset.filter(receiver_account=account).exclude(
+                    sender_account=account
+                ),
+            ],
+            hydrate_queryset,
+        )
+
+    def _clone(self, branches=None, ordering=None) -> "PartyFeed":
+        return PartyFeed(
+            self.branches if branches is None else branches,
+            self.hydrate_queryset,
+            self.ordering if ordering is None else ordering,
+        )
+
+    def filter(self, *args, **kwargs) -> "PartyFeed":
+        return self._clone(
+            branches=[branch.filter(*args, **kwargs) for branch in self.branches]
+        )
+
+    def exclude(self, *args, **kwargs) -> "PartyFeed":
+        return self._clone(
+            branches=[branch.exclude(*args, **kwargs) for branch in self.branches]
+        )
+
+    def order_by(self, *ordering: str) -> "PartyFeed":
+        return self._clone(ordering=ordering)
+
+    def count(self) -> int:
+        return sum(branch.count() for branch in self.branches)
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def _total_ordering(self) -> tuple[list, list]:
+        ordering = list(self.ordering)
+        sort_fields = [field.lstrip("-") for field in ordering]
+        if "id" not in sort_fields:
+            # Ties are broken by id so that slices of the union never overlap
+            descending = bool(ordering) and ordering[0].startswith("-")
+            ordering.append("-id" if descending else "id")
+            sort_fields.append("id")
+        return ordering, sort_fields
+
+    def _ordered_ids(self):
+        ordering, sort_fields = self._total_ordering()
+        columns = ["id"] + [field for field in sort_fields if field != "id"]
+
+        first, *rest = [branch.values_list(*columns) for branch in self.branches]
+        return first.union(*rest, all=True).order_by(*ordering)
+
+    def first_id(self):
+        """Id of the first transaction in feed order, without loading it"""
+        rows = list(self._ordered_ids()[:1])
+        return rows[0][0] if rows else None
+
+    def stream_values(self, *columns: str, chunk_size: int = FEED_STREAM_CHUNK_SIZE):
+        """
+        Iterate over the whole feed as .values() dicts.
+
+        Every branch selects the requested columns itself, so there is no
+        hydration step, and the sorted union is read through a server-side
+        cursor chunk_size rows at a time. Memory use does not grow with the
+        size of the feed.
+        """
+        ordering, sort_fields = self._total_ordering()
+        columns = list(columns) + [
+            field for field in sort_fields if field not in columns
+        ]
+
+        first, *rest = [branch.values(*columns) for branch in self.branches]
+        return (
+            first.union(*rest, all=True)
+            .order_by(*ordering)
+            .iterator(chunk_size=chunk_size)
+        )
+
+    def _hydrate(self, ids: list) -> list:
+        rows = {
+            # hydrate_queryset may be a .values() queryset of plain dicts
+            row["id"] if isinstance(row, dict) else row.pk: row
+            for row in self.hydrate_queryset.filter(pk__in=ids)
+        }
+        return [rows[pk] for pk in ids if pk in rows]
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            if key < 0:
+                raise ValueError("Negative indexing is not supported.")
+            return self[key : key + 1][0]
+        ids = [row[0] for row in self._ordered_ids()[key]]
+        return self._hydrate(ids)
+
+    def __iter__(self):
+        ids = [row[0] for row in self._ordered_ids()]
+        for start in range(0, len(ids), FEED_HYDRATE_CHUNK_SIZE):
+            yield from self._hydrate(ids[start : start + FEED_HYDRATE_CHUNK_SIZE])
+
+
+def party_feed(
+    user, account: Optional[BankAccount] = None, queryset=None, hydrate_queryset=None
+) -> PartyFeed:
+    """
+    Feed of the user's transactions, narrowed to one of their accounts when
+    given. The account feed is driven by the account indexes with the user
+    condition applied as a filter.
+    """
+    if account is None:
+        return PartyFeed.for_user(user, queryset, hydrate_queryset)
+    if queryset is None:
+        queryset = Transaction.objects.all()
+    return PartyFeed.for_account(
+        account,
+        queryset.filter(sender=user) | queryset.filter(receiver=user),
+        hydrate_queryset,
+    )
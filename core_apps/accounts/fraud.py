@@ -0,0 +1,302 @@
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from os import getenv
+from time import time
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+
+from .models import BankAccount, Transaction
+
+User = get_user_model()
+
+# Each sliding window is split into this many buckets, which bounds the work
+# per counter update regardless of the window length.
+COUNTER_BUCKETS = 60
+
+
+@dataclass(frozen=True)
+class FraudThresholds:
+    large_transaction: Decimal
+    frequent_transactions: int
+
+
+def thresholds_from_env() -> Optional[FraudThresholds]:
+    large_transaction = getenv("LARGE_TRANSACTION_THRESHOLD")
+    frequent_transactions = getenv("FREQUENT_TRANSACTION_THRESHOLD")
+    if not large_transaction or not frequent_transactions:
+        return None
+    return FraudThresholds(
+        large_transaction=Decimal(large_transaction),
+        frequent_transactions=int(frequent_transactions),
+    )
+
+
+def time_window_from_env() -> timedelta:
+    return timedelta(hours=int(getenv("TIME_WINDOW_HOURS") or 1))
+
+
+def large_transactions(thresholds: FraudThresholds, since: datetime) -> list[str]:
+    rows = (
+        Transaction.objects.filter(
+            amount__gte=thresholds.large_transaction, created_at__gte=since
+        )
+        .order_by("created_at")
+        .values_list("amount", "user__email")
+    )
+    return [
+        f"Large transaction detected: {amount} by user {email}"
+        for amount, email in rows
+    ]
+
+
+def frequent_transactions(thresholds: FraudThresholds, since: datetime) -> list[str]:
+    rows = (
+        Transaction.objects.filter(created_at__gte=since, user__is_deleted=False)
+        .values("user__email")
+        .annotate(transaction_count=Count("id"))
+        .filter(transaction_count__gte=thresholds.frequent_transactions)
+        .order_by("user__email")
+        .values_list("transaction_count", "user__email")
+    )
+    return [
+        f"Frequent transactions detected: {transaction_count} by {email}"
+        for transaction_count, email in rows
+    ]
+
+
+def large_balance_changes(thresholds: FraudThresholds, since: datetime) -> list[str]:
+    """
+    Accounts whose net movement in the window exceeds the large transaction
+    threshold, computed over both legs of every transaction in one query.
+    """
+    transactions = Transaction._meta.db_table
+    accounts = BankAccount._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT account.account_number, SUM(movement.amount) AS total_change
+            FROM (
+                SELECT receiver_account_id AS account_id, amount
+                FROM {transactions}
+                WHERE created_at >= %(since)s AND NOT is_deleted
+                    AND receiver_account_id IS NOT NULL
+                UNION ALL
+                SELECT sender_account_id AS account_id, -amount
+                FROM {transactions}
+                WHERE created_at >= %(since)s AND NOT is_deleted
+                    AND sender_account_id IS NOT NULL
+            ) AS movement
+            JOIN {accounts} AS account ON account.id = movement.account_id
+            WHERE NOT account.is_deleted
+            GROUP BY account.id, account.account_number
+            HAVING ABS(SUM(movement.amount)) > %(threshold)s
+            ORDER BY account.account_number
+            """,
+            {"since": since, "threshold": thresholds.large_transaction},
+        )
+        rows = cursor.fetchall()
+    return [
+        f"Large balance change detected: {total_change} by user {account_number}"
+        for account_number, total_change in rows
+    ]
+
+
+def find_suspicious_activities(
+    thresholds: FraudThresholds, since: datetime
+) -> list[str]:
+    """
+    Evaluate the large transaction, frequent transaction and large balance
+    change rules for the window starting at since.
+
+    Each rule is a single grouped query, so the number of queries does not
+    grow with the number of users or accounts.
+    """
+    return (
+        large_transactions(thresholds, since)
+        + frequent_transactions(thresholds, since)
+        + large_balance_changes(thresholds, since)
+    )
+
+
+@dataclass(frozen=True)
+class WindowTotals:
+    count: int
+    amount_cents: int
+
+
+class CounterStore(ABC):
+    """
+    Sliding window counters of transaction count and net amount per key.
+
+    A window is kept as COUNTER_BUCKETS fixed buckets, so adding to a counter
+    and reading its window totals is constant work per transaction.
+    """
+
+    @abstractmethod
+    def add(
+        self, key: str, window_seconds: int, count: int, amount_cents: int
+    ) -> WindowTotals:
+        """Add to the current bucket and return the totals over the window"""
+
+    @staticmethod
+    def bucket_seconds(window_seconds: int) -> int:
+        return max(1, window_seconds // COUNTER_BUCKETS)
+
+
+class InMemoryCounterStore(CounterStore):
+    """Process local store, used when no REDIS_URL is configured and in tests"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def add(
+        self, key: str, window_seconds: int, count: int, amount_cents: int
+    ) -> WindowTotals:
+        bucket_seconds = self.bucket_seconds(window_seconds)
+        current = int(time() // bucket_seconds)
+        oldest = current - window_seconds // bucket_seconds + 1
+        with self._lock:
+            buckets = self._counters.setdefault(key, {})
+            for stale in [bucket for bucket in buckets if bucket < oldest]:
+                del buckets[stale]
+            bucket_count, bucket_amount = buckets.get(current, (0, 0))
+            buckets[current] = (bucket_count + count, bucket_amount + amount_cents)
+            return WindowTotals(
+                count=sum(bucket_count for bucket_count, _ in buckets.values()),
+                amount_cents=sum(amount for _, amount in buckets.values()),
+            )
+
+
+class RedisCounterStore(CounterStore):
+    """
+    Store shared by every web and worker process. Each counter is a Redis hash
+    holding a count and an amount field per bucket.
+    """
+
+    def __init__(self, url: str):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def add(
+        self, key: str, window_seconds: int, count: int, amount_cents: int
+    ) -> WindowTotals:
+        bucket_seconds = self.bucket_seconds(window_seconds)
+        current = int(time() // bucket_seconds)
+        oldest = current - window_seconds // bucket_seconds + 1
+
+        pipeline = self.client.pipeline()
+        pipeline.hincrby(key, f"c:{current}", count)
+        pipeline.hincrby(key, f"a:{current}", amount_cents)
+        pipeline.expire(key, window_seconds + bucket_seconds)
+        pipeline.hgetall(key)
+        *_, fields = pipeline.execute()
+
+        totals = {"c": 0, "a": 0}
+        stale = []
+        for field, value in fields.items():
+            kind, bucket = field.decode().split(":")
+            if int(bucket) < oldest:
+                stale.append(field)
+            else:
+                totals[kind] += int(value)
+        if stale:
+            self.client.hdel(key, *stale)
+        return WindowTotals(count=totals["c"], amount_cents=totals["a"])
+
+
+_counter_store = None
+
+
+def get_counter_store() -> CounterStore:
+    global _counter_store
+    if _counter_store is None:
+        if settings.REDIS_URL:
+            _counter_store = RedisCounterStore(settings.REDIS_URL)
+        else:
+            _counter_store = InMemoryCounterStore()
+    return _counter_store
+
+
+def to_cents(amount: Decimal) -> int:
+    return int(amount * 100)
+
+
+def record_transaction_activity(
+    bank_transaction: Transaction,
+    store: Optional[CounterStore] = None,
+    user_email: Optional[str] = None,
+) -> list[str]:
+    """
+    Add a committed transaction to the sliding window counters and evaluate
+    the fraud rules against the updated windows.
+
+    user_email is the email of the transaction's user, read when the
+    transaction was saved. Without it the email is only queried when a
+    rule fires, never on the common path.
+
+    Returns:
+        Descriptions of the rules this transaction pushed over a threshold
+    """
+    thresholds = thresholds_from_env()
+    if thresholds is None:
+        return []
+    if store is None:
+        store = get_counter_store()
+    window_seconds = int(time_window_from_env().total_seconds())
+
+    def email() -> str:
+        if user_email is not None:
+            return user_email
+        return (
+            User.objects.filter(pk=bank_transaction.user_id)
+            .values_list("email", flat=True)
+            .first()
+        )
+
+    activities = []
+    if bank_transaction.amount >= thresholds.large_transaction:
+        activities.append(
+            f"Large transaction detected: {bank_transaction.amount} by user {email()}"
+        )
+
+    user_totals = store.add(
+        f"fraud:user:{bank_transaction.user_id}", window_seconds, 1, 0
+    )
+    # Counts grow by one, so only the transaction that reaches the threshold alerts
+    if user_totals.count == thresholds.frequent_transactions:
+        activities.append(
+            f"Frequent transactions detected: {user_totals.count} by {email()}"
+        )
+
+    amount_cents = to_cents(bank_transaction.amount)
+    threshold_cents = to_cents(thresholds.large_transaction)
+    legs = []
+    if bank_transaction.receiver_account_id:
+        legs.append((bank_transaction.receiver_account_id, amount_cents))
+    if bank_transaction.sender_account_id:
+        legs.append((bank_transaction.sender_account_id, -amount_cents))
+    if bank_transaction.receiver_account_id == bank_transaction.sender_account_id:
+        legs = []
+
+    for account_id, delta in legs:
+        totals = store.add(f"fraud:account:{account_id}", window_seconds, 1, delta)
+        previous = totals.amount_cents - delta
+        if abs(previous) <= threshold_cents < abs(totals.amount_cents):
+            account_number = (
+                BankAccount.objects.filter(pk=account_id)
+                .values_list("account_number", flat=True)
+                .first()
+            )
+            activities.append(
+                f"Large balance change detected: {Decimal(totals.amount_cents) / 100} by user {account_number}"
+            )
+    return activities
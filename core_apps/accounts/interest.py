@@ -0,0 +1,310 @@
+from dataclasses import dataclass
+from decimal import ROUND_HALF_UP, Decimal
+from datetime import date
+from time import perf_counter
+from typing import Optional
+from uuid import UUID
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from loguru import logger
+
+from core_apps.common.cache import bump_versions_on_commit
+
+from .ledger import post_transactions, with_ledger_balance
+from .models import (
+    BankAccount,
+    InterestRun,
+    InterestRunShard,
+    LedgerEntry,
+    Transaction,
+)
+from .reference_utils import generate_transaction_references
+
+INTEREST_CHUNK_SIZE = 1000
+
+INTEREST_BEARING_TYPES = [
+    BankAccount.AccountType.SAVINGS,
+    BankAccount.AccountType.FIXED,
+]
+
+
+@dataclass
+class InterestChunk:
+    last_account_id: object
+    accounts: int
+    credited: int
+    total_interest: Decimal
+
+
+@dataclass
+class InterestRunResult:
+    accounts: int
+    credited: int
+    total_interest: Decimal
+    elapsed: float
+
+    @property
+    def accounts_per_second(self) -> float:
+        return self.accounts / self.elapsed if self.elapsed else 0.0
+
+
+def interest_bearing_accounts():
+    return BankAccount.objects.filter(account_type__in=INTEREST_BEARING_TYPES)
+
+
+def daily_rates() -> dict:
+    """Daily interest rate per account type, taken from annual_interest_rate"""
+    return {
+        account_type: BankAccount(account_type=account_type).annual_interest_rate
+        / Decimal("365")
+        for account_type in INTEREST_BEARING_TYPES
+    }
+
+
+def apply_interest_chunk(
+    queryset=None,
+    after_id=None,
+    upper_id=None,
+    chunk_size: int = INTEREST_CHUNK_SIZE,
+    rates: Optional[dict] = None,
+) -> Optional[InterestChunk]:
+    """
+    Credit daily interest to the next chunk of accounts ordered by primary key.
+
+    The chunk is locked and read with its ledger balances in one SELECT,
+    interest is computed in Python over the fetched balances, and the
+    interest transactions and their ledger postings are written in a single
+    commit.
+
+    Returns:
+        The chunk summary, or None when there are no accounts left
+    """
+    if queryset is None:
+        queryset = interest_bearing_accounts()
+    if rates is None:
+        rates = daily_rates()
+
+    queryset = queryset.order_by("pk")
+    if after_id is not None:
+        queryset = queryset.filter(pk__gt=after_id)
+    if upper_id is not None:
+        queryset = queryset.filter(pk__lte=upper_id)
+
+    with transaction.atomic():
+        rows = list(
+            with_ledger_balance(queryset)
+            .select_for_update()
+            .values_list("pk", "user_id", "ledger_balance", "account_type")[:chunk_size]
+        )
+        if not rows:
+            return None
+
+        credits = []
+        for account_id, user_id, balance, account_type in rows:
+            interest = (balance * rates[account_type]).quantize(
+                Decimal(".01"), rounding=ROUND_HALF_UP
+            )
+            if interest > 0:
+                credits.append((account_id, user_id, interest))
+
+        references = generate_transaction_references(
+            Transaction.TransactionType.INTEREST, len(credits)
+        )
+        interest_transactions = Transaction.objects.bulk_create(
+            [
+                Transaction(
+                    user_id=user_id,
+                    amount=interest,
+                    transaction_type=Transaction.TransactionType.INTEREST,
+                    description="Daily interest applied",
+                    receiver_id=user_id,
+                    receiver_account_id=account_id,
+                    status=Transaction.TransactionStatus.COMPLETED,
+                    reference_number=reference,
+                )
+                for (account_id, user_id, interest), reference in zip(
+                    credits, references
+                )
+            ]
+        )
+        post_transactions(
+            (
+                interest_transaction,
+                LedgerEntry.LedgerAccount.INTEREST_EXPENSE,
+                BankAccount(pk=interest_transaction.receiver_account_id),
+            )
+            for interest_transaction in interest_transactions
+        )
+        # bulk_create sends no post_save, so invalidate cached views here
+        bump_versions_on_commit("account", [account_id for account_id, _, _ in credits])
+        bump_versions_on_commit("user", [user_id for _, user_id, _ in credits])
+
+    return InterestChunk(
+        last_account_id=rows[-1][0],
+        accounts=len(rows),
+        credited=len(credits),
+        total_interest=sum((interest for _, _, interest in credits), Decimal("0.00")),
+    )
+
+
+def run_daily_interest(
+    queryset=None, chunk_size: int = INTEREST_CHUNK_SIZE
+) -> InterestRunResult:
+    """Apply daily interest to every interest bearing account, one chunk per commit"""
+    rates = daily_rates()
+    accounts = credited = 0
+    total_interest = Decimal("0.00")
+    last_account_id = None
+
+    started = perf_counter()
+    while True:
+        chunk = apply_interest_chunk(
+            queryset,
+            after_id=last_account_id,
+            chunk_size=chunk_size,
+            rates=rates,
+        )
+        if chunk is None:
+            break
+        accounts += chunk.accounts
+        credited += chunk.credited
+        total_interest += chunk.total_interest
+        last_account_id = chunk.last_account_id
+
+    result = InterestRunResult(
+        accounts=accounts,
+        credited=credited,
+        total_interest=total_interest,
+        elapsed=perf_counter() - started,
+    )
+    logger.info(
+        f"Applied {total_interest} daily interest to {credited} of {accounts} accounts in {result.elapsed:.2f}s ({result.accounts_per_second:.1f} accounts/sec)"
+    )
+    return result
+
+
+def shard_bounds(shard_count: int) -> list[tuple[Optional[UUID], Optional[UUID]]]:
+    """
+    Split the account id space into contiguous ranges.
+
+    Account ids are random UUIDs, so equal slices of the 128-bit space hold
+    roughly equal numbers of accounts. Each range is an exclusive lower bound
+    and an inclusive upper bound, with None meaning unbounded.
+    """
+    step = 2**128 // shard_count
+    bounds = []
+    for index in range(shard_count):
+        lower = UUID(int=index * step - 1) if index else None
+        upper = UUID(int=(index + 1) * step - 1) if index < shard_count - 1 else None
+        bounds.append((lower, upper))
+    return bounds
+
+
+def start_interest_run(
+    run_date: Optional[date] = None, shard_count: Optional[int] = None
+) -> InterestRun:
+    """
+    Fetch or create the interest run for a day together with its shards.
+
+    There is at most one run per day, so calling this again for the same day
+    returns the existing run and its shard cursors instead of starting over.
+    """
+    if run_date is None:
+        run_date = timezone.localdate()
+    if shard_count is None:
+        shard_count = settings.INTEREST_RUN_SHARDS
+
+    with transaction.atomic():
+        run, created = InterestRun.objects.get_or_create(
+            run_date=run_date, defaults={"shard_count": shard_count}
+        )
+        if created:
+            InterestRunShard.objects.bulk_create(
+                [
+                    InterestRunShard(
+                        run=run,
+                        shard_index=index,
+                        last_account_id=lower,
+                        upper_id=upper,
+                    )
+                    for index, (lower, upper) in enumerate(shard_bounds(shard_count))
+                ]
+            )
+    return run
+
+
+def process_interest_shard(
+    shard_id, chunk_size: int = INTEREST_CHUNK_SIZE
+) -> InterestRunShard:
+    """
+    Credit interest to every account in a shard, resuming from its cursor.
+
+    The shard row is locked and its cursor advanced in the same commit as each
+    chunk of interest, so a retried or duplicated shard task picks up after
+    the last credited account and never credits an account twice.
+    """
+    rates = daily_rates()
+    while True:
+        with transaction.atomic():
+            shard = InterestRunShard.objects.select_for_update().get(pk=shard_id)
+            if shard.status == InterestRun.RunStatus.COMPLETED:
+                return shard
+
+            chunk = apply_interest_chunk(
+                after_id=shard.last_account_id,
+                upper_id=shard.upper_id,
+                chunk_size=chunk_size,
+                rates=rates,
+            )
+            if chunk is None:
+                shard.status = InterestRun.RunStatus.COMPLETED
+                shard.completed_at = timezone.now()
+                shard.save(update_fields=["status", "completed_at", "updated_at"])
+                logger.info(
+                    f"Interest shard {shard.shard_index} of run {shard.run_id} completed: {shard.credited} of {shard.accounts} accounts credited"
+                )
+                return shard
+
+            shard.last_account_id = chunk.last_account_id
+            shard.accounts += chunk.accounts
+            shard.credited += chunk.credited
+            shard.total_interest += chunk.total_interest
+            shard.save(
+                update_fields=[
+                    "last_account_id",
+                    "accounts",
+                    "credited",
+                    "total_interest",
+                    "updated_at",
+                ]
+            )
+
+
+def complete_interest_run(run_id) -> InterestRun:
+    """Roll the shard totals up into the run once every shard has finished"""
+    with transaction.atomic():
+        run = InterestRun.objects.select_for_update().get(pk=run_id)
+        shards = run.shards.all()
+        if shards.exclude(status=InterestRun.RunStatus.COMPLETED).exists():
+            logger.warning(f"Interest run {run.run_date} still has pending shards")
+            return run
+
+        totals = shards.aggregate(
+            accounts=Sum("accounts"),
+            credited=Sum("credited"),
+            total_interest=Sum("total_interest"),
+        )
+        run.accounts = totals["accounts"] or 0
+        run.credited = totals["credited"] or 0
+        run.total_interest = totals["total_interest"] or Decimal("0.00")
+        run.status = InterestRun.RunStatus.COMPLETED
+        run.completed_at = run.completed_at or timezone.now()
+        run.save()
+
+    logger.info(
+        f"Interest run {run.run_date} completed: {run.total_interest} credited to {run.credited} of {run.accounts} accounts across {run.shard_count} shards"
+    )
+    return run
@@ -0,0 +1,320 @@
+from decimal import Decimal
+from typing import Iterable, Optional, Union
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import OperationalError, connection, transaction
+from django.db.models import (
+    Case,
+    DecimalField,
+    F,
+    Max,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+from django.utils.translation import gettext_lazy as _
+from loguru import logger
+
+from core_apps.common.cache import bump_versions_on_commit
+
+from .models import BalanceSnapshot, BankAccount, LedgerEntry, Transaction
+
+# Advisory lock ids. Every posting holds POSTING_LOCK shared until it
+# commits, and snapshot runs take SNAPSHOT_RUN_LOCK so only one runs at a time
+POSTING_LOCK = 0x4C454447
+SNAPSHOT_RUN_LOCK = 0x534E4150
+
+BALANCE_REFRESH_SCHEDULED_KEY = "balance-refresh-scheduled"
+
+LedgerSide = Union[BankAccount, str]
+
+ZERO = Decimal("0.00")
+
+SIGNED_AMOUNT = Case(
+    When(entry_type=LedgerEntry.EntryType.CREDIT, then=F("amount")),
+    default=-F("amount"),
+    output_field=DecimalField(max_digits=12, decimal_places=2),
+)
+
+
+def _leg(
+    bank_transaction: Transaction, side: LedgerSide, entry_type: str, amount: Decimal
+) -> LedgerEntry:
+    if isinstance(side, BankAccount):
+        return LedgerEntry(
+            transaction=bank_transaction,
+            ledger_account=LedgerEntry.LedgerAccount.CUSTOMER,
+            bank_account=side,
+            entry_type=entry_type,
+            amount=amount,
+        )
+    return LedgerEntry(
+        transaction=bank_transaction,
+        ledger_account=side,
+        entry_type=entry_type,
+        amount=amount,
+    )
+
+
+def schedule_balance_refresh() -> None:
+    """
+    Take snapshots after BALANCE_REFRESH_DELAY unless a run is already due.
+
+    Every account posted to in the meantime is snapshotted by that one run.
+    """
+    from .tasks import snapshot_account_balances
+
+    delay = settings.BALANCE_REFRESH_DELAY
+    if cache.add(BALANCE_REFRESH_SCHEDULED_KEY, True, timeout=delay + 1):
+        snapshot_account_balances.apply_async(countdown=delay)
+
+
+def post_transactions(
+    postings: Iterable[tuple[Transaction, LedgerSide, LedgerSide]],
+) -> None:
+    """
+    Record the debit and credit legs for a batch of transactions.
+
+    Each posting is a (transaction, debit, credit) tuple where a side is either
+    a customer BankAccount or a LedgerEntry.LedgerAccount code. Entries are
+    only ever inserted and no account row is written while they are, so the
+    cached account_balance of every customer account posted to is refreshed
+    once the postings commit. Use ledger_balance for funds checks, which run
+    before that.
+    """
+    entries = []
+    account_ids = set()
+    for bank_transaction, debit, credit in postings:
+        amount = bank_transaction.amount
+        if amount <= 0:
+            raise ValueError(_("Ledger postings must have a positive amount"))
+        entries.append(
+            _leg(bank_transaction, debit, LedgerEntry.EntryType.DEBIT, amount)
+        )
+        entries.append(
+            _leg(bank_transaction, credit, LedgerEntry.EntryType.CREDIT, amount)
+        )
+        account_ids.update(
+            side.pk for side in (debit, credit) if isinstance(side, BankAccount)
+        )
+
+    with transaction.atomic():
+        # Taken before the entry ids are, and held until the outermost commit
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock_shared(%s)", [POSTING_LOCK])
+        LedgerEntry.objects.bulk_create(entries)
+        # Robust, so a failed refresh is logged instead of failing a posting
+        # that has already committed. The next snapshot run repairs it.
+        transaction.on_commit(lambda: refresh_cached_balances(account_ids), robust=True)
+        transaction.on_commit(schedule_balance_refresh)
+
+
+def post_transaction(
+    bank_transaction: Transaction, debit: LedgerSide, credit: LedgerSide
+) -> None:
+    """Record a single balanced debit/credit pair for a transaction"""
+    post_transactions([(bank_transaction, debit, credit)])
+
+
+def ledger_balance(account: BankAccount) -> Decimal:
+    """Latest balance snapshot plus every posting made since it was taken"""
+    snapshot = (
+        BalanceSnapshot.objects.filter(bank_account=account)
+        .order_by("-last_entry_id")
+        .values("balance", "last_entry_id")
+        .first()
+    ) or {"balance": ZERO, "last_entry_id": 0}
+
+    movement = LedgerEntry.objects.filter(
+        bank_account=account, id__gt=snapshot["last_entry_id"]
+    ).aggregate(total=Sum(SIGNED_AMOUNT))["total"]
+
+    return snapshot["balance"] + (movement or ZERO)
+
+
+def with_ledger_balance(queryset):
+    """Annotate accounts with ledger_balance computed from snapshots and postings"""
+    latest_snapshot = BalanceSnapshot.objects.filter(
+        bank_account=OuterRef("pk")
+    ).order_by("-last_entry_id")
+    movement = (
+        LedgerEntry.objects.filter(
+            bank_account=OuterRef("pk"),
+            id__gt=OuterRef("snapshot_last_entry_id"),
+        )
+        .values("bank_account")
+        .annotate(total=Sum(SIGNED_AMOUNT))
+        .values("total")
+    )
+    return queryset.annotate(
+        snapshot_balance=Coalesce(
+            Subquery(latest_snapshot.values("balance")[:1]), Value(ZERO)
+        ),
+        snapshot_last_entry_id=Coalesce(
+            Subquery(latest_snapshot.values("last_entry_id")[:1]), Value(0)
+        ),
+    ).annotate(
+        ledger_balance=F("snapshot_balance") + Coalesce(Subquery(movement), Value(ZERO))
+    )
+
+
+def refresh_cached_balances(account_ids: Iterable) -> None:
+    """
+    Set the cached account_balance of the given accounts from the ledger.
+
+    The rows are locked in primary key order, like every other caller, before
+    the balances are read. A statement that waited for a row lock still reads
+    from the snapshot it started with, so the read is a separate statement:
+    of two refreshes racing on one account, the one that writes last has
+    seen every posting the other saw.
+    """
+    account_ids = sorted(set(account_ids))
+    if not account_ids:
+        return
+
+    with transaction.atomic():
+        user_ids = list(
+            BankAccount.objects.select_for_update()
+            .filter(pk__in=account_ids)
+            .order_by("pk")
+            .values_list("user_id", flat=True)
+        )
+        balances = with_ledger_balance(
+            BankAccount.objects.filter(pk__in=account_ids)
+        ).values_list("pk", "ledger_balance")
+        BankAccount.objects.bulk_update(
+            [
+                BankAccount(pk=account_id, account_balance=balance)
+                for account_id, balance in balances
+            ],
+            ["account_balance"],
+            batch_size=1000,
+        )
+        # bulk_update sends no post_save, so invalidate cached views here
+        bump_versions_on_commit("account", account_ids)
+        bump_versions_on_commit("user", user_ids)
+
+
+def committed_entry_id() -> Optional[int]:
+    """
+    Highest ledger entry id with no posting still in flight at or below it.
+
+    Entry ids come from a sequence when a posting runs, not when it commits,
+    so a posting that has not committed yet can hold a lower id than one that
+    already has. Taking POSTING_LOCK exclusively waits for every posting in
+    flight to commit or roll back, and is released as soon as the highest
+    id has been read. New postings queue behind it for that long, so the
+    wait is bounded by BALANCE_SNAPSHOT_LOCK_TIMEOUT.
+
+    Raises:
+        OperationalError: If the postings in flight did not finish in time
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SET LOCAL lock_timeout = %s",
+                [f"{settings.BALANCE_SNAPSHOT_LOCK_TIMEOUT}s"],
+            )
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [POSTING_LOCK])
+        return LedgerEntry.objects.aggregate(cutoff=Max("id"))["cutoff"]
+
+
+def take_balance_snapshots() -> int:
+    """
+    Snapshot every account that has postings since the previous snapshot run.
+
+    The cutoff is the committed high-water mark, so no posting can land
+    behind a snapshot. The cached account_balance of every account
+    snapshotted is refreshed afterwards, which repairs any refresh that
+    failed after its postings committed.
+
+    Returns:
+        The number of snapshots written
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", [SNAPSHOT_RUN_LOCK])
+        if not cursor.fetchone()[0]:
+            logger.info("Balance snapshots are already being taken")
+            return 0
+    try:
+        return _take_balance_snapshots()
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [SNAPSHOT_RUN_LOCK])
+
+
+def _take_balance_snapshots() -> int:
+    try:
+        cutoff_id = committed_entry_id()
+    except OperationalError as e:
+        logger.warning(f"Skipped balance snapshots, postings still in flight: {e}")
+        return 0
+    if cutoff_id is None:
+        return 0
+
+    previous_cutoff = (
+        BalanceSnapshot.objects.aggregate(previous=Max("last_entry_id"))["previous"]
+        or 0
+    )
+    if cutoff_id <= previous_cutoff:
+        return 0
+
+    movements = dict(
+        LedgerEntry.objects.filter(
+            bank_account__isnull=False,
+            id__gt=previous_cutoff,
+            id__lte=cutoff_id,
+        )
+        .values("bank_account")
+        .annotate(total=Sum(SIGNED_AMOUNT))
+        .values_list("bank_account", "total")
+    )
+    if not movements:
+        return 0
+
+    previous_balances = dict(
+        BalanceSnapshot.objects.filter(bank_account__in=movements)
+        .order_by("bank_account", "-last_entry_id")
+        .distinct("bank_account")
+        .values_list("bank_account", "balance")
+    )
+    balances = {
+        account_id: previous_balances.get(account_id, ZERO) + total
+        for account_id, total in movements.items()
+    }
+    snapshots = BalanceSnapshot.objects.bulk_create(
+        [
+            BalanceSnapshot(
+                bank_account_id=account_id,
+                balance=balance,
+                last_entry_id=cutoff_id,
+            )
+            for account_id, balance in balances.items()
+        ],
+        batch_size=1000,
+    )
+    refresh_cached_balances(balances)
+    logger.info(
+        f"Took {len(snapshots)} balance snapshots up to ledger entry {cutoff_id}"
+    )
+    return len(snapshots)
+
+
+def find_balance_mismatches(queryset=None):
+    """
+    Accounts whose cached account_balance disagrees with the ledger.
+
+    Postings that have committed but whose refresh has not run yet show up
+    here until it does.
+    """
+    if queryset is None:
+        queryset = BankAccount.objects.all()
+    return (
+        with_ledger_balance(queryset)
+        .exclude(account_balance=F("ledger_balance"))
+        .values_list("account_number", "account_balance", "ledger_balance")
+    )
@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import Max, Q
+
+from core_apps.accounts.models import (
+    BalanceSnapshot,
+    BankAccount,
+    LedgerEntry,
+    Transaction,
+)
+
+
+User = get_user_model()
+
+BENCHMARK_EMAIL_DOMAIN = "benchmark.invalid"
+
+
+def create_benchmark_accounts(
+    count: int, balance: Decimal, tag: str = "bench"
+) -> list[BankAccount]:
+    """Bulk create throwaway users with one active savings account each"""
+    next_id_no = (
+        User.objects.all_with_deleted().aggregate(Max("id_no"))["id_no__max"] or 0
+    ) + 1
+    users = User.objects.bulk_create(
+        [
+            User(
+                username=f"BM-{tag[:3].upper()}{index:06d}"[:12],
+                email=f"{tag}-{index}@{BENCHMARK_EMAIL_DOMAIN}",
+                first_name="Benchmark",
+                last_name=f"User {index}",
+                id_no=next_id_no + index,
+                security_question=User.SecurityQuestions.FAVORITE_COLOR,
+                security_answer="benchmark",
+                password="!",
+            )
+            for index in range(count)
+        ]
+    )
+    accounts = BankAccount.objects.bulk_create(
+        [
+            BankAccount(
+                user=user,
+                account_number=f"99{next_id_no + index:014d}",
+                account_balance=balance,
+                account_type=BankAccount.AccountType.SAVINGS,
+                account_status=BankAccount.AccountStatus.ACTIVE,
+                kyc_submitted=True,
+                kyc_verified=True,
+                fully_activated=True,
+                is_primary=True,
+            )
+            for index, user in enumerate(users)
+        ]
+    )
+    BalanceSnapshot.objects.bulk_create(
+        [BalanceSnapshot(bank_account=account, balance=balance) for account in accounts]
+    )
+    return accounts
+
+
+def purge_benchmark_data(tag: str = "bench") -> None:
+    """Permanently remove everything created by create_benchmark_accounts"""
+    users = User.objects.all_with_deleted().filter(
+        email__startswith=f"{tag}-", email__endswith=f"@{BENCHMARK_EMAIL_DOMAIN}"
+    )
+    accounts = BankAccount.objects.all_with_deleted().filter(user__in=users)
+    transactions = Transaction.objects.all_with_deleted().filter(
+        Q(sender_account__in=accounts)
+        | Q(receiver_account__in=accounts)
+        | Q(user__in=users)
+    )
+    LedgerEntry.objects.filter(transaction__in=transactions).delete()
+    BalanceSnapshot.objects.filter(bank_account__in=accounts).delete()
+    transactions.hard_delete()
+    accounts.hard_delete()
+    users.hard_delete()
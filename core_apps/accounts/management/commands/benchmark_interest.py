@@ -0,0 +1,56 @@
+from decimal import Decimal
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core_apps.accounts.interest import run_daily_interest
+from core_apps.accounts.models import BankAccount
+
+from ._fixtures import create_benchmark_accounts, purge_benchmark_data
+
+
+class Command(BaseCommand):
+    help = "Compares the per-account and bulk daily interest paths in accounts/sec"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--accounts", type=int, default=5000)
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--keep", action="store_true", help="Keep the benchmark accounts"
+        )
+
+    def handle(self, *args, **options):
+        tag = "interest"
+        purge_benchmark_data(tag)
+        accounts = create_benchmark_accounts(
+            options["accounts"], balance=Decimal("25000.00"), tag=tag
+        )
+        self.stdout.write(f"Created {len(accounts)} savings accounts")
+
+        started = perf_counter()
+        for account in accounts:
+            with transaction.atomic():
+                account.apply_daily_interest()
+        elapsed = perf_counter() - started
+        self.stdout.write(
+            f"Per-account path: {len(accounts)} accounts in {elapsed:.2f}s ({len(accounts) / elapsed:.1f} accounts/sec)"
+        )
+
+        result = run_daily_interest(
+            queryset=BankAccount.objects.filter(
+                pk__in=[account.pk for account in accounts]
+            ),
+            chunk_size=options["chunk_size"],
+        )
+        self.stdout.write(
+            f"Bulk path: {result.accounts} accounts in {result.elapsed:.2f}s ({result.accounts_per_second:.1f} accounts/sec)"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Speedup: {result.accounts_per_second / (len(accounts) / elapsed):.1f}x"
+            )
+        )
+
+        if not options["keep"]:
+            purge_benchmark_data(tag)
@@ -0,0 +1,82 @@
+import json
+from decimal import Decimal
+from timeit import timeit
+
+from django.core.management.base import BaseCommand
+from rest_framework.response import Response
+
+from core_apps.accounts.models import Transaction
+from core_apps.accounts.serializers import TransactionSerializer
+from core_apps.common.encoders import UUIDEncoder, orjson
+from core_apps.common.renderers import GenericJSONRenderer
+
+from ._fixtures import create_benchmark_accounts, purge_benchmark_data
+
+
+def legacy_render(data, status_code: int, object_label: str) -> bytes:
+    """GenericJSONRenderer.render as it was before the fast path"""
+    return json.dumps(
+        {"status_code": status_code, object_label: data}, cls=UUIDEncoder
+    ).encode("utf-8")
+
+
+class Command(BaseCommand):
+    help = "Compares GenericJSONRenderer with the previous json.dumps renderer on a page of transactions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100)
+        parser.add_argument("--iterations", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        tag = "render"
+        purge_benchmark_data(tag)
+        accounts = create_benchmark_accounts(2, balance=Decimal("1000.00"), tag=tag)
+        sender_account, receiver_account = accounts
+        for index in range(options["rows"]):
+            Transaction.objects.create(
+                user=sender_account.user,
+                sender=sender_account.user,
+                sender_account=sender_account,
+                receiver=receiver_account.user,
+                receiver_account=receiver_account,
+                amount=Decimal("10.00") + index,
+                description=f"Benchmark transfer {index}",
+                transaction_type=Transaction.TransactionType.TRANSFER,
+                status=Transaction.TransactionStatus.COMPLETED,
+            )
+        page = Transaction.objects.select_related(
+            "sender", "receiver", "sender_account", "receiver_account", "created_by"
+        ).filter(sender_account=sender_account)
+        data = {
+            "count": options["rows"],
+            "next": None,
+            "previous": None,
+            "results": TransactionSerializer(page, many=True).data,
+        }
+        purge_benchmark_data(tag)
+
+        renderer = GenericJSONRenderer()
+        context = {"response": Response(status=200), "view": None}
+        iterations = options["iterations"]
+
+        legacy = timeit(
+            lambda: legacy_render(data, 200, renderer.object_label), number=iterations
+        )
+        fast = timeit(
+            lambda: renderer.render(data, renderer_context=context), number=iterations
+        )
+
+        self.stdout.write(
+            f"Encoder: {'orjson' if orjson is not None else 'stdlib json'}"
+        )
+        self.stdout.write(
+            f"json.dumps renderer: {legacy / iterations * 1e6:.1f}us per {options['rows']} row page"
+        )
+        self.stdout.write(
+            f"GenericJSONRenderer: {fast / iterations * 1e6:.1f}us per {options['rows']} row page"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {legacy / fast:.1f}x"))
+
+        rendered = renderer.render(data, renderer_context=context)
+        if json.loads(rendered) != json.loads(legacy_render(data, 200, "object")):
+            self.stdout.write(self.style.ERROR("Rendered payloads differ"))
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import BytesIO
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from reportlab.lib.pagesizes import landscape, letter
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table
+
+from core_apps.accounts.statements import (
+    STATEMENT_COL_WIDTHS,
+    STATEMENT_HEADER,
+    STATEMENT_TABLE_STYLE,
+    TITLE_STYLE,
+    render_statement,
+    statement_row,
+)
+
+
+def legacy_render_statement(rows, title: str) -> bytes:
+    """The statement as generate_transaction_pdf built it, as one table"""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=landscape(letter),
+        rightMargin=30,
+        leftMargin=30,
+        topMargin=30,
+        bottomMargin=18,
+    )
+    table = Table([STATEMENT_HEADER] + list(rows), colWidths=STATEMENT_COL_WIDTHS)
+    table.setStyle(STATEMENT_TABLE_STYLE)
+    doc.build([Paragraph(title, TITLE_STYLE), Spacer(1, 12), table])
+    return buffer.getvalue()
+
+
+def synthetic_rows(count: int):
+    started = datetime(2024, 1, 1)
+    for index in range(count):
+        yield statement_row(
+            {
+                "created_at": started + timedelta(minutes=index),
+                "transaction_type": "transfer",
+                "amount": Decimal("10.00") + index % 500,
+                "description": f"Benchmark transfer number {index} for the statement",
+                "status": "completed",
+                "sender_id": 1,
+                "sender__first_name": "benchmark",
+                "sender__last_name": "sender",
+                "receiver_id": 2,
+                "receiver__first_name": "benchmark",
+                "receiver__last_name": "receiver",
+            }
+        )
+
+
+class Command(BaseCommand):
+    help = "Times transaction statement PDF rendering at increasing row counts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            default="1000,10000,100000",
+            help="Comma separated row counts to render",
+        )
+        parser.add_argument(
+            "--legacy-max-rows",
+            type=int,
+            default=10000,
+            help="Also time the single table renderer up to this many rows",
+        )
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["rows"].split(",")]
+        for size in sizes:
+            started = perf_counter()
+            pdf = render_statement(synthetic_rows(size), "Benchmark statement")
+            elapsed = perf_counter() - started
+            line = f"{size:>7} rows: {elapsed:8.2f}s ({elapsed / size * 1000:.3f} ms/row, {len(pdf) // 1024} KiB)"
+
+            if size <= options["legacy_max_rows"]:
+                started = perf_counter()
+                legacy_render_statement(synthetic_rows(size), "Benchmark statement")
+                legacy_elapsed = perf_counter() - started
+                line += f"  single table: {legacy_elapsed:8.2f}s ({legacy_elapsed / size * 1000:.3f} ms/row)"
+            self.stdout.write(line)
@@ -0,0 +1,81 @@
+from datetime import timedelta
+from decimal import Decimal
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core_apps.accounts.fraud import FraudThresholds, find_suspicious_activities
+from core_apps.accounts.models import Transaction
+from core_apps.accounts.reference_utils import generate_transaction_references
+
+from ._fixtures import create_benchmark_accounts, purge_benchmark_data
+
+
+class Command(BaseCommand):
+    help = "Shows that suspicious activity detection runs a fixed number of queries as the number of users grows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users",
+            type=int,
+            nargs="+",
+            default=[100, 1000, 5000],
+            help="User counts to benchmark",
+        )
+        parser.add_argument("--transactions-per-user", type=int, default=5)
+
+    def handle(self, *args, **options):
+        tag = "fraud"
+        thresholds = FraudThresholds(
+            large_transaction=Decimal("5000.00"), frequent_transactions=5
+        )
+        for user_count in options["users"]:
+            purge_benchmark_data(tag)
+            accounts = create_benchmark_accounts(
+                user_count, balance=Decimal("100000.00"), tag=tag
+            )
+            self.create_transfers(accounts, options["transactions_per_user"])
+
+            since = timezone.now() - timedelta(hours=1)
+            with CaptureQueriesContext(connection) as queries:
+                started = perf_counter()
+                activities = find_suspicious_activities(thresholds, since)
+                elapsed = perf_counter() - started
+
+            self.stdout.write(
+                f"{user_count} users: {len(queries)} queries, {len(activities)} activities flagged in {elapsed * 1000:.1f}ms"
+            )
+            purge_benchmark_data(tag)
+
+    def create_transfers(self, accounts, per_user):
+        transfers = []
+        for index, sender_account in enumerate(accounts):
+            receiver_account = accounts[(index + 1) % len(accounts)]
+            for number in range(per_user):
+                # Every tenth user sends one large transfer
+                amount = (
+                    Decimal("6000.00")
+                    if index % 10 == 0 and number == 0
+                    else Decimal("10.00")
+                )
+                transfers.append(
+                    Transaction(
+                        user_id=sender_account.user_id,
+                        sender_id=sender_account.user_id,
+                        sender_account=sender_account,
+                        receiver_id=receiver_account.user_id,
+                        receiver_account=receiver_account,
+                        amount=amount,
+                        transaction_type=Transaction.TransactionType.TRANSFER,
+                        status=Transaction.TransactionStatus.COMPLETED,
+                    )
+                )
+        references = generate_transaction_references(
+            Transaction.TransactionType.TRANSFER, len(transfers)
+        )
+        for transfer, reference in zip(transfers, references):
+            transfer.reference_number = reference
+        Transaction.objects.bulk_create(transfers, batch_size=2000)
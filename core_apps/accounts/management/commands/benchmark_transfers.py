@@ -0,0 +1,109 @@
+import random
+import statistics
+import threading
+from decimal import Decimal
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.db.models import Sum
+
+from core_apps.accounts.ledger import with_ledger_balance
+from core_apps.accounts.models import BankAccount
+from core_apps.accounts.settlement import SettlementError, settle_transfer
+
+from ._fixtures import create_benchmark_accounts, purge_benchmark_data
+
+
+class Command(BaseCommand):
+    help = "Runs parallel transfers between a few hot accounts and reports throughput and lock wait time"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--transfers", type=int, default=1000)
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--accounts", type=int, default=4)
+        parser.add_argument("--amount", type=Decimal, default=Decimal("1.00"))
+        parser.add_argument(
+            "--keep", action="store_true", help="Keep the benchmark accounts"
+        )
+
+    def handle(self, *args, **options):
+        tag = "transfer"
+        purge_benchmark_data(tag)
+        accounts = create_benchmark_accounts(
+            options["accounts"], balance=Decimal("1000000.00"), tag=tag
+        )
+        account_numbers = [account.account_number for account in accounts]
+        users = {account.account_number: account.user for account in accounts}
+        opening_total = self.total_balance(accounts)
+
+        lock_waits = []
+        errors = []
+        results_lock = threading.Lock()
+        per_worker = options["transfers"] // options["workers"]
+
+        def worker():
+            waits = []
+            failures = 0
+            try:
+                for _ in range(per_worker):
+                    sender, receiver = random.sample(account_numbers, 2)
+                    try:
+                        settlement = settle_transfer(
+                            sender,
+                            receiver,
+                            options["amount"],
+                            initiated_by=users[sender],
+                            description="Benchmark transfer",
+                        )
+                        waits.append(settlement.lock_wait)
+                    except (SettlementError, OperationalError):
+                        failures += 1
+            finally:
+                connection.close()
+            with results_lock:
+                lock_waits.extend(waits)
+                errors.append(failures)
+
+        threads = [threading.Thread(target=worker) for _ in range(options["workers"])]
+        started = perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = perf_counter() - started
+
+        closing_total = self.total_balance(accounts)
+        completed = len(lock_waits)
+
+        self.stdout.write(
+            f"{completed} transfers across {len(accounts)} accounts with {options['workers']} workers in {elapsed:.2f}s"
+        )
+        self.stdout.write(f"Throughput: {completed / elapsed:.1f} transfers/sec")
+        if lock_waits:
+            ordered = sorted(lock_waits)
+            self.stdout.write(
+                "Lock wait (ms): "
+                f"mean={statistics.mean(ordered) * 1000:.2f} "
+                f"p50={ordered[len(ordered) // 2] * 1000:.2f} "
+                f"p95={ordered[int(len(ordered) * 0.95) - 1] * 1000:.2f} "
+                f"max={ordered[-1] * 1000:.2f}"
+            )
+        self.stdout.write(f"Failed transfers: {sum(errors)}")
+
+        if opening_total == closing_total:
+            self.stdout.write(self.style.SUCCESS("Total balance conserved"))
+        else:
+            self.stdout.write(
+                self.style.ERROR(
+                    f"Total balance drifted from {opening_total} to {closing_total}"
+                )
+            )
+
+        if not options["keep"]:
+            purge_benchmark_data(tag)
+
+    def total_balance(self, accounts):
+        return with_ledger_balance(
+            BankAccount.objects.filter(pk__in=[account.pk for account in accounts])
+        ).aggregate(total=Sum("ledger_balance"))["total"]
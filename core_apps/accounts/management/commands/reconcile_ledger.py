@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from core_apps.accounts.ledger import find_balance_mismatches, take_balance_snapshots
+
+
+class Command(BaseCommand):
+    help = "Compares cached account balances against the ledger"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--snapshot",
+            action="store_true",
+            help="Take balance snapshots before reconciling",
+        )
+
+    def handle(self, *args, **options):
+        if options["snapshot"]:
+            snapshot_count = take_balance_snapshots()
+            self.stdout.write(f"Took {snapshot_count} balance snapshots")
+
+        mismatch_count = 0
+        for account_number, cached_balance, ledger_balance in find_balance_mismatches():
+            self.stdout.write(
+                self.style.ERROR(
+                    f"Account {account_number}: cached balance {cached_balance} does not match ledger balance {ledger_balance}"
+                )
+            )
+            mismatch_count += 1
+
+        if mismatch_count == 0:
+            self.stdout.write(
+                self.style.SUCCESS("All account balances match the ledger!")
+            )
+        else:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Found {mismatch_count} accounts whose balance does not match the ledger"
+                )
+            )
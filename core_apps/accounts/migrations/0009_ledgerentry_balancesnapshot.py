@@ -0,0 +1,133 @@
+# Generated by Django 4.2.15 on 2026-10-16 22:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0008_generate_reference_number_for_existing_transactions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LedgerEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "ledger_account",
+                    models.CharField(
+                        choices=[
+                            ("customer", "Customer Account"),
+                            ("cash", "Cash"),
+                            ("interest_expense", "Interest Expense"),
+                            ("card_funding", "Virtual Card Funding"),
+                        ],
+                        default="customer",
+                        max_length=20,
+                        verbose_name="Ledger Account",
+                    ),
+                ),
+                (
+                    "entry_type",
+                    models.CharField(
+                        choices=[("debit", "Debit"), ("credit", "Credit")],
+                        max_length=6,
+                        verbose_name="Entry Type",
+                    ),
+                ),
+                (
+                    "amount",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=12, verbose_name="Amount"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                (
+                    "bank_account",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="ledger_entries",
+                        to="accounts.bankaccount",
+                    ),
+                ),
+                (
+                    "transaction",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="ledger_entries",
+                        to="accounts.transaction",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ledger Entry",
+                "verbose_name_plural": "Ledger Entries",
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        fields=["bank_account", "id"],
+                        name="accounts_le_bank_ac_ef8caa_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="BalanceSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "balance",
+                    models.DecimalField(
+                        decimal_places=2, max_digits=12, verbose_name="Balance"
+                    ),
+                ),
+                (
+                    "last_entry_id",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="Highest ledger entry id included in this balance",
+                        verbose_name="Last Ledger Entry",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "bank_account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        related_name="balance_snapshots",
+                        to="accounts.bankaccount",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Balance Snapshot",
+                "verbose_name_plural": "Balance Snapshots",
+                "indexes": [
+                    models.Index(
+                        fields=["bank_account", "-last_entry_id"],
+                        name="accounts_ba_bank_ac_58fd6e_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.15 on 2026-10-16 22:45
+
+from django.db import migrations
+
+
+def create_opening_snapshots(apps, schema_editor):
+    BankAccount = apps.get_model("accounts", "BankAccount")
+    BalanceSnapshot = apps.get_model("accounts", "BalanceSnapshot")
+
+    # Existing balances predate the ledger, so they become the opening snapshot
+    accounts = BankAccount.objects.values_list("id", "account_balance")
+    BalanceSnapshot.objects.bulk_create(
+        [
+            BalanceSnapshot(bank_account_id=account_id, balance=balance)
+            for account_id, balance in accounts.iterator(chunk_size=2000)
+        ],
+        batch_size=2000,
+    )
+
+
+def remove_opening_snapshots(apps, schema_editor):
+    BalanceSnapshot = apps.get_model("accounts", "BalanceSnapshot")
+    BalanceSnapshot.objects.filter(last_entry_id=0).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0009_ledgerentry_balancesnapshot"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_opening_snapshots, remove_opening_snapshots),
+    ]
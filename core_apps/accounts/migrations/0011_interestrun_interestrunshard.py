@@ -0,0 +1,165 @@
+# Generated by Django 4.2.15 on 2026-10-16 22:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0010_create_opening_balance_snapshots"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InterestRun",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("run_date", models.DateField(unique=True, verbose_name="Run Date")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("running", "Running"), ("completed", "Completed")],
+                        default="running",
+                        max_length=10,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "shard_count",
+                    models.PositiveIntegerField(verbose_name="Shard Count"),
+                ),
+                (
+                    "accounts",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Accounts Processed"
+                    ),
+                ),
+                (
+                    "credited",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Accounts Credited"
+                    ),
+                ),
+                (
+                    "total_interest",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0.0,
+                        max_digits=14,
+                        verbose_name="Total Interest",
+                    ),
+                ),
+                (
+                    "completed_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Completed At"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Interest Run",
+                "verbose_name_plural": "Interest Runs",
+                "ordering": ["-run_date"],
+            },
+        ),
+        migrations.CreateModel(
+            name="InterestRunShard",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "shard_index",
+                    models.PositiveIntegerField(verbose_name="Shard Index"),
+                ),
+                (
+                    "upper_id",
+                    models.UUIDField(
+                        blank=True,
+                        help_text="Highest account id in this shard, empty for the last shard",
+                        null=True,
+                        verbose_name="Upper Account Id",
+                    ),
+                ),
+                (
+                    "last_account_id",
+                    models.UUIDField(
+                        blank=True,
+                        help_text="Cursor: accounts up to and including this id are credited",
+                        null=True,
+                        verbose_name="Last Account Id",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("running", "Running"), ("completed", "Completed")],
+                        default="running",
+                        max_length=10,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "accounts",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Accounts Processed"
+                    ),
+                ),
+                (
+                    "credited",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Accounts Credited"
+                    ),
+                ),
+                (
+                    "total_interest",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0.0,
+                        max_digits=14,
+                        verbose_name="Total Interest",
+                    ),
+                ),
+                (
+                    "completed_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Completed At"
+                    ),
+                ),
+                (
+                    "run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shards",
+                        to="accounts.interestrun",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Interest Run Shard",
+                "verbose_name_plural": "Interest Run Shards",
+                "ordering": ["run", "shard_index"],
+                "unique_together": {("run", "shard_index")},
+            },
+        ),
+    ]
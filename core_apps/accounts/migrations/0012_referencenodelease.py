@@ -0,0 +1,32 @@
+# Generated by Django 4.2.15 on 2026-10-16 23:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0011_interestrun_interestrunshard"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReferenceNodeLease",
+            fields=[
+                (
+                    "day",
+                    models.DateField(
+                        primary_key=True, serialize=False, verbose_name="Day"
+                    ),
+                ),
+                (
+                    "leased",
+                    models.PositiveIntegerField(default=0, verbose_name="Nodes Leased"),
+                ),
+            ],
+            options={
+                "verbose_name": "Reference Node Lease",
+                "verbose_name_plural": "Reference Node Leases",
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.15 on 2026-10-16 22:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0012_referencenodelease"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["sender", "created_at", "id"],
+                name="accounts_tr_sender__3a22fd_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["receiver", "created_at", "id"],
+                name="accounts_tr_receive_2a22c9_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["sender_account", "created_at", "id"],
+                name="accounts_tr_sender__906a1b_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["receiver_account", "created_at", "id"],
+                name="accounts_tr_receive_35a083_idx",
+            ),
+        ),
+    ]
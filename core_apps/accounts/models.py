@@ -1,6 +1,5 @@
 from django.db import models
 from django.contrib.auth import get_user_model
-from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 
 from core_apps.accounts.reference_utils import generate_transaction_reference
@@ -131,17 +130,19 @@ class BankAccount(TimeStampedModel, SoftDeleteModel):
             self.account_type == self.AccountType.SAVINGS
             or self.account_type == self.AccountType.FIXED
         ):
+            from .ledger import ledger_balance, post_transaction
+
             daily_rate = self.annual_interest_rate / Decimal("365")
-            interest = (Decimal(self.account_balance) * daily_rate).quantize(
+            interest = (ledger_balance(self) * daily_rate).quantize(
                 Decimal(".01"), rounding=ROUND_HALF_UP
             )
             logger.info(
                 f"Applying daily interest {interest} to account {self.account_number}"
             )
-            self.account_balance += interest
-            self.save()
+            if interest <= 0:
+                return Decimal("0.00")
 
-            Transaction.objects.create(
+            interest_transaction = Transaction.objects.create(
                 user=self.user,
                 amount=interest,
                 transaction_type=Transaction.TransactionType.INTEREST,
@@ -150,6 +151,11 @@ class BankAccount(TimeStampedModel, SoftDeleteModel):
                 receiver_account=self,
                 status=Transaction.TransactionStatus.COMPLETED,
             )
+            post_transaction(
+                interest_transaction,
+                debit=LedgerEntry.LedgerAccount.INTEREST_EXPENSE,
+                credit=self,
+            )
             return interest
         return Decimal("0.00")
 
@@ -158,62 +164,11 @@ class BankAccount(TimeStampedModel, SoftDeleteModel):
         verbose_name_plural = _("Bank Accounts")
         unique_together = ["user", "currency", "account_type"]
 
-    def clean(self) -> None:
-        if self.account_balance < 0:
-            raise ValidationError(_("Account balance cannot be negative"))
-
     def save(self, *args, **kwargs) -> None:
         if self.is_primary:
             BankAccount.objects.filter(user=self.user).update(is_primary=False)
         super().save(*args, **kwargs)
 
-    def record_month_end_balance(self):
-        """Record the current balance as the month-end balance"""
-        from django.utils import timezone
-        from calendar import monthrange
-
-        today = timezone.now().date()
-        _, last_day = monthrange(today.year, today.month)
-        if today.day != last_day:
-            logger.info(f"Today ({today}) is not the last day of the month. Skipping.")
-            return "Not the last day of the month"
-
-        month = today.replace(day=1)
-
-        monthly_balance, created = MonthlyBalanceHistory.objects.get_or_create(
-            bank_account=self, month=month, defaults={"balance": self.account_balance}
-        )
-
-        if not created:
-            monthly_balance.balance = self.account_balance
-            monthly_balance.save()
-
-        return monthly_balance
-
-    @property
-    def balance_change_percentage(self):
-        """Calculate percentage change compared to previous month"""
-        from django.utils import timezone
-        from datetime import timedelta
-
-        current_month = timezone.now().date().replace(day=1)
-        previous_month = (current_month - timedelta(days=1)).replace(day=1)
-
-        current_balance = self.account_balance
-
-        try:
-            previous_balance = self.monthly_balances.get(month=previous_month).balance
-        except MonthlyBalanceHistory.DoesNotExist:
-            return None
-
-        if previous_balance == 0:
-            return None
-
-        change = current_balance - previous_balance
-        percentage_change = (change / previous_balance) * 100
-
-        return percentage_change
-
 
 class Transaction(TimeStampedModel, SoftDeleteModel):
     class TransactionStatus(models.TextChoices):
@@ -291,45 +246,24 @@ class Transaction(TimeStampedModel, SoftDeleteModel):
 
     class Meta:
         ordering = ["-created_at"]
-        indexes = [models.Index(fields=["created_at"])]
+        indexes = [
+            models.Index(fields=["created_at"]),
+            models.Index(fields=["sender", "created_at", "id"]),
+            models.Index(fields=["receiver", "created_at", "id"]),
+            models.Index(fields=["sender_account", "created_at", "id"]),
+            models.Index(fields=["receiver_account", "created_at", "id"]),
+        ]
 
     def save(self, *args, **kwargs):
-        # Generate reference number if it doesn't exist
+        # Generated references are unique by construction, so a clash with a
+        # reference from before the node allocator raises IntegrityError
         if not self.reference_number:
-            self.reference_number = self._generate_unique_reference()
+            self.reference_number = generate_transaction_reference(
+                self.transaction_type
+            )
 
         super().save(*args, **kwargs)
 
-    def _generate_unique_reference(self, max_attempts=5) -> str:
-        """
-        Generate a unique reference number with collision handling.
-
-        Args:
-            max_attempts: Maximum number of attempts to generate a unique reference
-
-        Returns:
-            A unique transaction reference number
-
-        Raises:
-            RuntimeError: If unable to generate a unique reference after max_attempts
-        """
-        from .models import Transaction
-
-        for i in range(max_attempts):
-            reference = generate_transaction_reference(self.transaction_type)
-
-            # Check if reference already exists
-            if not Transaction.objects.filter(reference_number=reference).exists():
-                return reference
-
-        # Failed to generate unique reference
-        logger.exception(
-            f"Failed to generate unique reference after {max_attempts} attempts"
-        )
-        raise RuntimeError(
-            f"Failed to generate unique reference after {max_attempts} attempts"
-        )
-
 
 class MonthlyBalanceHistory(TimeStampedModel):
     bank_account = models.ForeignKey(
@@ -351,3 +285,158 @@ class MonthlyBalanceHistory(TimeStampedModel):
 
     def __str__(self):
         return f"{self.bank_account.account_number} - {self.month.strftime('%Y-%m')}: {self.balance}"
+
+
+class LedgerEntry(models.Model):
+    class EntryType(models.TextChoices):
+        DEBIT = ("debit", _("Debit"))
+        CREDIT = ("credit", _("Credit"))
+
+    class LedgerAccount(models.TextChoices):
+        CUSTOMER = ("customer", _("Customer Account"))
+        CASH = ("cash", _("Cash"))
+        INTEREST_EXPENSE = ("interest_expense", _("Interest Expense"))
+        CARD_FUNDING = ("card_funding", _("Virtual Card Funding"))
+
+    transaction = models.ForeignKey(
+        Transaction, on_delete=models.DO_NOTHING, related_name="ledger_entries"
+    )
+    ledger_account = models.CharField(
+        _("Ledger Account"),
+        max_length=20,
+        choices=LedgerAccount.choices,
+        default=LedgerAccount.CUSTOMER,
+    )
+    bank_account = models.ForeignKey(
+        BankAccount,
+        on_delete=models.DO_NOTHING,
+        null=True,
+        blank=True,
+        related_name="ledger_entries",
+    )
+    entry_type = models.CharField(
+        _("Entry Type"), max_length=6, choices=EntryType.choices
+    )
+    amount = models.DecimalField(_("Amount"), decimal_places=2, max_digits=12)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        verbose_name = _("Ledger Entry")
+        verbose_name_plural = _("Ledger Entries")
+        ordering = ["id"]
+        indexes = [models.Index(fields=["bank_account", "id"])]
+
+    def __str__(self) -> str:
+        return f"{self.entry_type} {self.amount} - {self.ledger_account} - {self.transaction_id}"
+
+    def save(self, *args, **kwargs) -> None:
+        if self.pk is not None:
+            raise ValueError(_("Ledger entries are append-only"))
+        super().save(*args, **kwargs)
+
+    def delete(self, using=None, keep_parents=False):
+        raise ValueError(_("Ledger entries are append-only"))
+
+
+class BalanceSnapshot(models.Model):
+    bank_account = models.ForeignKey(
+        BankAccount, on_delete=models.DO_NOTHING, related_name="balance_snapshots"
+    )
+    balance = models.DecimalField(_("Balance"), decimal_places=2, max_digits=12)
+    last_entry_id = models.BigIntegerField(
+        _("Last Ledger Entry"),
+        default=0,
+        help_text=_("Highest ledger entry id included in this balance"),
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = _("Balance Snapshot")
+        verbose_name_plural = _("Balance Snapshots")
+        indexes = [models.Index(fields=["bank_account", "-last_entry_id"])]
+
+    def __str__(self) -> str:
+        return f"{self.bank_account_id} - {self.balance} @ {self.last_entry_id}"
+
+
+class InterestRun(TimeStampedModel):
+    class RunStatus(models.TextChoices):
+        RUNNING = ("running", _("Running"))
+        COMPLETED = ("completed", _("Completed"))
+
+    run_date = models.DateField(_("Run Date"), unique=True)
+    status = models.CharField(
+        _("Status"),
+        max_length=10,
+        choices=RunStatus.choices,
+        default=RunStatus.RUNNING,
+    )
+    shard_count = models.PositiveIntegerField(_("Shard Count"))
+    accounts = models.PositiveIntegerField(_("Accounts Processed"), default=0)
+    credited = models.PositiveIntegerField(_("Accounts Credited"), default=0)
+    total_interest = models.DecimalField(
+        _("Total Interest"), decimal_places=2, max_digits=14, default=0.00
+    )
+    completed_at = models.DateTimeField(_("Completed At"), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Interest Run")
+        verbose_name_plural = _("Interest Runs")
+        ordering = ["-run_date"]
+
+    def __str__(self) -> str:
+        return f"Interest run {self.run_date} ({self.get_status_display()})"
+
+
+class InterestRunShard(TimeStampedModel):
+    run = models.ForeignKey(
+        InterestRun, on_delete=models.CASCADE, related_name="shards"
+    )
+    shard_index = models.PositiveIntegerField(_("Shard Index"))
+    upper_id = models.UUIDField(
+        _("Upper Account Id"),
+        null=True,
+        blank=True,
+        help_text=_("Highest account id in this shard, empty for the last shard"),
+    )
+    last_account_id = models.UUIDField(
+        _("Last Account Id"),
+        null=True,
+        blank=True,
+        help_text=_("Cursor: accounts up to and including this id are credited"),
+    )
+    status = models.CharField(
+        _("Status"),
+        max_length=10,
+        choices=InterestRun.RunStatus.choices,
+        default=InterestRun.RunStatus.RUNNING,
+    )
+    accounts = models.PositiveIntegerField(_("Accounts Processed"), default=0)
+    credited = models.PositiveIntegerField(_("Accounts Credited"), default=0)
+    total_interest = models.DecimalField(
+        _("Total Interest"), decimal_places=2, max_digits=14, default=0.00
+    )
+    completed_at = models.DateTimeField(_("Completed At"), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _("Interest Run Shard")
+        verbose_name_plural = _("Interest Run Shards")
+        ordering = ["run", "shard_index"]
+        unique_together = ["run", "shard_index"]
+
+    def __str__(self) -> str:
+        return f"{self.run.run_date} shard {self.shard_index}"
+
+
+class ReferenceNodeLease(models.Model):
+    """How many transaction reference node ids have been leased on a day"""
+
+    day = models.DateField(_("Day"), primary_key=True)
+    leased = models.PositiveIntegerField(_("Nodes Leased"), default=0)
+
+    class Meta:
+        verbose_name = _("Reference Node Lease")
+        verbose_name_plural = _("Reference Node Leases")
+
+    def __str__(self) -> str:
+        return f"{self.day}: {self.leased} nodes"
@@ -0,0 +1,70 @@
+from calendar import monthrange
+from datetime import date
+from itertools import islice
+from typing import Optional
+
+from django.db import transaction
+from django.utils import timezone
+from loguru import logger
+
+from .ledger import with_ledger_balance
+from .models import BankAccount, MonthlyBalanceHistory
+
+MONTH_END_CHUNK_SIZE = 2000
+
+
+def is_last_day_of_month(day: date) -> bool:
+    _, last_day = monthrange(day.year, day.month)
+    return day.day == last_day
+
+
+def record_month_end_balances(
+    queryset=None,
+    today: Optional[date] = None,
+    chunk_size: int = MONTH_END_CHUNK_SIZE,
+) -> Optional[int]:
+    """
+    Upsert this month's balance history row for every account in chunks.
+
+    Ledger balances are streamed from a single query and written with one
+    INSERT ... ON CONFLICT (bank_account, month) DO UPDATE per chunk.
+
+    Returns:
+        The number of accounts recorded, or None when today is not the last
+        day of the month
+    """
+    if today is None:
+        today = timezone.now().date()
+    if not is_last_day_of_month(today):
+        logger.info(f"Today ({today}) is not the last day of the month. Skipping.")
+        return None
+    if queryset is None:
+        queryset = BankAccount.objects.filter(
+            account_status=BankAccount.AccountStatus.ACTIVE
+        )
+
+    month = today.replace(day=1)
+    balances = (
+        with_ledger_balance(queryset.order_by())
+        .values_list("pk", "ledger_balance")
+        .iterator(chunk_size=chunk_size)
+    )
+
+    recorded_count = 0
+    while chunk := list(islice(balances, chunk_size)):
+        with transaction.atomic():
+            MonthlyBalanceHistory.objects.bulk_create(
+                [
+                    MonthlyBalanceHistory(
+                        bank_account_id=account_id, month=month, balance=balance
+                    )
+                    for account_id, balance in chunk
+                ],
+                update_conflicts=True,
+                unique_fields=["bank_account", "month"],
+                update_fields=["balance", "updated_at"],
+            )
+        recorded_count += len(chunk)
+
+    logger.info(f"Recorded month-end balances for {recorded_count} accounts")
+    return recorded_count
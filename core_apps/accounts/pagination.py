@@ -1,7 +1,135 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+import uuid
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on (created_at, id), newest first.
+
+    Each page is a single index range scan that continues from the last row
+    of the previous page, so it costs the same at any depth, and no COUNT(*)
+    is run. The cursor is an opaque token carrying the boundary row and the
+    direction of travel.
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    ordering = ("-created_at", "-id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        if position is None:
+            rows = list(queryset.order_by(*self.ordering)[: self.page_size + 1])
+            self.has_next = len(rows) > self.page_size
+            self.has_previous = False
+            page = rows[: self.page_size]
+        elif not reverse:
+            created_at, pk = position
+            rows = list(
+                queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+                ).order_by(*self.ordering)[: self.page_size + 1]
+            )
+            self.has_next = len(rows) > self.page_size
+            self.has_previous = True
+            page = rows[: self.page_size]
+        else:
+            created_at, pk = position
+            rows = list(
+                queryset.filter(
+                    Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+                ).order_by("created_at", "id")[: self.page_size + 1]
+            )
+            self.has_next = True
+            self.has_previous = len(rows) > self.page_size
+            page = list(reversed(rows[: self.page_size]))
+
+        self.page = page
+        return page
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(
+                urlsafe_b64decode(encoded.encode("ascii")).decode("ascii")
+            )
+            position = (
+                datetime.fromisoformat(payload["c"]),
+                uuid.UUID(payload["i"]),
+            )
+            return position, bool(payload.get("r"))
+        except (KeyError, TypeError, ValueError, UnicodeError):
+            raise ValidationError({self.cursor_query_param: _("Invalid cursor")})
+
+    def encode_cursor(self, instance, reverse: bool) -> str:
+        if isinstance(instance, dict):
+            created_at, pk = instance["created_at"], instance["id"]
+        else:
+            created_at, pk = instance.created_at, instance.id
+        payload = {"c": created_at.isoformat(), "i": pk.hex}
+        if reverse:
+            payload["r"] = 1
+        encoded = urlsafe_b64encode(json.dumps(payload).encode("ascii")).decode("ascii")
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, encoded
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery
+from django.db.models.functions import NullIf
+from django.utils import timezone
+
+from .models import MonthlyBalanceHistory
+
+
+def with_balance_change(queryset):
+    """
+    Annotate accounts with previous_month_balance and balance_change_pct.
+
+    Computed in SQL so listing accounts does not run one monthly balance
+    lookup per row. The percentage is NULL
+    when there is no previous month balance or it is zero.
+    """
+    current_month = timezone.now().date().replace(day=1)
+    previous_month = (current_month - timedelta(days=1)).replace(day=1)
+
+    previous_balance = MonthlyBalanceHistory.objects.filter(
+        bank_account=OuterRef("pk"), month=previous_month
+    ).values("balance")[:1]
+
+    return queryset.annotate(
+        previous_month_balance=Subquery(previous_balance)
+    ).annotate(
+        balance_change_pct=ExpressionWrapper(
+            (F("account_balance") - F("previous_month_balance"))
+            * 100
+            / NullIf(F("previous_month_balance"), 0),
+            output_field=DecimalField(),
+        )
+    )
@@ -1,46 +1,160 @@
-import secrets
+import os
 import string
-from datetime import datetime
+import threading
+from datetime import date, datetime
 
+from django.db import DEFAULT_DB_ALIAS, connections
 
-def generate_transaction_reference(transaction_type: str) -> str:
+BASE36_ALPHABET = string.digits + string.ascii_uppercase
+
+NODE_WIDTH = 3
+COUNTER_WIDTH = 3
+NODE_SPACE = len(BASE36_ALPHABET) ** NODE_WIDTH
+COUNTER_SPACE = len(BASE36_ALPHABET) ** COUNTER_WIDTH
+
+REFERENCE_NODE_TABLE = "accounts_referencenodelease"
+
+TYPE_CODES = {
+    "deposit": "DEP",
+    "withdrawal": "WDR",
+    "transfer": "TRF",
+    "interest": "INT",
+}
+
+
+def encode_base36(value: int, width: int) -> str:
+    """Encode a non-negative integer as a fixed width base36 string"""
+    chars = []
+    for _ in range(width):
+        value, remainder = divmod(value, len(BASE36_ALPHABET))
+        chars.append(BASE36_ALPHABET[remainder])
+    return "".join(reversed(chars))
+
+
+class ReferenceNodesExhausted(RuntimeError):
+    pass
+
+
+def lease_reference_node(day: date) -> int:
     """
-    Generate a unique transaction reference number.
+    Take the next node id of the day from ReferenceNodeLease.
+
+    The lease goes over a connection of its own, so that it is committed
+    even when the transaction that needed a reference rolls back, and the
+    node is never handed out twice on the same day.
+    """
+    lease_connection = connections.create_connection(DEFAULT_DB_ALIAS)
+    try:
+        with lease_connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {REFERENCE_NODE_TABLE} (day, leased) VALUES (%s, 1) "
+                f"ON CONFLICT (day) DO UPDATE "
+                f"SET leased = {REFERENCE_NODE_TABLE}.leased + 1 "
+                f"RETURNING leased - 1",
+                [day],
+            )
+            node = cursor.fetchone()[0]
+    finally:
+        lease_connection.close()
+    if node >= NODE_SPACE:
+        raise ReferenceNodesExhausted(
+            f"All {NODE_SPACE} transaction reference nodes for {day} are leased"
+        )
+    return node
+
+
+class ReferenceAllocator:
+    """
+    Hands out the 6 character unique part of transaction references.
+
+    Each process leases a node id for the current day and then counts
+    locally, so the unique part is the node id followed by a counter, both
+    in base36. A node is leased at most once per day, and references carry
+    the day they were allocated on, which makes them unique by construction
+    without checking the database. A new node is leased when the counter
+    runs out, when the day changes or after a fork.
+    """
+
+    def __init__(self, lease_node=lease_reference_node):
+        self._lease_node = lease_node
+        self._lock = threading.Lock()
+        self._pid = None
+        self._day = None
+        self._node = None
+        self._counter = COUNTER_SPACE
+
+    def allocate(self, count: int) -> tuple[date, list[str]]:
+        """The day to put in the references and that many unique parts"""
+        with self._lock:
+            today = datetime.now().date()
+            if self._pid != os.getpid() or self._day != today:
+                self._counter = COUNTER_SPACE
+
+            unique_parts = []
+            while len(unique_parts) < count:
+                if self._counter >= COUNTER_SPACE:
+                    self._node = encode_base36(self._lease_node(today), NODE_WIDTH)
+                    self._pid = os.getpid()
+                    self._day = today
+                    self._counter = 0
+
+                take = min(count - len(unique_parts), COUNTER_SPACE - self._counter)
+                unique_parts.extend(
+                    f"{self._node}{encode_base36(counter, COUNTER_WIDTH)}"
+                    for counter in range(self._counter, self._counter + take)
+                )
+                self._counter += take
+            return self._day, unique_parts
+
+
+reference_allocator = ReferenceAllocator()
+
+
+def generate_transaction_references(transaction_type: str, count: int) -> list[str]:
+    """
+    Generate a batch of unique transaction reference numbers.
 
-    Format: TRX{YYMMDD}{type_code}{random_chars}{check_digit}
+    Format: TRX{YYMMDD}{type_code}{unique_chars}{check_digit}
     - TRX: Fixed prefix
     - YYMMDD: Date part (year, month, day)
     - type_code: 3-letter code for transaction type
-    - random_chars: 6 random alphanumeric characters
+    - unique_chars: 3 character node id and 3 character counter, in base36
     - check_digit: Luhn check digit for validation
 
     Args:
         transaction_type: The type of transaction (deposit, withdrawal, transfer, etc.)
+        count: How many references to generate
 
     Returns:
-        A unique transaction reference number
+        A list of unique transaction reference numbers
     """
-    type_codes = {
-        "deposit": "DEP",
-        "withdrawal": "WDR",
-        "transfer": "TRF",
-        "interest": "INT",
-    }
+    day, unique_parts = reference_allocator.allocate(count)
+    date_part = day.strftime("%y%m%d")
 
-    date_part = datetime.now().strftime("%y%m%d")
-
-    type_code = type_codes.get(
+    type_code = TYPE_CODES.get(
         transaction_type.lower(), "MISC"
     )  # default to MISC if not found
 
-    alphabet = string.ascii_uppercase + string.digits
-    random_chars = "".join(secrets.choice(alphabet) for _ in range(6))
+    references = []
+    for unique_chars in unique_parts:
+        partial_ref = f"TRX{date_part}{type_code}{unique_chars}"
+        references.append(
+            f"{partial_ref}{calculate_alphanumeric_check_digit(partial_ref)}"
+        )
+    return references
+
 
-    partial_ref = f"TRX{date_part}{type_code}{random_chars}"
+def generate_transaction_reference(transaction_type: str) -> str:
+    """
+    Generate a unique transaction reference number.
 
-    check_digit = calculate_alphanumeric_check_digit(partial_ref)
+    Args:
+        transaction_type: The type of transaction (deposit, withdrawal, transfer, etc.)
 
-    return f"{partial_ref}{check_digit}"
+    Returns:
+        A unique transaction reference number
+    """
+    return generate_transaction_references(transaction_type, 1)[0]
 
 
 def calculate_alphanumeric_check_digit(reference: str) -> str:
@@ -1,14 +1,24 @@
+from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from decimal import Decimal
+from core_apps.common.projections import ProjectionSerializer, full_name
+from core_apps.user_auth.models import OTPChallenge
+from core_apps.user_auth.otp import verify_otp
+from .feeds import PartyFeed
+from .ledger import ledger_balance
 from .models import BankAccount, Transaction
 
+User = get_user_model()
+
 
 class AccountListSerializer(serializers.ModelSerializer):
     id = serializers.UUIDField(read_only=True)
     user = serializers.UUIDField(read_only=True)
     annual_interest_rate = serializers.FloatField()
-    balance_change_percentage = serializers.FloatField()
+    balance_change_percentage = serializers.FloatField(
+        source="balance_change_pct", read_only=True
+    )
 
     class Meta:
         model = BankAccount
@@ -31,6 +41,42 @@ class AccountListSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "account_balance", "created_at"]
 
 
+class AccountListProjection(ProjectionSerializer):
+    """AccountListSerializer output built from .values() rows"""
+
+    serializer_class = AccountListSerializer
+    columns = (
+        "id",
+        "user__first_name",
+        "user__last_name",
+        "user__role",
+        "account_number",
+        "currency",
+        "account_balance",
+        "account_status",
+        "account_type",
+        "kyc_submitted",
+        "kyc_verified",
+        "fully_activated",
+        "is_primary",
+        "created_at",
+        "balance_change_pct",
+    )
+    role_labels = dict(User.RoleChoices.choices)
+    interest_rates = {
+        account_type: float(BankAccount(account_type=account_type).annual_interest_rate)
+        for account_type in BankAccount.AccountType.values
+    }
+
+    def get_user(self, row: dict) -> str:
+        # str(user), which is what the UUIDField renders for the related user
+        role = row["user__role"]
+        return f"{full_name(row['user__first_name'], row['user__last_name'])} - {self.role_labels.get(role, role)}"
+
+    def get_annual_interest_rate(self, row: dict) -> float:
+        return self.interest_rates[row["account_type"]]
+
+
 class AccountCreateSerializer(serializers.ModelSerializer):
     email = serializers.CharField(required=True)
     initial_deposit = serializers.DecimalField(
@@ -142,10 +188,17 @@ class CustomerInfoSerializer(serializers.ModelSerializer):
         return None
 
 
+class AccountNumberField(serializers.CharField):
+    """An account number on input, read from the related account on output"""
+
+    def to_representation(self, value: BankAccount) -> str:
+        return value.account_number
+
+
 class TransactionSerializer(serializers.ModelSerializer):
     id = serializers.UUIDField(read_only=True, format='hex')
-    sender_account = serializers.CharField(max_length=20, required=False)
-    receiver_account = serializers.CharField(max_length=20, required=False)
+    sender_account = AccountNumberField(max_length=20, required=False)
+    receiver_account = AccountNumberField(max_length=20, required=False)
     amount = serializers.DecimalField(
         max_digits=12, decimal_places=2, min_value=Decimal("0.1")
     )
@@ -180,14 +233,6 @@ class TransactionSerializer(serializers.ModelSerializer):
         representation["receiver"] = str(
             instance.receiver.full_name if instance.receiver else None
         )
-        representation["sender_account"] = (
-            instance.sender_account.account_number if instance.sender_account else None
-        )
-        representation["receiver_account"] = (
-            instance.receiver_account.account_number
-            if instance.receiver_account
-            else None
-        )
         representation["created_by"] = (
             instance.created_by.full_name if instance.created_by else None
         )
@@ -204,7 +249,7 @@ class TransactionSerializer(serializers.ModelSerializer):
                 account = BankAccount.objects.get(account_number=sender_account_number)
                 data["sender_account"] = account
                 data["receiver_account"] = None
-                if account.account_balance < amount:
+                if ledger_balance(account) < amount:
                     raise serializers.ValidationError(
                         _("Insufficient funds for withdrawal")
                     )
@@ -237,6 +282,56 @@ class TransactionSerializer(serializers.ModelSerializer):
         return data
 
 
+class TransactionProjection(ProjectionSerializer):
+    """TransactionSerializer output built from .values() rows"""
+
+    serializer_class = TransactionSerializer
+    columns = (
+        "id",
+        "reference_number",
+        "user_id",
+        "amount",
+        "description",
+        "receiver_id",
+        "receiver__first_name",
+        "receiver__last_name",
+        "receiver_account__account_number",
+        "sender_id",
+        "sender__first_name",
+        "sender__last_name",
+        "sender_account__account_number",
+        "transaction_type",
+        "status",
+        "created_at",
+        "created_by_id",
+        "created_by__first_name",
+        "created_by__last_name",
+    )
+
+    def _full_name(self, row: dict, party: str):
+        if row[f"{party}_id"] is None:
+            return None
+        return full_name(row[f"{party}__first_name"], row[f"{party}__last_name"])
+
+    def get_user(self, row: dict):
+        return row["user_id"]
+
+    def get_sender(self, row: dict):
+        return self._full_name(row, "sender")
+
+    def get_receiver(self, row: dict) -> str:
+        return str(self._full_name(row, "receiver"))
+
+    def get_sender_account(self, row: dict):
+        return row["sender_account__account_number"]
+
+    def get_receiver_account(self, row: dict):
+        return row["receiver_account__account_number"]
+
+    def get_created_by(self, row: dict):
+        return self._full_name(row, "created_by")
+
+
 class SecurityQuestionSerializer(serializers.Serializer):
     security_answer = serializers.CharField(max_length=30)
 
@@ -252,7 +347,7 @@ class OTPVerificationSerializer(serializers.Serializer):
 
     def validate(self, data: dict) -> dict:
         user = self.context["request"].user
-        if not user.verify_otp(data["otp"]):
+        if not verify_otp(data["otp"], OTPChallenge.Purpose.TRANSFER, user=user):
             raise serializers.ValidationError("Invalid or expired OTP")
         return data
 
@@ -293,18 +388,15 @@ class AccountDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "account_balance", "created_at"]
 
     def get_recent_transactions(self, obj):
-        combined_transactions = list(
-            obj.sent_transactions.exclude(transaction_type="interest")
-        ) + list(obj.received_transactions.exclude(transaction_type="interest"))
-        sorted_transactions = sorted(
-            combined_transactions, key=lambda t: t.created_at, reverse=True
-        )
-
-        # remove duplicate by ID
-        deduped_transactions = {}
-        for transaction in sorted_transactions:
-            deduped_transactions[transaction.id] = transaction
-
-        # Convert back to list and limit to 5
-        result = list(deduped_transactions.values())[:5]
-        return TransactionSerializer(result, many=True).data
+        recent_transactions = PartyFeed.for_account(
+            obj,
+            Transaction.objects.exclude(transaction_type="interest"),
+            Transaction.objects.select_related(
+                "sender",
+                "receiver",
+                "sender_account",
+                "receiver_account",
+                "created_by",
+            ),
+        )[:5]
+        return TransactionSerializer(recent_transactions, many=True).data
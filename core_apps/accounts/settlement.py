@@ -0,0 +1,119 @@
+from dataclasses import dataclass
+from decimal import Decimal
+from time import perf_counter
+
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from loguru import logger
+
+from .ledger import ledger_balance, post_transaction
+from .models import BankAccount, Transaction
+
+
+class SettlementError(Exception):
+    """Base error raised when a transfer cannot be settled"""
+
+
+class AccountNotFound(SettlementError):
+    pass
+
+
+class InsufficientFunds(SettlementError):
+    pass
+
+
+@dataclass(frozen=True)
+class Settlement:
+    transaction: Transaction
+    sender_account: BankAccount
+    receiver_account: BankAccount
+    lock_wait: float
+
+
+def lock_accounts(*account_numbers: str) -> tuple[dict, float]:
+    """
+    Lock the given accounts with SELECT ... FOR UPDATE in primary key order.
+
+    Every caller acquires row locks in the same order, so two transfers
+    touching the same pair of accounts in opposite directions queue behind
+    each other instead of deadlocking.
+
+    Returns:
+        A mapping of account number to locked account and the seconds spent
+        waiting for the locks
+    """
+    started = perf_counter()
+    accounts = list(
+        BankAccount.objects.select_related("user")
+        .select_for_update(of=("self",))
+        .filter(account_number__in=account_numbers)
+        .order_by("pk")
+    )
+    lock_wait = perf_counter() - started
+    return {account.account_number: account for account in accounts}, lock_wait
+
+
+def settle_transfer(
+    sender_account_number: str,
+    receiver_account_number: str,
+    amount: Decimal,
+    initiated_by,
+    description: str = "",
+) -> Settlement:
+    """
+    Move funds between two accounts and record the transfer in one commit.
+
+    Both account rows stay locked until the commit, and every debit takes
+    the same lock, so the sender's ledger balance cannot drop between the
+    funds check and the posting. The legs are only inserted into the ledger,
+    and account_balance on the returned accounts is set to their new balances.
+
+    Raises:
+        SettlementError: If the accounts are the same
+        AccountNotFound: If one or both accounts do not exist
+        InsufficientFunds: If the sender balance does not cover the amount
+    """
+    if sender_account_number == receiver_account_number:
+        raise SettlementError(_("Sender and receiver accounts must be different"))
+
+    with transaction.atomic():
+        accounts, lock_wait = lock_accounts(
+            sender_account_number, receiver_account_number
+        )
+        sender_account = accounts.get(sender_account_number)
+        receiver_account = accounts.get(receiver_account_number)
+
+        if sender_account is None or receiver_account is None:
+            raise AccountNotFound(_("One or both accounts not found"))
+
+        sender_balance = ledger_balance(sender_account)
+        if sender_balance < amount:
+            raise InsufficientFunds(_("Insufficient funds for transfer"))
+
+        transfer_transaction = Transaction.objects.create(
+            user=initiated_by,
+            sender=initiated_by,
+            sender_account=sender_account,
+            receiver=receiver_account.user,
+            receiver_account=receiver_account,
+            amount=amount,
+            description=description,
+            transaction_type=Transaction.TransactionType.TRANSFER,
+            status=Transaction.TransactionStatus.COMPLETED,
+            created_by=initiated_by,
+        )
+        post_transaction(
+            transfer_transaction, debit=sender_account, credit=receiver_account
+        )
+        sender_account.account_balance = sender_balance - amount
+        receiver_account.account_balance = ledger_balance(receiver_account)
+
+    logger.debug(
+        f"Settled transfer {transfer_transaction.reference_number} after waiting {lock_wait:.4f}s for account locks"
+    )
+    return Settlement(
+        transaction=transfer_transaction,
+        sender_account=sender_account,
+        receiver_account=receiver_account,
+        lock_wait=lock_wait,
+    )
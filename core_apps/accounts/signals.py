@@ -0,0 +1,63 @@
+from typing import Any, Optional, Type
+
+from django.db import transaction
+from django.db.models.base import Model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from loguru import logger
+
+from core_apps.accounts.fraud import record_transaction_activity
+from core_apps.accounts.models import BankAccount, Transaction
+from core_apps.accounts.tasks import send_fraud_alert
+from core_apps.common.cache import bump_versions_on_commit
+
+
+def check_transaction_for_fraud(
+    bank_transaction: Transaction, user_email: Optional[str] = None
+) -> None:
+    try:
+        activities = record_transaction_activity(
+            bank_transaction, user_email=user_email
+        )
+    except Exception as e:
+        logger.error(
+            f"Failed to update fraud counters for transaction {bank_transaction.reference_number}: {str(e)}"
+        )
+        return
+    if activities:
+        send_fraud_alert.delay(activities)
+
+
+@receiver(post_save, sender=Transaction)
+def track_transaction_activity(
+    sender: Type[Model], instance: Transaction, created: bool, **kwargs: Any
+) -> None:
+    if created:
+        # Read now from the user the transaction was created with, instead
+        # of loading the user again inside the callback
+        user_email = (
+            instance.user.email if Transaction.user.is_cached(instance) else None
+        )
+        transaction.on_commit(lambda: check_transaction_for_fraud(instance, user_email))
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+def invalidate_transaction_cache(
+    sender: Type[Model], instance: Transaction, **kwargs: Any
+) -> None:
+    bump_versions_on_commit(
+        "user", [instance.user_id, instance.sender_id, instance.receiver_id]
+    )
+    bump_versions_on_commit(
+        "account", [instance.sender_account_id, instance.receiver_account_id]
+    )
+
+
+@receiver(post_save, sender=BankAccount)
+@receiver(post_delete, sender=BankAccount)
+def invalidate_account_cache(
+    sender: Type[Model], instance: BankAccount, **kwargs: Any
+) -> None:
+    bump_versions_on_commit("user", [instance.user_id])
+    bump_versions_on_commit("account", [instance.pk])
@@ -1,123 +1,71 @@
-from io import BytesIO
-from celery import shared_task
+from celery import chord, group, shared_task
+from celery.exceptions import SoftTimeLimitExceeded
 from dateutil import parser
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.mail import EmailMessage
-from django.db.models import Q, Sum
 from django.utils.translation import gettext_lazy as _
 from loguru import logger
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import landscape, letter
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.units import inch
-from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
-from .models import BankAccount, Transaction
-from django.db import transaction
+from .models import BankAccount
 from os import getenv
 from decimal import Decimal
 from datetime import timedelta
 from django.utils import timezone
 from .emails import send_suspicious_activity_alert
+from .fraud import FraudThresholds, find_suspicious_activities
+from .interest import (
+    complete_interest_run,
+    process_interest_shard,
+    start_interest_run,
+)
+from .ledger import take_balance_snapshots
+from .statements import (
+    render_statement,
+    statement_artifact_key,
+    statement_feed,
+    statement_rows,
+    statement_store,
+)
+from . import month_end
+from core_apps.notifications.dispatcher import queue_email
 
 
 User = get_user_model()
 
 
 @shared_task
-def generate_transaction_pdf(user_id, start_date, end_date, account_number=None):
+def generate_transaction_pdf(
+    user_id, start_date, end_date, account_number=None, artifact_key=None
+):
+    # Only a key passed in was claimed by the view, and only that claim is
+    # ours to release
+    claimed_key = artifact_key
+    store = statement_store()
     try:
         user = User.objects.get(id=user_id)
 
         start_date = parser.parse(start_date).date()
         end_date = parser.parse(end_date).date()
-        transactions = Transaction.objects.filter(
-            Q(sender=user) | Q(receiver=user),
-            created_at__date__range=[start_date, end_date],
-        ).order_by("-created_at")
-
+        account = None
         if account_number:
             account = BankAccount.objects.get(account_number=account_number, user=user)
-            transactions = transactions.filter(
-                Q(sender_account=account) | Q(receiver_account=account)
-            )
 
-        buffer = BytesIO()
+        transactions = statement_feed(user, account, start_date, end_date)
+        if artifact_key is None:
+            artifact_key = statement_artifact_key(
+                user, account, start_date, end_date, transactions
+            )
 
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=landscape(letter),
-            rightMargin=30,
-            leftMargin=30,
-            topMargin=30,
-            bottomMargin=18,
-        )
-        elements = []
-        styles = getSampleStyleSheet()
-        elements.append(
-            Paragraph(
+        pdf = store.get(artifact_key)
+        if pdf is None:
+            pdf = render_statement(
+                statement_rows(transactions),
                 f"Transaction History from ({start_date} to {end_date})",
-                styles["Title"],
             )
-        )
-        elements.append(Spacer(1, 12))
-
-        data = [
-            ["Date", "Type", "Amount", "Description", "Status", "Sender", "Receiver"]
-        ]
-        for transaction in transactions:
-            data.append(
-                [
-                    transaction.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                    transaction.get_transaction_type_display(),
-                    f"${transaction.amount:.2f}",
-                    (
-                        transaction.description[:30] + "..."
-                        if len(transaction.description) > 30
-                        else transaction.description
-                    ),
-                    transaction.get_status_display(),
-                    transaction.sender.full_name if transaction.sender else "N/A",
-                    transaction.receiver.full_name if transaction.receiver else "N/A",
-                ]
-            )
-
-        col_widths = [
-            1.8 * inch,
-            0.8 * inch,
-            1.2 * inch,
-            2.5 * inch,
-            0.8 * inch,
-            1.2 * inch,
-            1.2 * inch,
-        ]
-        table = Table(data, colWidths=col_widths)
-        styles = TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.gray),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                ("FONTSIZE", (0, 0), (-1, 0), 12),
-                ("BOTTOMPADDING", (0, 0), (-1, 0), 12),
-                ("BACKGROUND", (0, 1), (-1, -1), colors.beige),
-                ("TEXTCOLOR", (0, 1), (-1, -1), colors.black),
-                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                ("FONTNAME", (0, 1), (-1, -1), "Helvetica"),
-                ("FONTSIZE", (0, 1), (-1, -1), 10),
-                ("TOPPADDING", (0, 1), (-1, -1), 6),
-                ("BOTTOMPADDING", (0, 1), (-1, -1), 6),
-                ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                ("WORDWRAP", (0, 0), (-1, -1), True),
-            ]
-        )
-        table.setStyle(styles)
-        elements.append(table)
-
-        doc.build(elements)
-        buffer.seek(0)
-        pdf = buffer.getvalue()
-        buffer.close()
+            store.put(artifact_key, pdf)
+            store.evict()
+        else:
+            logger.info(f"Reusing stored transaction PDF {artifact_key}")
 
         subject = _("Your Transaction History PDF")
         message = (
@@ -126,38 +74,78 @@ def generate_transaction_pdf(user_id, start_date, end_date, account_number=None)
         from_email = settings.DEFAULT_FROM_EMAIL
         recipient_list = [user.email]
         email = EmailMessage(subject, message, from_email, recipient_list)
-        email.attach(
-            f"transactions_{start_date}_to_{end_date}.pdf",
-            pdf,
+        # The PDF stays in the store and is read back when the email is sent
+        queue_email(
+            email,
+            artifacts=[
+                (
+                    f"transactions_{start_date}_to_{end_date}.pdf",
+                    statement_store,
+                    artifact_key,
+                    "application/pdf",
+                )
+            ],
         )
-        try:
-            email.send()
-            logger.info(f"Transaction PDf generated and sent to:{user.email}")
-            return f"PDF generated and sent to {user.email}"
-        except Exception as e:
-            logger.error(
-                f"Failed to send transaction history PDF to {user.email}: Error {str(e)}"
-            )
+        logger.info(f"Transaction PDF generated and queued for:{user.email}")
+        return f"PDF generated and queued for {user.email}"
 
     except Exception as e:
         logger.error(f"Error generating transaction PDF for user {user_id} : {str(e)}")
+    finally:
+        if claimed_key is not None:
+            store.release(claimed_key)
 
 
 @shared_task
 def apply_daily_interest():
-    savings_account = BankAccount.objects.filter(
-        Q(account_type=BankAccount.AccountType.SAVINGS)
-        | Q(account_type=BankAccount.AccountType.FIXED)
-    )
+    """Split today's interest run into account id shards and fan them out"""
+    run = start_interest_run()
+    if run.status == run.RunStatus.COMPLETED:
+        return f"Daily interest for {run.run_date} was already applied"
 
-    for account in savings_account:
-        with transaction.atomic():
-            account.apply_daily_interest()
-    logger.info(
-        f"Done applying daily interest to {savings_account.count()} savings accounts"
+    pending_shards = list(
+        run.shards.exclude(status=run.RunStatus.COMPLETED).values_list("pk", flat=True)
     )
+    chord(group(apply_interest_shard.s(str(shard_id)) for shard_id in pending_shards))(
+        finalize_interest_run.si(str(run.pk))
+    )
+    return f"Dispatched {len(pending_shards)} interest shards for {run.run_date}"
 
-    return f"Applied daily interest to {savings_account.count()} savings accounts"
+
+@shared_task
+def send_fraud_alert(suspicious_activities):
+    """Alert on activities flagged in real time by the fraud counters"""
+    num_activities = send_suspicious_activity_alert(suspicious_activities)
+    return f"Reported {num_activities} suspicious activities"
+
+
+@shared_task(
+    bind=True,
+    acks_late=True,
+    max_retries=5,
+    soft_time_limit=10 * 60,
+    time_limit=12 * 60,
+)
+def apply_interest_shard(self, shard_id):
+    """Credit interest to one shard, resuming from its cursor when retried"""
+    try:
+        shard = process_interest_shard(shard_id)
+    except SoftTimeLimitExceeded:
+        # Every finished chunk has already moved the cursor, so just resume
+        raise self.retry(countdown=0)
+    return {
+        "shard_index": shard.shard_index,
+        "accounts": shard.accounts,
+        "credited": shard.credited,
+        "total_interest": str(shard.total_interest),
+    }
+
+
+@shared_task
+def finalize_interest_run(run_id):
+    """Chord callback that totals the shards once all of them have finished"""
+    run = complete_interest_run(run_id)
+    return f"Applied {run.total_interest} daily interest to {run.credited} of {run.accounts} accounts"
 
 
 @shared_task
@@ -168,51 +156,16 @@ def detect_suspicious_activities():
 
     TIME_WINDOW = timedelta(hours=TIME_WINDOW_HOURS)
 
-    now = timezone.now()
-
-    time_threshold = now - TIME_WINDOW
-
-    suspicious_activities = []
+    time_threshold = timezone.now() - TIME_WINDOW
 
-    large_transactions = Transaction.objects.filter(
-        amount__gte=LARGE_TRANSACTION_THRESHOLD, created_at__lte=time_threshold
+    suspicious_activities = find_suspicious_activities(
+        FraudThresholds(
+            large_transaction=LARGE_TRANSACTION_THRESHOLD,
+            frequent_transactions=FREQUENT_TRANSACTION_THRESHOLD,
+        ),
+        since=time_threshold,
     )
 
-    for bank_transaction in large_transactions:
-        suspicious_activities.append(
-            f"Large transaction detected: {bank_transaction.amount} by user {bank_transaction.user.email}"
-        )
-
-    users = User.objects.all()
-    for user in users:
-        transaction_count = Transaction.objects.filter(
-            user=user, created_at__gte=time_threshold
-        ).count()
-
-        if transaction_count >= FREQUENT_TRANSACTION_THRESHOLD:
-            suspicious_activities.append(
-                f"Frequent transactions detected: {transaction_count} by {user.email}"
-            )
-
-    accounts = BankAccount.objects.all()
-
-    for account in accounts:
-        balance_change = Transaction.objects.filter(
-            Q(sender_account=account) | Q(receiver_account=account),
-            created_at__gte=time_threshold,
-        ).aggregate(
-            total_sent=Sum("amount", filter=Q(sender_account=account)),
-            total_received=Sum("amount", filter=Q(receiver_account=account)),
-        )
-        total_change = (balance_change["total_received"] or Decimal("0")) - (
-            balance_change["total_sent"] or Decimal("0")
-        )
-
-        if abs(total_change) > LARGE_TRANSACTION_THRESHOLD:
-            suspicious_activities.append(
-                f"Large balance change detected: {total_change} by user {account.account_number}"
-            )
-
     if suspicious_activities:
         num_activities = send_suspicious_activity_alert(suspicious_activities)
         if num_activities > 0:
@@ -226,17 +179,14 @@ def detect_suspicious_activities():
 @shared_task
 def record_month_end_balances():
     """Task to record month-end balances for all active bank accounts"""
-    active_accounts = BankAccount.objects.filter(
-        account_status=BankAccount.AccountStatus.ACTIVE
-    )
-    
-    recorded_count = 0
-    for account in active_accounts:
-        try:
-            account.record_month_end_balance()
-            recorded_count += 1
-        except Exception as e:
-            logger.error(f"Failed to record month-end balance for account {account.account_number}: {str(e)}")
-    
-    logger.info(f"Recorded month-end balances for {recorded_count} accounts")
-    return f"Recorded month-end balances for {recorded_count} accounts"
\ No newline at end of file
+    recorded_count = month_end.record_month_end_balances()
+    if recorded_count is None:
+        return "Not the last day of the month"
+    return f"Recorded month-end balances for {recorded_count} accounts"
+
+
+@shared_task(name="snapshot_account_balances")
+def snapshot_account_balances():
+    """Fold recent ledger postings into snapshots and the cached balances"""
+    snapshot_count = take_balance_snapshots()
+    return f"Took {snapshot_count} balance snapshots"
@@ -0,0 +1,792 @@
+import csv
+import json
+import os
+import tempfile
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from decimal import Decimal
+from itertools import count
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import Q
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core_apps.notifications.dispatcher import dispatch_queued_emails
+from core_apps.notifications.models import QueuedEmail
+
+from .feeds import PartyFeed
+from .fraud import InMemoryCounterStore, record_transaction_activity
+from .ledger import (
+    POSTING_LOCK,
+    ledger_balance,
+    post_transaction,
+    take_balance_snapshots,
+)
+from .models import (
+    BalanceSnapshot,
+    BankAccount,
+    LedgerEntry,
+    MonthlyBalanceHistory,
+    Transaction,
+)
+from .queries import with_balance_change
+from .settlement import InsufficientFunds, settle_transfer
+from .serializers import (
+    AccountListProjection,
+    AccountListSerializer,
+    TransactionProjection,
+    TransactionSerializer,
+)
+from .statements import statement_artifact_key, statement_store
+from .tasks import generate_transaction_pdf
+
+User = get_user_model()
+
+reference_numbers = (f"TEST{number:012d}" for number in count())
+
+
+def create_user(index: int, **fields) -> User:
+    fields.setdefault("first_name", "test")
+    fields.setdefault("last_name", f"user {index}")
+    return User.objects.create_user(
+        email=f"user{index}@example.com",
+        password="password",
+        id_no=index,
+        security_question=User.SecurityQuestions.FAVORITE_COLOR,
+        security_answer="blue",
+        **fields,
+    )
+
+
+def create_account(user, number: int, balance="1000.00", **fields) -> BankAccount:
+    fields.setdefault("account_status", BankAccount.AccountStatus.ACTIVE)
+    account = BankAccount.objects.create(
+        user=user,
+        account_number=f"{number:013d}",
+        account_balance=Decimal(balance),
+        **fields,
+    )
+    BalanceSnapshot.objects.create(bank_account=account, balance=Decimal(balance))
+    return account
+
+
+def index_name(model, fields: tuple) -> str:
+    return next(
+        index.name
+        for index in model._meta.indexes
+        if tuple(index.fields) == tuple(fields)
+    )
+
+
+def create_transfers(
+    sender_account: BankAccount, receiver_account: BankAccount, count: int
+) -> list[Transaction]:
+    now = timezone.now()
+    return Transaction.objects.bulk_create(
+        [
+            Transaction(
+                user=sender_account.user,
+                reference_number=next(reference_numbers),
+                amount=Decimal("10.00") + index,
+                description=f"transfer {index}",
+                sender=sender_account.user,
+                sender_account=sender_account,
+                receiver=receiver_account.user,
+                receiver_account=receiver_account,
+                transaction_type=Transaction.TransactionType.TRANSFER,
+                status=Transaction.TransactionStatus.COMPLETED,
+                created_at=now - timedelta(minutes=index),
+            )
+            for index in range(count)
+        ]
+    )
+
+
+class ListQueryCountTests(TestCase):
+    """List endpoints run the same number of queries whatever the page size"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.executive = create_user(1, role=User.RoleChoices.ACCOUNT_EXECUTIVE)
+        cls.customer = create_user(2)
+        previous_month = (
+            timezone.now().date().replace(day=1) - timedelta(days=1)
+        ).replace(day=1)
+        cls.accounts = [create_account(cls.customer, 1)]
+        for number in range(2, 15):
+            account = create_account(create_user(number + 1), number)
+            cls.accounts.append(account)
+            # Every other account has a previous month balance to compare with
+            if number % 2:
+                MonthlyBalanceHistory.objects.create(
+                    bank_account=account, month=previous_month, balance=Decimal("500")
+                )
+        # The customer is the sender of some transactions and the receiver
+        # of others, so both branches of the feed contribute to every page
+        create_transfers(cls.accounts[0], cls.accounts[1], 15)
+        create_transfers(cls.accounts[1], cls.accounts[0], 15)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def count_queries(self, user, url: str) -> int:
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_account_list_queries_do_not_grow_with_the_page(self):
+        url = reverse("all_accounts")
+        # Customers see their one account, account executives a full page
+        one_row = self.count_queries(self.customer, url)
+        full_page = self.count_queries(self.executive, url)
+        self.assertEqual(one_row, full_page)
+
+    def test_account_detail_queries_do_not_grow_with_recent_transactions(self):
+        # One recent transaction against a full five
+        create_transfers(self.accounts[2], self.accounts[3], 1)
+        one_row, full_list = (
+            self.count_queries(
+                account.user, reverse("get_account", kwargs={"pk": account.pk})
+            )
+            for account in (self.accounts[2], self.accounts[0])
+        )
+        self.assertEqual(one_row, full_list)
+
+    def test_transaction_list_queries_do_not_grow_with_the_page(self):
+        url = reverse("transaction_list")
+        small = self.count_queries(self.customer, f"{url}?page_size=2")
+        large = self.count_queries(self.customer, f"{url}?page_size=30")
+        self.assertEqual(small, large)
+
+
+class AccountDetailCacheTests(TestCase):
+    """Cached account responses are invalidated when money moves"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teller = create_user(1, role=User.RoleChoices.TELLER)
+        cls.customer = create_user(2)
+        cls.account = create_account(cls.customer, 1, "100.00")
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get_balance(self) -> str:
+        self.client.force_authenticate(self.customer)
+        response = self.client.get(
+            reverse("get_account", kwargs={"pk": self.account.pk})
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data["account_balance"]
+
+    def test_detail_shows_a_deposit_made_after_it_was_cached(self):
+        self.assertEqual(self.get_balance(), "100.00")
+
+        self.client.force_authenticate(self.teller)
+        # Celery is eager here, so the snapshot run would refresh the balance
+        # straight away rather than BALANCE_REFRESH_DELAY later
+        with mock.patch(
+            "core_apps.accounts.ledger.schedule_balance_refresh"
+        ), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("account_deposit"),
+                {"account_number": self.account.account_number, "amount": "25.00"},
+            )
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.get_balance(), "125.00")
+
+
+class PartyFeedTests(TestCase):
+    """The UNION ALL feed matches the OR filter it replaced and uses the indexes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.other = create_user(2)
+        cls.savings = create_account(cls.user, 1)
+        cls.current = create_account(
+            cls.user, 2, account_type=BankAccount.AccountType.CURRENT
+        )
+        cls.other_account = create_account(cls.other, 3)
+        create_transfers(cls.savings, cls.other_account, 12)
+        create_transfers(cls.other_account, cls.current, 12)
+        # Between the user's own accounts, so the user is on both sides
+        create_transfers(cls.current, cls.savings, 5)
+        create_transfers(cls.other_account, cls.other_account, 3)
+
+    def or_filter_ids(self, condition, *ordering) -> list:
+        return list(
+            Transaction.objects.filter(condition)
+            .order_by(*ordering)
+            .values_list("id", flat=True)
+        )
+
+    def feed_ids(self, feed, *ordering) -> list:
+        return [transaction.pk for transaction in feed.order_by(*ordering)[:100]]
+
+    def test_user_feed_returns_the_or_filter_rows(self):
+        feed = PartyFeed.for_user(self.user)
+        condition = Q(sender=self.user) | Q(receiver=self.user)
+        for ordering in (
+            ("-created_at", "-id"),
+            ("created_at", "id"),
+            ("-amount", "-id"),
+            ("amount", "id"),
+        ):
+            with self.subTest(ordering=ordering):
+                expected = self.or_filter_ids(condition, *ordering)
+                self.assertEqual(len(expected), 29)
+                self.assertEqual(self.feed_ids(feed, *ordering), expected)
+        self.assertEqual(feed.count(), 29)
+
+    def test_account_feed_returns_the_or_filter_rows(self):
+        feed = PartyFeed.for_account(self.savings)
+        condition = Q(sender_account=self.savings) | Q(receiver_account=self.savings)
+        expected = self.or_filter_ids(condition, "-created_at", "-id")
+        self.assertEqual(len(expected), 17)
+        self.assertEqual(self.feed_ids(feed, "-created_at", "-id"), expected)
+
+    def test_pages_of_the_feed_do_not_overlap(self):
+        feed = PartyFeed.for_user(self.user)
+        pages = [
+            [transaction.pk for transaction in feed[start : start + 5]]
+            for start in range(0, 30, 5)
+        ]
+        ids = [pk for page in pages for pk in page]
+        self.assertEqual(
+            ids,
+            self.or_filter_ids(
+                Q(sender=self.user) | Q(receiver=self.user), "-created_at", "-id"
+            ),
+        )
+
+    def explain(self, queryset) -> str:
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            # The test tables are tiny, so make the planner show whether the
+            # indexes can drive the feed rather than what is cheapest here
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {sql}", params)
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+    def test_user_feed_plans_as_index_scans(self):
+        plan = self.explain(PartyFeed.for_user(self.user)._ordered_ids()[:10])
+        self.assertIn("Append", plan)
+        self.assertNotIn("Seq Scan", plan)
+        self.assertNotIn("Bitmap", plan)
+        for fields in (
+            ("sender", "created_at", "id"),
+            ("receiver", "created_at", "id"),
+        ):
+            with self.subTest(index=fields):
+                self.assertIn(index_name(Transaction, fields), plan)
+
+    def test_account_feed_plans_as_index_scans(self):
+        plan = self.explain(PartyFeed.for_account(self.savings)._ordered_ids()[:10])
+        self.assertIn("Append", plan)
+        self.assertNotIn("Seq Scan", plan)
+        self.assertNotIn("Bitmap", plan)
+        for fields in (
+            ("sender_account", "created_at", "id"),
+            ("receiver_account", "created_at", "id"),
+        ):
+            with self.subTest(index=fields):
+                self.assertIn(index_name(Transaction, fields), plan)
+
+
+class ProjectionTests(TestCase):
+    """Projections render exactly what the serializers they replace render"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teller = create_user(1, role=User.RoleChoices.TELLER)
+        cls.customer = create_user(2, first_name="ada", last_name="lovelace")
+        cls.other = create_user(3, role=User.RoleChoices.BUSINESS_CLIENT)
+        cls.savings = create_account(cls.customer, 1, "1250.50")
+        cls.current = create_account(
+            cls.customer,
+            2,
+            "0.00",
+            account_type=BankAccount.AccountType.CURRENT,
+            currency=BankAccount.AccountCurrency.DOLLAR,
+        )
+        cls.fixed = create_account(
+            cls.other,
+            3,
+            "99.99",
+            account_type=BankAccount.AccountType.FIXED,
+            account_status=BankAccount.AccountStatus.PENDING,
+            is_primary=True,
+        )
+        previous_month = (
+            timezone.now().date().replace(day=1) - timedelta(days=1)
+        ).replace(day=1)
+        MonthlyBalanceHistory.objects.create(
+            bank_account=cls.savings, month=previous_month, balance=Decimal("1000")
+        )
+        # A zero previous balance has no percentage, like no balance at all
+        MonthlyBalanceHistory.objects.create(
+            bank_account=cls.current, month=previous_month, balance=Decimal("0")
+        )
+
+    def assertSameOutput(self, projected: list, serialized: list) -> None:
+        self.assertEqual(len(projected), len(serialized))
+        for projected_row, serialized_row in zip(projected, serialized):
+            self.assertEqual(list(projected_row), list(serialized_row))
+            self.assertEqual(projected_row, dict(serialized_row))
+
+    def test_transaction_projection_matches_transaction_serializer(self):
+        cases = {
+            "transfer created by a teller": {
+                "user": self.customer,
+                "sender": self.customer,
+                "sender_account": self.savings,
+                "receiver": self.other,
+                "receiver_account": self.fixed,
+                "created_by": self.teller,
+                "description": "rent",
+                "transaction_type": Transaction.TransactionType.TRANSFER,
+            },
+            "deposit without a sender": {
+                "user": self.customer,
+                "receiver": self.customer,
+                "receiver_account": self.current,
+                "created_by": self.teller,
+                "transaction_type": Transaction.TransactionType.DEPOSIT,
+            },
+            "withdrawal without a receiver": {
+                "user": self.other,
+                "sender": self.other,
+                "sender_account": self.fixed,
+                "description": "",
+                "transaction_type": Transaction.TransactionType.WITHDRAWAL,
+            },
+            "transaction with every relation empty": {
+                "transaction_type": Transaction.TransactionType.INTEREST,
+                "status": Transaction.TransactionStatus.FAILED,
+            },
+        }
+        for name, fields in cases.items():
+            with self.subTest(name):
+                transaction = Transaction.objects.create(
+                    amount=Decimal("1234.5"), **fields
+                )
+                queryset = Transaction.objects.filter(pk=transaction.pk)
+                self.assertSameOutput(
+                    TransactionProjection(TransactionProjection.values(queryset)).data,
+                    TransactionSerializer(queryset, many=True).data,
+                )
+
+    def test_account_list_projection_matches_account_list_serializer(self):
+        for account in (self.savings, self.current, self.fixed):
+            with self.subTest(account=account.account_number):
+                queryset = with_balance_change(
+                    BankAccount.objects.select_related("user").filter(pk=account.pk)
+                )
+                self.assertSameOutput(
+                    AccountListProjection(AccountListProjection.values(queryset)).data,
+                    AccountListSerializer(queryset, many=True).data,
+                )
+
+
+@mock.patch.dict(
+    os.environ,
+    {
+        "LARGE_TRANSACTION_THRESHOLD": "1000",
+        "FREQUENT_TRANSACTION_THRESHOLD": "3",
+        "TIME_WINDOW_HOURS": "1",
+    },
+)
+class FraudCounterTests(TestCase):
+    """Sliding window fraud rules, evaluated against the in-memory store"""
+
+    WINDOW = 60 * 60
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.other = create_user(2)
+        cls.account = create_account(cls.user, 1)
+        cls.other_account = create_account(cls.other, 2)
+
+    def setUp(self):
+        self.store = InMemoryCounterStore()
+        self.now = 1_700_000_000.0
+        patcher = mock.patch("core_apps.accounts.fraud.time", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def record(self, amount, sender_account=None, receiver_account=None) -> list:
+        transaction = Transaction(
+            user=self.user,
+            amount=Decimal(amount),
+            sender_account=sender_account,
+            receiver_account=receiver_account,
+        )
+        return record_transaction_activity(
+            transaction, self.store, user_email=self.user.email
+        )
+
+    def test_store_sums_the_window_and_drops_expired_buckets(self):
+        self.assertEqual(self.store.add("key", self.WINDOW, 1, 100).count, 1)
+        self.now += self.WINDOW / 2
+        totals = self.store.add("key", self.WINDOW, 1, -30)
+        self.assertEqual((totals.count, totals.amount_cents), (2, 70))
+        # The first bucket has now left the window, the second has not
+        self.now += self.WINDOW / 2 + 1
+        totals = self.store.add("key", self.WINDOW, 1, 5)
+        self.assertEqual((totals.count, totals.amount_cents), (2, -25))
+        self.now += self.WINDOW + 1
+        totals = self.store.add("key", self.WINDOW, 1, 5)
+        self.assertEqual((totals.count, totals.amount_cents), (1, 5))
+
+    def test_frequent_transactions_alert_once_at_the_threshold(self):
+        alerts = [self.record("10") for _ in range(5)]
+        self.assertEqual([len(activities) for activities in alerts], [0, 0, 1, 0, 0])
+        self.assertEqual(
+            alerts[2], [f"Frequent transactions detected: 3 by {self.user.email}"]
+        )
+
+    def test_frequent_transactions_restart_after_the_window(self):
+        self.record("10")
+        self.record("10")
+        self.now += self.WINDOW + 1
+        self.assertEqual(self.record("10"), [])
+        self.assertEqual(self.record("10"), [])
+        self.assertEqual(len(self.record("10")), 1)
+
+    def test_large_transaction_alerts_at_the_threshold(self):
+        self.assertEqual(self.record("999.99"), [])
+        self.assertEqual(
+            self.record("1000"),
+            [f"Large transaction detected: 1000 by user {self.user.email}"],
+        )
+
+    def test_large_balance_change_alerts_when_crossing_the_threshold(self):
+        self.assertEqual(self.record("600", receiver_account=self.account), [])
+        self.assertEqual(
+            self.record("600", receiver_account=self.account),
+            [
+                "Large balance change detected: 1200 by user "
+                f"{self.account.account_number}"
+            ],
+        )
+        # Still over the threshold, so no new alert
+        self.assertEqual(
+            self.record("100", receiver_account=self.account),
+            [f"Frequent transactions detected: 3 by {self.user.email}"],
+        )
+
+    def test_transfer_moves_both_accounts(self):
+        activities = self.record(
+            "1500", sender_account=self.account, receiver_account=self.other_account
+        )
+        self.assertEqual(
+            activities,
+            [
+                f"Large transaction detected: 1500 by user {self.user.email}",
+                "Large balance change detected: 1500 by user "
+                f"{self.other_account.account_number}",
+                "Large balance change detected: -1500 by user "
+                f"{self.account.account_number}",
+            ],
+        )
+
+    def test_transfer_between_the_same_account_is_not_a_balance_change(self):
+        self.assertEqual(
+            self.record(
+                "999", sender_account=self.account, receiver_account=self.account
+            ),
+            [],
+        )
+        # Adding nothing reads the window, which no leg was counted in
+        totals = self.store.add(f"fraud:account:{self.account.pk}", self.WINDOW, 0, 0)
+        self.assertEqual(totals.count, 0)
+
+
+class TransactionExportTests(TestCase):
+    """Exports stream the user's transactions in the requested format"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.other = create_user(2)
+        cls.account = create_account(cls.user, 1)
+        cls.other_account = create_account(cls.other, 2)
+        cls.transfers = create_transfers(cls.account, cls.other_account, 3)
+        cls.references = {transfer.reference_number for transfer in cls.transfers}
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def export(self, **params):
+        return self.client.get(reverse("transaction_export"), params)
+
+    def test_csv_has_a_header_and_one_line_per_transaction(self):
+        response = self.export(account_number=self.account.account_number)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        reader = csv.DictReader(lines)
+        rows = list(reader)
+        self.assertEqual(
+            reader.fieldnames, list(TransactionProjection(()).get_fields())
+        )
+        self.assertEqual({row["reference_number"] for row in rows}, self.references)
+
+    def test_ndjson_has_one_object_per_transaction(self):
+        response = self.export(export_format="ndjson")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ]
+        self.assertEqual({row["reference_number"] for row in rows}, self.references)
+
+    def test_unsupported_format_is_rejected(self):
+        self.assertEqual(self.export(export_format="xlsx").status_code, 400)
+
+    def test_account_of_another_user_is_not_found(self):
+        response = self.export(account_number=self.other_account.account_number)
+        self.assertEqual(response.status_code, 404)
+
+
+class TransactionPaginationTests(TestCase):
+    """Cursor pages walk the feed in (created_at, id) order without gaps"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.account = create_account(cls.user, 1)
+        other_account = create_account(create_user(2), 2)
+        create_transfers(cls.account, other_account, 7)
+        # Every row shares one created_at, so only the id orders them
+        Transaction.objects.update(created_at=timezone.now())
+        cls.ids = [
+            pk.hex
+            for pk in sorted(
+                Transaction.objects.values_list("id", flat=True), reverse=True
+            )
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_page(self, url: str, **params) -> dict:
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["transaction_list"]
+
+    def test_cursor_pages_tie_break_equal_timestamps_by_id(self):
+        page = self.get_page(
+            reverse("transaction_list"), pagination="cursor", page_size=3
+        )
+        pages = [page]
+        while page["next"]:
+            page = self.get_page(page["next"])
+            pages.append(page)
+        seen = [row["id"] for page in pages for row in page["results"]]
+        self.assertEqual(seen, self.ids)
+
+        # Walking back from the last page returns the same pages
+        previous = [[row["id"] for row in page["results"]]]
+        while page["previous"]:
+            page = self.get_page(page["previous"])
+            previous.insert(0, [row["id"] for row in page["results"]])
+        self.assertEqual(previous, [self.ids[:3], self.ids[3:6], self.ids[6:]])
+
+    def test_invalid_cursor_is_a_bad_request(self):
+        url = reverse("transaction_list")
+        for cursor in (
+            "not a cursor",
+            urlsafe_b64encode(b"[1, 2]").decode(),
+            urlsafe_b64encode(b'{"c": "yesterday", "i": "x"}').decode(),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(url, {"cursor": cursor})
+                self.assertEqual(response.status_code, 400)
+
+    def test_pagination_parameter_switches_to_cursor_pages(self):
+        url = reverse("transaction_list")
+        numbered = self.get_page(url, page_size=3)
+        self.assertEqual(numbered["count"], 7)
+        self.assertNotIn("count", self.get_page(url, pagination="cursor", page_size=3))
+
+
+class TransactionPDFTaskTests(TestCase):
+    """The statement task queues the PDF and only releases its own claim"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.account = create_account(cls.user, 1)
+        create_transfers(cls.account, create_account(create_user(2), 2), 3)
+
+    def setUp(self):
+        artifact_root = tempfile.TemporaryDirectory()
+        self.addCleanup(artifact_root.cleanup)
+        overrides = override_settings(STATEMENT_ARTIFACT_ROOT=artifact_root.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.addCleanup(cache.clear)
+        self.store = statement_store()
+        today = timezone.now().date()
+        self.dates = (today - timedelta(days=30), today)
+        self.key = statement_artifact_key(self.user, None, *self.dates)
+
+    def generate(self, artifact_key=None):
+        return generate_transaction_pdf(
+            self.user.id,
+            *(day.isoformat() for day in self.dates),
+            artifact_key=artifact_key,
+        )
+
+    def test_statement_is_queued_by_reference_and_sent_with_the_pdf(self):
+        self.generate()
+        start_date, end_date = self.dates
+        filename = f"transactions_{start_date}_to_{end_date}.pdf"
+        (queued,) = QueuedEmail.objects.all()
+        self.assertEqual(
+            queued.artifacts,
+            [
+                [
+                    filename,
+                    "core_apps.accounts.statements.statement_store",
+                    self.key,
+                    "application/pdf",
+                ]
+            ],
+        )
+
+        self.assertEqual(dispatch_queued_emails().sent, 1)
+        (email,) = mail.outbox
+        self.assertEqual(email.to, [self.user.email])
+        self.assertEqual(
+            email.attachments, [(filename, self.store.get(self.key), "application/pdf")]
+        )
+
+    def test_statement_whose_pdf_was_evicted_is_retried(self):
+        self.generate()
+        self.store.path(self.key).unlink()
+
+        result = dispatch_queued_emails()
+        self.assertEqual((result.sent, result.failed), (0, 1))
+        self.assertEqual(mail.outbox, [])
+        queued = QueuedEmail.objects.get()
+        self.assertEqual(queued.attempts, 1)
+        self.assertIn(self.key, queued.last_error)
+
+    def test_claim_passed_in_is_released(self):
+        self.assertTrue(self.store.claim(self.key))
+        self.generate(artifact_key=self.key)
+        self.assertTrue(self.store.claim(self.key))
+
+    def test_key_computed_by_the_task_is_not_released(self):
+        # Someone else's claim on the same statement must outlive this run
+        self.assertTrue(self.store.claim(self.key))
+        self.generate()
+        self.assertFalse(self.store.claim(self.key))
+
+
+class LedgerTests(TestCase):
+    """Postings only insert entries and refresh the cached balance on commit"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.other = create_user(2)
+        cls.account = create_account(cls.user, 1, "100.00")
+        cls.other_account = create_account(cls.other, 2, "0.00")
+
+    def transfer(self, amount):
+        return settle_transfer(
+            self.account.account_number,
+            self.other_account.account_number,
+            Decimal(amount),
+            initiated_by=self.user,
+        )
+
+    def test_posting_refreshes_the_cached_balance_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            settlement = self.transfer("40.00")
+            self.account.refresh_from_db()
+            self.assertEqual(self.account.account_balance, Decimal("100.00"))
+        self.assertEqual(settlement.sender_account.account_balance, Decimal("60.00"))
+        self.assertEqual(settlement.receiver_account.account_balance, Decimal("40.00"))
+        self.account.refresh_from_db()
+        self.other_account.refresh_from_db()
+        self.assertEqual(self.account.account_balance, Decimal("60.00"))
+        self.assertEqual(self.other_account.account_balance, Decimal("40.00"))
+
+    def test_snapshot_run_repairs_a_refresh_that_did_not_run(self):
+        self.transfer("40.00")
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.account_balance, Decimal("100.00"))
+        self.assertEqual(ledger_balance(self.account), Decimal("60.00"))
+
+        self.assertEqual(take_balance_snapshots(), 2)
+        self.account.refresh_from_db()
+        self.other_account.refresh_from_db()
+        self.assertEqual(self.account.account_balance, Decimal("60.00"))
+        self.assertEqual(self.other_account.account_balance, Decimal("40.00"))
+        snapshot = self.account.balance_snapshots.order_by("-last_entry_id").first()
+        self.assertEqual(
+            snapshot.last_entry_id, LedgerEntry.objects.order_by("-id").first().id
+        )
+        self.assertEqual(take_balance_snapshots(), 0)
+
+    def test_funds_are_checked_against_the_ledger(self):
+        # A stale cached balance must not let the sender overdraw
+        BankAccount.objects.filter(pk=self.account.pk).update(
+            account_balance=Decimal("1000.00")
+        )
+        with self.assertRaises(InsufficientFunds):
+            self.transfer("150.00")
+        self.transfer("100.00")
+        with self.assertRaises(InsufficientFunds):
+            self.transfer("0.01")
+
+    @override_settings(BALANCE_SNAPSHOT_LOCK_TIMEOUT=1)
+    def test_snapshots_wait_for_postings_in_flight(self):
+        deposit = Transaction.objects.create(
+            user=self.user,
+            amount=Decimal("5.00"),
+            receiver=self.user,
+            receiver_account=self.account,
+            transaction_type=Transaction.TransactionType.DEPOSIT,
+            status=Transaction.TransactionStatus.COMPLETED,
+        )
+        post_transaction(
+            deposit, debit=LedgerEntry.LedgerAccount.CASH, credit=self.account
+        )
+
+        # Another posting that has taken its lock but not committed yet
+        in_flight = connections.create_connection(DEFAULT_DB_ALIAS)
+        self.addCleanup(in_flight.close)
+        in_flight.set_autocommit(False)
+        with in_flight.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock_shared(%s)", [POSTING_LOCK])
+        self.assertEqual(take_balance_snapshots(), 0)
+        self.assertFalse(BalanceSnapshot.objects.filter(last_entry_id__gt=0).exists())
+
+        in_flight.rollback()
+        self.assertEqual(take_balance_snapshots(), 1)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.account_balance, Decimal("105.00"))
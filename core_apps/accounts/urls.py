@@ -10,6 +10,7 @@ from .views import (
     AccountListCreateAPIView,
     AccountDetailAPIView,
     TransactionListAPIView,
+    TransactionExportView,
     TransactionPDFView,
 )
 
@@ -43,4 +44,9 @@ urlpatterns = [
     path("transfer/verify-otp/", VerifyOTPView.as_view(), name="verify_otp"),
     path("transactions/", TransactionListAPIView.as_view(), name="transaction_list"),
     path("transactions/pdf/", TransactionPDFView.as_view(), name="transaction_pdf"),
+    path(
+        "transactions/export/",
+        TransactionExportView.as_view(),
+        name="transaction_export",
+    ),
 ]
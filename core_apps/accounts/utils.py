@@ -4,7 +4,9 @@ from typing import Union, List
 
 from django.db import transaction
 
-from .emails import send_account_creation_email
+from core_apps.notifications.outbox import publish
+
+from .emails import deliver_account_creation_email
 from .models import BankAccount
 
 
@@ -69,6 +71,6 @@ def create_bank_account(user, currency: str, account_type: str) -> str:
             account_status=BankAccount.AccountStatus.PENDING,
         )
 
-        send_account_creation_email(user, bank_account)
+        publish(deliver_account_creation_email, account_id=bank_account.pk)
 
     return bank_account
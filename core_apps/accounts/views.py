@@ -1,23 +1,26 @@
-import random
 from typing import Any
 from django.conf import settings
 from django.utils import timezone
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_cookie, vary_on_headers
 from rest_framework import generics, status, serializers
+from rest_framework.exceptions import NotFound
 from rest_framework.request import Request
 from rest_framework.response import Response
+from core_apps.common.cache import versioned_cache
 from core_apps.common.permissions import IsAccountExecutive, IsTeller
 from core_apps.common.renderers import GenericJSONRenderer
+from core_apps.notifications.outbox import publish
 from .emails import (
+    deliver_deposit_email,
+    deliver_withdrawal_email,
     send_full_activation_email,
-    send_deposit_email,
-    send_withdrawal_email,
     send_transfer_email,
-    send_transfer_otp_email,
 )
-from .models import BankAccount, Transaction
+from .exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS
+from .feeds import party_feed
+from .ledger import ledger_balance, post_transaction
+from .models import BankAccount, LedgerEntry, Transaction
+from .settlement import AccountNotFound, SettlementError, settle_transfer
+from .statements import statement_artifact_key, statement_store
 from decimal import Decimal
 from .serializers import (
     AccountVerificationSerializer,
@@ -28,21 +31,26 @@ from .serializers import (
     OTPVerificationSerializer,
     SecurityQuestionSerializer,
     AccountListSerializer,
+    AccountListProjection,
     AccountDetailSerializer,
     AccountCreateSerializer,
+    TransactionProjection,
 )
 from django.db import transaction
+from django.http import StreamingHttpResponse
 from loguru import logger
-from .pagination import StandardResultsSetPagination
+from .pagination import KeysetPagination, StandardResultsSetPagination
+from .queries import with_balance_change
 from django_filters.rest_framework import DjangoFilterBackend
 from dateutil import parser
-from django.db.models import Q
 from rest_framework.filters import OrderingFilter
 from rest_framework.views import APIView
 from .tasks import generate_transaction_pdf
 from django.contrib.auth import get_user_model
 from rest_framework.permissions import IsAuthenticated
 from core_apps.accounts.utils import create_bank_account
+from core_apps.user_auth.models import OTPChallenge
+from core_apps.user_auth.otp import issue_otp
 
 
 User = get_user_model()
@@ -57,27 +65,24 @@ class AccountListCreateAPIView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         if self.request.user.role == User.RoleChoices.CUSTOMER:
-            return (
-                BankAccount.objects.select_related("user", "verified_by")
-                .filter(user=self.request.user)
-                .order_by("account_number")
+            queryset = BankAccount.objects.select_related("user", "verified_by").filter(
+                user=self.request.user
             )
         elif self.request.user.role == User.RoleChoices.ACCOUNT_EXECUTIVE:
-            return BankAccount.objects.select_related("user", "verified_by").order_by(
-                "account_number"
-            )
+            queryset = BankAccount.objects.select_related("user", "verified_by")
         else:
             return BankAccount.objects.none()
+        return with_balance_change(queryset).order_by("account_number")
 
     def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
-        queryset = self.get_queryset()
+        queryset = AccountListProjection.values(self.get_queryset())
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response(AccountListProjection(page).data)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(
+            AccountListProjection(queryset).data, status=status.HTTP_200_OK
+        )
 
     def create(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         serializer = AccountCreateSerializer(data=request.data)
@@ -141,13 +146,15 @@ class AccountListCreateAPIView(generics.ListCreateAPIView):
 
 
 class AccountDetailAPIView(generics.RetrieveAPIView):
-    queryset = BankAccount.objects.select_related(
-        "user", "verified_by"
-    ).prefetch_related("sent_transactions", "received_transactions")
+    queryset = BankAccount.objects.select_related("user", "verified_by")
     serializer_class = AccountDetailSerializer
     object_label = "account"
     permission_classes = [IsAuthenticated]
 
+    @versioned_cache(
+        timeout=60 * 60,
+        scopes=lambda view, request, *args, **kwargs: [("account", kwargs["pk"])],
+    )
     def retrieve(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         instance = self.get_object()
         if not instance.user == request.user:
@@ -254,10 +261,6 @@ class DepositView(generics.CreateAPIView):
         amount = serializer.validated_data["amount"]
 
         try:
-            account.account_balance += amount
-            account.full_clean()
-            account.save()
-
             # Create transaction record with reference number
             deposit_transaction = Transaction.objects.create(
                 user=account.user,
@@ -269,24 +272,28 @@ class DepositView(generics.CreateAPIView):
                 status=Transaction.TransactionStatus.COMPLETED,
                 created_by=request.user,
             )
+            post_transaction(
+                deposit_transaction,
+                debit=LedgerEntry.LedgerAccount.CASH,
+                credit=account,
+            )
+            new_balance = ledger_balance(account)
 
             logger.info(
                 f"Deposit of {amount} made to account {account.account_number} by teller {request.user.email}. Reference: {deposit_transaction.reference_number}"
             )
 
-            send_deposit_email(
-                user=account.user,
-                user_email=account.user.email,
+            publish(
+                deliver_deposit_email,
+                account_id=account.pk,
                 amount=amount,
-                currency=account.currency,
-                new_balance=account.account_balance,
-                account_number=account.account_number,
+                new_balance=new_balance,
                 reference_number=deposit_transaction.reference_number,
             )
             return Response(
                 {
                     "message": f"Successfully deposited {amount} to account {account.account_number}",
-                    "new_balance": str(account.account_balance),
+                    "new_balance": str(new_balance),
                     "reference_number": deposit_transaction.reference_number,
                 },
                 status=status.HTTP_200_OK,
@@ -347,7 +354,7 @@ class InitiateWithdrawalView(generics.CreateAPIView):
 
         amount = serializer.validated_data["amount"]
 
-        if account.account_balance < amount:
+        if ledger_balance(account) < amount:
             return Response(
                 {"message": "Insufficient funds for withdrawal"},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -392,22 +399,23 @@ class VerifyUsernameAndWithdrawAPIView(generics.CreateAPIView):
         amount = Decimal(withdrawal_data["amount"])
 
         try:
-            account = BankAccount.objects.select_related("user").get(
-                account_number=account_number, user=request.user
+            account = (
+                BankAccount.objects.select_related("user")
+                .select_for_update(of=("self",))
+                .get(account_number=account_number, user=request.user)
             )
         except BankAccount.DoesNotExist:
             return Response(
                 {"message": f"Account number {account_number} does not exist"},
                 status=status.HTTP_404_NOT_FOUND,
             )
-        if account.account_balance < amount:
+        # Every debit holds this row lock, so the balance cannot drop under us
+        balance = ledger_balance(account)
+        if balance < amount:
             return Response(
                 {"message": "Insufficient funds for withdrawal"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        account.account_balance -= amount
-        account.save()
-
         withdrawal_transaction = Transaction.objects.create(
             user=request.user,
             sender=request.user,
@@ -418,16 +426,19 @@ class VerifyUsernameAndWithdrawAPIView(generics.CreateAPIView):
             status=Transaction.TransactionStatus.COMPLETED,
             created_by=request.user,
         )
+        post_transaction(
+            withdrawal_transaction,
+            debit=account,
+            credit=LedgerEntry.LedgerAccount.CASH,
+        )
         logger.info(
             f"Withdrawal of {amount} made from account {account_number}. Reference: {withdrawal_transaction.reference_number}"
         )
-        send_withdrawal_email(
-            user=account.user,
-            user_email=account.user.email,
+        publish(
+            deliver_withdrawal_email,
+            account_id=account.pk,
             amount=amount,
-            currency=account.currency,
-            new_balance=account.account_balance,
-            account_number=account.account_number,
+            new_balance=balance - amount,
             reference_number=withdrawal_transaction.reference_number,
         )
 
@@ -502,9 +513,7 @@ class VerifySecurityQuestionView(generics.CreateAPIView):
             data=request.data, context={"request": request}
         )
         if serializer.is_valid():
-            otp = "".join([str(random.randint(0, 9)) for _ in range(6)])
-            request.user.set_otp(otp)
-            send_transfer_otp_email(request.user.email, otp)
+            issue_otp(request.user, OTPChallenge.Purpose.TRANSFER)
             return Response(
                 {
                     "message": "Security question verified. An OTP has been sent to your email.",
@@ -537,41 +546,28 @@ class VerifyOTPView(generics.CreateAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
         try:
-            sender_account = BankAccount.objects.get(
-                account_number=transfer_data["sender_account"]
-            )
-            receiver_account = BankAccount.objects.get(
-                account_number=transfer_data["receiver_account"]
-            )
-        except BankAccount.DoesNotExist:
+            settlement = settle_transfer(
+                sender_account_number=transfer_data["sender_account"],
+                receiver_account_number=transfer_data["receiver_account"],
+                amount=Decimal(transfer_data["amount"]),
+                initiated_by=request.user,
+                description=transfer_data.get("description", ""),
+            )
+        except AccountNotFound as e:
             return Response(
-                {"message": "One or both accounts not found"},
+                {"message": str(e)},
                 status=status.HTTP_404_NOT_FOUND,
             )
-
-        amount = Decimal(transfer_data["amount"])
-        if sender_account.account_balance < amount:
+        except SettlementError as e:
             return Response(
-                {"message": "Insufficient funds for transfer"},
+                {"message": str(e)},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        sender_account.account_balance -= amount
-        receiver_account.account_balance += amount
-        sender_account.save()
-        receiver_account.save()
 
-        transfer_transaction = Transaction.objects.create(
-            user=request.user,
-            sender=request.user,
-            sender_account=sender_account,
-            receiver=receiver_account.user,
-            receiver_account=receiver_account,
-            amount=amount,
-            description=transfer_data.get("description", ""),
-            transaction_type=Transaction.TransactionType.TRANSFER,
-            status=Transaction.TransactionStatus.COMPLETED,
-            created_by=request.user,
-        )
+        amount = settlement.transaction.amount
+        sender_account = settlement.sender_account
+        receiver_account = settlement.receiver_account
+        transfer_transaction = settlement.transaction
 
         del request.session["transfer_data"]
 
@@ -598,67 +594,19 @@ class VerifyOTPView(generics.CreateAPIView):
         )
 
 
-@method_decorator(cache_page(60 * 5), name="list")  # Cache for 5 minutes
-@method_decorator(vary_on_headers("Authorization"), name="list")
-@method_decorator(vary_on_cookie, name="list")
-class TransactionListAPIView(generics.ListAPIView):
+class TransactionFeedMixin:
+    """Transactions of the requesting user, narrowed by the query parameters"""
+
     serializer_class = TransactionSerializer
-    renderer_classes = [GenericJSONRenderer]
-    object_label = "transaction_list"
-    pagination_class = StandardResultsSetPagination
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     ordering_fields = ["created_at", "amount"]
     ordering = ["-created_at"]
 
     def get_queryset(self):
         user = self.request.user
-        queryset = (
-            Transaction.objects.select_related(
-                "user",
-                "receiver",
-                "sender",
-                "receiver_account",
-                "sender_account",
-                "sender_account__user",
-                "receiver_account__user",
-                "created_by",
-            )
-            .filter(Q(sender=user) | Q(receiver=user))
-            .exclude(transaction_type="interest")
-            .only(
-                "id",
-                "reference_number",
-                "amount",
-                "user_id",
-                "user__first_name",
-                "user__last_name",
-                "description",
-                "receiver_id",
-                "receiver__first_name",
-                "receiver__last_name",
-                "receiver_account__user_id",
-                "receiver_account__user__first_name",
-                "receiver_account__user__last_name",
-                "receiver_account__account_number",
-                "receiver_account__currency",
-                "receiver_account__account_type",
-                "sender_id",
-                "sender__first_name",
-                "sender__last_name",
-                "sender_account__user_id",
-                "sender_account__user__first_name",
-                "sender_account__user__last_name",
-                "sender_account__account_number",
-                "sender_account__currency",
-                "sender_account__account_type",
-                "transaction_type",
-                "status",
-                "created_at",
-                "created_by_id",
-                "created_by__first_name",
-                "created_by__last_name"
-            )
-        )
+        hydrate_queryset = TransactionProjection.values(Transaction.objects.all())
+        queryset = Transaction.objects.exclude(transaction_type="interest")
+
         start_date = self.request.query_params.get("start_date")
         end_date = self.request.query_params.get("end_date")
         account_number = self.request.query_params.get("account_number")
@@ -677,21 +625,49 @@ class TransactionListAPIView(generics.ListAPIView):
             except ValueError:
                 pass
 
+        account = None
         if account_number:
             try:
                 account = BankAccount.objects.select_related("user").get(
                     account_number=account_number, user=user
                 )
-                queryset = queryset.filter(
-                    Q(sender_account=account) | Q(receiver_account=account)
-                )
             except BankAccount.DoesNotExist:
-                queryset = Transaction.objects.none()
+                raise NotFound("Bank account not found")
+
+        return party_feed(user, account, queryset, hydrate_queryset)
 
-        return queryset
 
+class TransactionListAPIView(TransactionFeedMixin, generics.ListAPIView):
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "transaction_list"
+    pagination_class = StandardResultsSetPagination
+    cursor_pagination_class = KeysetPagination
+
+    @property
+    def paginator(self):
+        """
+        Page numbers by default; ?pagination=cursor opts in to keyset
+        pagination, which always orders newest first.
+        """
+        if not hasattr(self, "_paginator"):
+            query_params = self.request.query_params
+            if (
+                query_params.get("pagination") == "cursor"
+                or self.cursor_pagination_class.cursor_query_param in query_params
+            ):
+                self._paginator = self.cursor_pagination_class()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    @versioned_cache(timeout=60 * 60)
     def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
-        response = super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            response = self.get_paginated_response(TransactionProjection(page).data)
+        else:
+            response = Response(TransactionProjection(queryset).data)
         account_number = request.query_params.get("account_number")
         if account_number:
             logger.info(
@@ -704,6 +680,53 @@ class TransactionListAPIView(generics.ListAPIView):
         return response
 
 
+class TransactionExportView(TransactionFeedMixin, generics.GenericAPIView):
+    """
+    Stream the transaction list as CSV or NDJSON.
+
+    Takes the same filters and ordering as the transaction list. Rows are
+    read through a server-side cursor and encoded as the response is sent,
+    so exports of any size run in constant memory.
+    """
+
+    renderer_classes = [GenericJSONRenderer]
+    object_label = "transaction_export"
+    export_format_query_param = "export_format"
+
+    def get(self, request: Request, *args: Any, **kwargs: Any):
+        export_format = request.query_params.get(self.export_format_query_param, "csv")
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {
+                    "error": f"Unsupported export format. Choose one of: {', '.join(EXPORT_FORMATS)}"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        content_type, encode = EXPORT_FORMATS[export_format]
+
+        feed = self.filter_queryset(self.get_queryset())
+        projection = TransactionProjection(
+            feed.stream_values(
+                *TransactionProjection.columns, chunk_size=EXPORT_CHUNK_SIZE
+            )
+        )
+
+        response = StreamingHttpResponse(
+            encode(
+                projection.stream(EXPORT_CHUNK_SIZE),
+                list(projection.get_fields()),
+            ),
+            content_type=content_type,
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="transactions-{timezone.now():%Y%m%d%H%M%S}.{export_format}"'
+        )
+        logger.info(
+            f"User {request.user.email} started a {export_format} transaction export"
+        )
+        return response
+
+
 class TransactionPDFView(APIView):
     renderer_classes = [GenericJSONRenderer]
     object_label = "transaction_pdf"
@@ -738,7 +761,39 @@ class TransactionPDFView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        generate_transaction_pdf.delay(user.id, start_date, end_date, account_number)
+        account = None
+        if account_number:
+            account = BankAccount.objects.filter(
+                account_number=account_number, user=user
+            ).first()
+            if account is None:
+                return Response(
+                    {"message": "Bank account not found"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+
+        # Requests for a statement that is already stored or being generated
+        # share one task instead of each rendering the same PDF again
+        store = statement_store()
+        artifact_key = statement_artifact_key(
+            user, account, parser.parse(start_date).date(), parser.parse(end_date).date()
+        )
+        if store.claim(artifact_key):
+            try:
+                generate_transaction_pdf.delay(
+                    user.id,
+                    start_date,
+                    end_date,
+                    account_number,
+                    artifact_key=artifact_key,
+                )
+            except Exception:
+                store.release(artifact_key)
+                raise
+        else:
+            logger.info(
+                f"Transaction PDF {artifact_key} for {user.email} is already being generated"
+            )
 
         return Response(
             {
@@ -1,13 +1,12 @@
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 from loguru import logger
 
+from core_apps.notifications.dispatcher import queue_email
+from core_apps.notifications.rendering import build_email
+
 
 def send_virtual_card_topup_email(user, virtual_card, amount, new_balance) -> None:
   subject = "Virtual Card Top-Up Confirmation"
-  from_email = settings.DEFAULT_FROM_EMAIL
   to_email = user.email
   
   context = {
@@ -18,15 +17,11 @@ def send_virtual_card_topup_email(user, virtual_card, amount, new_balance) -> No
     "currency": virtual_card.bank_account.currency,
     "site_name": settings.SITE_NAME,
   }
-  html_email = render_to_string('emails/virtual_card_topup.html', context)
-  text_email = strip_tags(html_email)
-  
-  email = EmailMultiAlternatives(subject, text_email, from_email, [to_email])
-  email.attach_alternative(html_email, 'text/html')
+  email = build_email(subject, 'virtual_card_topup', context, [to_email])
   
   try:
-    email.send()
-    logger.info(f'Virtual Card Top-Up Confirmation email sent to {to_email}')
+    queue_email(email)
+    logger.info(f'Virtual Card Top-Up Confirmation email queued for {to_email}')
   except Exception as e:
     logger.error(f'Failed to send Virtual Card Top-Up Confirmation email to {to_email}. Error: {str(e)}')
   
\ No newline at end of file
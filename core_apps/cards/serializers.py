@@ -1,8 +1,10 @@
 from decimal import Decimal
 
+from django.db.models import Count
 from django.utils import timezone
 from rest_framework import serializers
 
+from core_apps.common.projections import ProjectionSerializer
 from .models import VirtualCard
 from .utils import generate_card_number, generate_cvv
 
@@ -19,6 +21,46 @@ class VirtualCardSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "card_number", "expiry_date", "cvv"]
 
 
+class VirtualCardProjection(ProjectionSerializer):
+    """
+    VirtualCardSerializer output built from .values() rows.
+
+    debit_cards_count and credit_cards_count are per-user model properties
+    that each run a COUNT for every card; here they are loaded for all users
+    on the page with one grouped query.
+    """
+
+    serializer_class = VirtualCardSerializer
+    columns = (
+        "id",
+        "user_id",
+        "card_number",
+        "expiry_date",
+        "cvv",
+        "balance",
+        "status",
+        "card_type",
+    )
+
+    def prepare(self, rows: list) -> None:
+        self.active_cards = {
+            (user_id, card_type): total
+            for user_id, card_type, total in VirtualCard.objects.filter(
+                user_id__in={row["user_id"] for row in rows},
+                status=VirtualCard.CardStatus.ACTIVE,
+            )
+            .values("user_id", "card_type")
+            .annotate(total=Count("id"))
+            .values_list("user_id", "card_type", "total")
+        }
+
+    def get_debit_cards_count(self, row: dict) -> int:
+        return self.active_cards.get((row["user_id"], VirtualCard.CardType.DEBIT), 0)
+
+    def get_credit_cards_count(self, row: dict) -> int:
+        return self.active_cards.get((row["user_id"], VirtualCard.CardType.CREDIT), 0)
+
+
 class VirtualCardCreateSerializer(serializers.ModelSerializer):
     bank_account_number = serializers.CharField(write_only=True)
 
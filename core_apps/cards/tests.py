@@ -0,0 +1,73 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core_apps.accounts.tests import create_account, create_user
+
+from .models import VirtualCard
+from .serializers import VirtualCardProjection, VirtualCardSerializer
+
+
+class VirtualCardProjectionTests(TestCase):
+    """VirtualCardProjection renders exactly what VirtualCardSerializer renders"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+        cls.other = create_user(2)
+        account = create_account(cls.user, 1)
+        other_account = create_account(cls.other, 2)
+        expiry_date = timezone.now() + timedelta(days=3 * 365)
+        cards = [
+            (
+                cls.user,
+                account,
+                VirtualCard.CardType.DEBIT,
+                VirtualCard.CardStatus.ACTIVE,
+            ),
+            (
+                cls.user,
+                account,
+                VirtualCard.CardType.CREDIT,
+                VirtualCard.CardStatus.ACTIVE,
+            ),
+            (
+                cls.user,
+                account,
+                VirtualCard.CardType.DEBIT,
+                VirtualCard.CardStatus.BLOCKED,
+            ),
+            # No active cards at all, so both counts are zero
+            (
+                cls.other,
+                other_account,
+                VirtualCard.CardType.CREDIT,
+                VirtualCard.CardStatus.INACTIVE,
+            ),
+        ]
+        for index, (user, bank_account, card_type, status) in enumerate(cards):
+            VirtualCard.objects.create(
+                user=user,
+                bank_account=bank_account,
+                card_type=card_type,
+                status=status,
+                card_number=f"4123{index:012d}",
+                cvv=f"{index:03d}",
+                expiry_date=expiry_date,
+                balance=Decimal("10.5") * index,
+            )
+
+    def test_projection_matches_serializer(self):
+        for user in (self.user, self.other):
+            with self.subTest(user=user.email):
+                queryset = VirtualCard.objects.filter(user=user).order_by("card_number")
+                projected = VirtualCardProjection(
+                    VirtualCardProjection.values(queryset)
+                ).data
+                serialized = VirtualCardSerializer(queryset, many=True).data
+                self.assertEqual(len(projected), len(serialized))
+                for projected_row, serialized_row in zip(projected, serialized):
+                    self.assertEqual(list(projected_row), list(serialized_row))
+                    self.assertEqual(projected_row, dict(serialized_row))
@@ -6,11 +6,17 @@ from rest_framework import generics, status
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from rest_framework.request import Request
-from core_apps.accounts.models import Transaction
+from django.db.models import F
+from core_apps.accounts.ledger import ledger_balance, post_transaction
+from core_apps.accounts.models import BankAccount, LedgerEntry, Transaction
 from core_apps.common.renderers import GenericJSONRenderer
 from .emails import send_virtual_card_topup_email
 from .models import VirtualCard
-from .serializers import VirtualCardCreateSerializer, VirtualCardSerializer
+from .serializers import (
+    VirtualCardCreateSerializer,
+    VirtualCardProjection,
+    VirtualCardSerializer,
+)
 
 
 class VirtualCardListCreateAPIView(generics.ListCreateAPIView):
@@ -31,6 +37,13 @@ class VirtualCardListCreateAPIView(generics.ListCreateAPIView):
             return VirtualCardCreateSerializer
         return VirtualCardSerializer
 
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        queryset = VirtualCardProjection.values(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(VirtualCardProjection(page).data)
+        return Response(VirtualCardProjection(queryset).data)
+
     def create(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         if request.user.virtual_cards.count() >= 3:
             return Response(
@@ -139,19 +152,15 @@ class VirtualCardTopUpAPIView(generics.UpdateAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        bank_account = virtual_card.bank_account
-        if bank_account.account_balance < amount:
+        bank_account = BankAccount.objects.select_for_update(of=("self",)).get(
+            pk=virtual_card.bank_account_id
+        )
+        if ledger_balance(bank_account) < amount:
             return Response(
                 {"error": "Insufficient funds in the bank account"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        bank_account.account_balance -= amount
-        virtual_card.balance += amount
-
-        bank_account.save()
-        virtual_card.save()
-
         transaction = Transaction.objects.create(
             user=request.user,
             amount=amount,
@@ -163,6 +172,15 @@ class VirtualCardTopUpAPIView(generics.UpdateAPIView):
             sender_account=bank_account,
             receiver_account=bank_account,
         )
+        post_transaction(
+            transaction,
+            debit=bank_account,
+            credit=LedgerEntry.LedgerAccount.CARD_FUNDING,
+        )
+        VirtualCard.objects.filter(pk=virtual_card.pk).update(
+            balance=F("balance") + amount
+        )
+        virtual_card.refresh_from_db(fields=["balance"])
         send_virtual_card_topup_email(
             request.user, virtual_card, amount, virtual_card.balance
         )
@@ -0,0 +1,103 @@
+import hashlib
+import os
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from time import time
+from typing import Optional
+
+from django.core.cache import cache
+from loguru import logger
+
+INFLIGHT_KEY_PREFIX = "artifact-inflight"
+
+
+def artifact_key(*parts) -> str:
+    """Digest of everything that determines an artifact's content"""
+    return hashlib.sha256("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+class ArtifactStore:
+    """
+    Generated files kept on local disk under the digest of their inputs.
+
+    A key names exactly one content, so a stored file never goes stale and
+    is reused for as long as it is kept. Files are written to a temporary
+    name and renamed into place, so readers never see a partial file.
+    Reading a file refreshes its modification time, and evict() removes
+    files older than max_age and then the least recently used ones until
+    the store fits in max_bytes.
+
+    claim() and release() coalesce concurrent producers: only the caller
+    that claims a key should generate it, and everyone else can rely on
+    that in-flight job. Claims expire after claim_timeout so that a crashed
+    worker cannot block a key forever.
+    """
+
+    def __init__(
+        self,
+        root,
+        max_age: timedelta,
+        max_bytes: int,
+        suffix: str = "",
+        claim_timeout: int = 300,
+    ):
+        self.root = Path(root)
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.claim_timeout = claim_timeout
+
+    def path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self.path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def put(self, key: str, data: bytes) -> Path:
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=path.parent, prefix=".tmp-", delete=False
+        ) as tmp:
+            tmp.write(data)
+        os.replace(tmp.name, path)
+        return path
+
+    def evict(self) -> int:
+        """Remove expired files, then the least recently used over max_bytes"""
+        expires_before = time() - self.max_age.total_seconds()
+        files = []
+        for path in self.root.glob(f"*/*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for mtime, size, path in files:
+            if mtime >= expires_before and total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"Evicted {removed} artifacts from {self.root}")
+        return removed
+
+    def claim(self, key: str) -> bool:
+        return cache.add(
+            f"{INFLIGHT_KEY_PREFIX}:{key}", True, timeout=self.claim_timeout
+        )
+
+    def release(self, key: str) -> None:
+        cache.delete(f"{INFLIGHT_KEY_PREFIX}:{key}")
@@ -1,11 +1,26 @@
 from typing import Optional, Tuple
 
 from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
 from loguru import logger
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.request import Request
 from rest_framework_simplejwt.authentication import AuthUser, JWTAuthentication
 from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import Token
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from core_apps.common.cache import get_versions, version_key
+
+# Bumped whenever a user row is saved or deleted, see user_auth.signals
+AUTH_VERSION_SCOPE = "auth"
+AUTH_USER_KEY_PREFIX = "auth-user"
+
+
+def auth_user_key(user_id) -> str:
+  return f"{AUTH_USER_KEY_PREFIX}:{user_id}"
 
 
 class CookieAuthentication(JWTAuthentication):
@@ -25,4 +40,46 @@ class CookieAuthentication(JWTAuthentication):
       except TokenError as e:
         logger.error(f"Token validation error: {str(e)}")
     
-    return None
\ No newline at end of file
+    return None
+
+  def get_user(self, validated_token: Token) -> AuthUser:
+    """
+    Resolve the token's user from the cache, falling back to the database.
+
+    Cached users are stored next to the auth version they were loaded
+    under, and both are read with one get_many. Saving or deleting a user
+    bumps the version, so lockouts, role and password changes and soft
+    deletes apply from the next request rather than after the timeout.
+    """
+    user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+    if user_id is None:
+      return super().get_user(validated_token)
+
+    current_version_key = version_key(AUTH_VERSION_SCOPE, user_id)
+    user_key = auth_user_key(user_id)
+    found = cache.get_many([current_version_key, user_key])
+    cached = found.get(user_key)
+    if cached is not None and cached[0] == found.get(current_version_key):
+      user = cached[1]
+      self.check_user(user, validated_token)
+      return user
+
+    # The version is read before the row, so a change that commits while
+    # the user is being loaded leaves this entry under an outdated version
+    (version,) = get_versions([current_version_key])
+    user = super().get_user(validated_token)
+    cache.set(user_key, (version, user), timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+    return user
+
+  def check_user(self, user: AuthUser, validated_token: Token) -> None:
+    """The checks JWTAuthentication.get_user makes after loading the user"""
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+      raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+    if api_settings.CHECK_REVOKE_TOKEN:
+      if validated_token.get(
+        api_settings.REVOKE_TOKEN_CLAIM
+      ) != get_md5_hash_password(user.password):
+        raise AuthenticationFailed(
+          _("The user's password has been changed."), code="password_changed"
+        )
@@ -1,9 +1,53 @@
+import datetime
+import decimal
 import json
 import uuid
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
 
 class UUIDEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, uuid.UUID):
             return str(obj)
         return super().default(obj)
+
+
+def encode_default(obj):
+    """Serialize the types DRF leaves in response data the way DRF's encoder does"""
+    if isinstance(obj, datetime.datetime):
+        representation = obj.isoformat()
+        if representation.endswith("+00:00"):
+            representation = representation[:-6] + "Z"
+        return representation
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (uuid.UUID, decimal.Decimal)):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# Built once so rendering does not construct an encoder per response
+_stdlib_encoder = json.JSONEncoder(
+    default=encode_default, ensure_ascii=False, separators=(",", ":")
+)
+
+
+def fast_dumps(data) -> bytes:
+    """
+    Encode response data to JSON bytes.
+
+    Uses orjson when it is installed, and otherwise the C accelerated stdlib
+    encoder set up to match it: compact separators and non-ASCII characters
+    left as UTF-8.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            data,
+            default=encode_default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+    return _stdlib_encoder.encode(data).encode("utf-8")
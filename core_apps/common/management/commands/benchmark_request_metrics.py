@@ -0,0 +1,104 @@
+from decimal import Decimal
+from statistics import median
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from rest_framework.throttling import UserRateThrottle
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core_apps.accounts.management.commands._fixtures import (
+    create_benchmark_accounts,
+    purge_benchmark_data,
+)
+from core_apps.accounts.management.commands.benchmark_suspicious_activity import (
+    Command as SuspiciousActivityCommand,
+)
+from core_apps.common.metrics import request_metrics
+
+METRICS_MIDDLEWARE = "core_apps.common.middleware.RequestMetricsMiddleware"
+
+
+class Command(BaseCommand):
+    help = "Measures the overhead of RequestMetricsMiddleware on real requests"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default="/api/v1/accounts/transactions/?page_size=50",
+            help="Endpoint requested as the first benchmark user",
+        )
+        parser.add_argument("--rounds", type=int, default=20)
+        parser.add_argument(
+            "--requests", type=int, default=100, help="Requests per round"
+        )
+        parser.add_argument("--transactions", type=int, default=200)
+
+    def handle(self, *args, **options):
+        tag = "metrics"
+        purge_benchmark_data(tag)
+        accounts = create_benchmark_accounts(2, balance=Decimal("0.00"), tag=tag)
+        SuspiciousActivityCommand().create_transfers(
+            accounts, options["transactions"] // 2
+        )
+        # Hold everything in the queue until the reset() at the end
+        request_metrics.flush_interval = 24 * 60 * 60
+        request_metrics.max_pending = float("inf")
+        request_metrics.flush()
+        user = accounts[0].user
+        throttle = UserRateThrottle()
+        throttle_key = throttle.cache_format % {
+            "scope": throttle.scope,
+            "ident": user.pk,
+        }
+        token = AccessToken.for_user(user)
+        factory = RequestFactory(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        # Both handlers share every other middleware and the warm caches.
+        # Their requests alternate, in turn going first, so that drift and
+        # ordering effects land on both alike.
+        handlers = []
+        for label, middleware in (
+            (
+                "without metrics",
+                [m for m in settings.MIDDLEWARE if m != METRICS_MIDDLEWARE],
+            ),
+            ("with metrics", [METRICS_MIDDLEWARE, *settings.MIDDLEWARE]),
+        ):
+            with override_settings(MIDDLEWARE=list(dict.fromkeys(middleware))):
+                handlers.append((label, WSGIHandler()))
+
+        timings = {label: [] for label, _ in handlers}
+        for round_number in range(options["rounds"] + 1):
+            for index in range(options["requests"]):
+                for label, handler in handlers[:: -1 if index % 2 else 1]:
+                    environ = factory.get(options["path"]).environ
+                    cache.delete(throttle_key)
+                    started = perf_counter()
+                    response = handler(environ, lambda status, headers: None)
+                    elapsed = perf_counter() - started
+                    if response.status_code != 200:
+                        self.stderr.write(
+                            f"{options['path']} returned {response.status_code}"
+                        )
+                        return
+                    # The first round only warms up caches and connections
+                    if round_number:
+                        timings[label].append(elapsed)
+
+        baseline = median(timings["without metrics"])
+        measured = median(timings["with metrics"])
+        for label, values in timings.items():
+            self.stdout.write(f"{label:>16}: {median(values) * 1e6:8.1f} us/request")
+        self.stdout.write(
+            f"{'overhead':>16}: {(measured - baseline) * 1e6:8.1f} us/request "
+            f"({(measured - baseline) / baseline:.2%})"
+        )
+
+        # Keep the benchmark's requests out of the shared histograms
+        request_metrics.reset()
+        purge_benchmark_data(tag)
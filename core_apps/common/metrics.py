@@ -0,0 +1,210 @@
+import atexit
+import os
+import threading
+from bisect import bisect_left
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from loguru import logger
+
+METRICS_KEY_PREFIX = "request-metrics"
+VIEWS_KEY = f"{METRICS_KEY_PREFIX}:views"
+EXPOSITION_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@dataclass(frozen=True)
+class Histogram:
+    """
+    A histogram of one request measurement.
+
+    Values are kept as integers, in units of 1 / scale, so the shared
+    store can add them up with incr.
+    """
+
+    name: str
+    help: str
+    buckets: tuple
+    scale: int = 1
+
+    def bucket(self, value) -> int:
+        """Index of the smallest bucket holding the value, len(buckets) for +Inf"""
+        return bisect_left(self.buckets, value)
+
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Wall time spent handling requests",
+    DURATION_BUCKETS,
+    scale=1_000_000,
+)
+DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database queries executed per request",
+    (0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent in database queries per request",
+    DURATION_BUCKETS,
+    scale=1_000_000,
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Size of response bodies, streaming responses excluded",
+    (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+)
+
+HISTOGRAMS = (REQUEST_DURATION, DB_QUERIES, DB_DURATION, RESPONSE_SIZE)
+
+
+def metric_key(view: str, name: str, part) -> str:
+    return f"{METRICS_KEY_PREFIX}:{view}:{name}:{part}"
+
+
+def _add(key: str, delta: int) -> None:
+    if cache.add(key, delta, timeout=None):
+        return
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # Evicted between add and incr
+        cache.add(key, delta, timeout=None)
+
+
+class RequestMetrics:
+    """
+    Per view request histograms, aggregated across workers in the cache.
+
+    Recording a request only appends its measurements to a queue in process
+    memory. A background thread in each process wakes every flush_interval
+    seconds, or as soon as max_pending requests are queued, buckets the
+    queue and adds the counts to shared counters with incr. Any number of
+    processes can report into the same histograms, and the request path
+    never touches the cache.
+    """
+
+    def __init__(
+        self,
+        histograms=HISTOGRAMS,
+        flush_interval: Optional[int] = None,
+        max_pending: int = 10000,
+    ):
+        self.histograms = histograms
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = deque()
+        self._views = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flusher_lock = threading.Lock()
+        self._flusher_started = False
+        # A forked worker does not inherit the parent's threads
+        os.register_at_fork(after_in_child=self._forget_flusher)
+        atexit.register(self.flush)
+
+    def observe(self, view: str, *values) -> None:
+        """Queue one request, with one value per histogram or None to skip it"""
+        self._pending.append((view, values))
+        if not self._flusher_started:
+            self._start_flusher()
+        elif len(self._pending) >= self.max_pending:
+            self._wake.set()
+
+    def _forget_flusher(self) -> None:
+        self._flusher_lock = threading.Lock()
+        self._flusher_started = False
+
+    def _start_flusher(self) -> None:
+        # Started on first use rather than on import, so that it runs in the
+        # process that serves the requests
+        with self._flusher_lock:
+            if self._flusher_started:
+                return
+            self._flusher_started = True
+            threading.Thread(
+                target=self._run_flusher, name="request-metrics-flusher", daemon=True
+            ).start()
+
+    def _run_flusher(self) -> None:
+        while True:
+            self._wake.wait(
+                self.flush_interval or settings.REQUEST_METRICS_FLUSH_INTERVAL
+            )
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Failed to flush request metrics: {str(e)}")
+
+    def flush(self) -> None:
+        """Add the queued requests to the shared counters"""
+        with self._lock:
+            counts = defaultdict(int)
+            # Only what is queued now; later requests wait for the next flush
+            for _ in range(len(self._pending)):
+                view, values = self._pending.popleft()
+                self._views.add(view)
+                for histogram, value in zip(self.histograms, values):
+                    if value is None:
+                        continue
+                    counts[view, histogram.name, histogram.bucket(value)] += 1
+                    counts[view, histogram.name, "sum"] += round(
+                        value * histogram.scale
+                    )
+            if not counts:
+                return
+
+            for (view, name, part), delta in counts.items():
+                _add(metric_key(view, name, part), delta)
+            # Re-registered on every flush, so a view lost to a concurrent
+            # update of the set is added back by the next flush
+            registered = cache.get(VIEWS_KEY, set())
+            if not self._views <= registered:
+                cache.set(VIEWS_KEY, registered | self._views, timeout=None)
+
+    def reset(self) -> None:
+        """Drop the requests queued since the last flush"""
+        self._pending.clear()
+
+    def render(self) -> str:
+        """All workers' histograms in the Prometheus text exposition format"""
+        views = sorted(cache.get(VIEWS_KEY, set()))
+        keys = [
+            metric_key(view, histogram.name, part)
+            for histogram in self.histograms
+            for view in views
+            for part in [*range(len(histogram.buckets) + 1), "sum"]
+        ]
+        counts = cache.get_many(keys)
+
+        lines = []
+        for histogram in self.histograms:
+            lines.append(f"# HELP {histogram.name} {histogram.help}")
+            lines.append(f"# TYPE {histogram.name} histogram")
+            bounds = [*(str(bound) for bound in histogram.buckets), "+Inf"]
+            for view in views:
+                label = escape_label(view)
+                total = 0
+                for index, bound in enumerate(bounds):
+                    total += counts.get(metric_key(view, histogram.name, index), 0)
+                    lines.append(
+                        f'{histogram.name}_bucket{{view="{label}",le="{bound}"}} {total}'
+                    )
+                value = counts.get(metric_key(view, histogram.name, "sum"), 0)
+                lines.append(
+                    f'{histogram.name}_sum{{view="{label}"}} {value / histogram.scale}'
+                )
+                lines.append(f'{histogram.name}_count{{view="{label}"}} {total}')
+        return "\n".join(lines) + "\n"
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,67 @@
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Optional
+
+from .metrics import request_metrics
+
+
+class QueryTimer:
+    """Number of queries run for a request and the time spent in them"""
+
+    __slots__ = ("count", "elapsed")
+
+    def __init__(self):
+        self.count = 0
+        self.elapsed = 0.0
+
+
+_request_timer: ContextVar[Optional[QueryTimer]] = ContextVar(
+    "request_query_timer", default=None
+)
+
+
+def time_queries(execute, sql, params, many, context):
+    """Execute wrapper that charges each query to the current request's timer"""
+    timer = _request_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timer.elapsed += perf_counter() - started
+        timer.count += 1
+
+
+class RequestMetricsMiddleware:
+    """
+    Record wall time, query count, query time and response size per view.
+
+    It should come first in MIDDLEWARE so that the time spent in the other
+    middleware is included. The body of a streaming response is produced
+    after the middleware returns, so for those only the time to the first
+    byte is recorded and the size is left out.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        token = _request_timer.set(timer)
+        started = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_timer.reset(token)
+        elapsed = perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        request_metrics.observe(
+            match.view_name if match else "unresolved",
+            elapsed,
+            timer.count,
+            timer.elapsed,
+            None if response.streaming else len(response.content),
+        )
+        return response
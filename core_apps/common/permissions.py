@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
 from rest_framework import permissions
 from rest_framework.request import Request
 from rest_framework.views import View
@@ -28,3 +30,20 @@ class IsBranchManager(permissions.BasePermission):
         return (
             is_authenticated and has_role_attr and request.user.role == "branch_manager"
         )
+
+
+class HasMetricsScrapeToken(permissions.BasePermission):
+    """
+    Lets in requests that carry METRICS_SCRAPE_TOKEN as a bearer token.
+
+    Meant for Prometheus, whose scrape config can send a static token but
+    not log in for a short lived JWT. Nothing is let in while no token is
+    configured.
+    """
+
+    def has_permission(self, request: Request, view: View) -> bool:
+        token = settings.METRICS_SCRAPE_TOKEN
+        if not token:
+            return False
+        header = request.META.get("HTTP_AUTHORIZATION", "")
+        return constant_time_compare(header, f"Bearer {token}")
@@ -0,0 +1,79 @@
+from itertools import islice
+from typing import Iterable, Iterator, Sequence
+
+
+def full_name(first_name, last_name) -> str:
+    """Same formatting as User.full_name, from raw column values"""
+    return f"{first_name} {last_name}".title().strip()
+
+
+class ProjectionSerializer:
+    """
+    Read-only list serializer that renders .values() rows instead of models.
+
+    The output reproduces serializer_class field for field: plain columns are
+    formatted by the matching serializer field's to_representation, so
+    decimals, datetimes and uuids come out exactly as before, while fields
+    that the model serializer derives from related objects are built by a
+    get_<field_name>(row) method from joined columns. No model instances are
+    created, which keeps list endpoints cheap in both CPU and memory.
+
+    Subclasses set serializer_class and columns, the .values() lookups that
+    every row needs.
+    """
+
+    serializer_class = None
+    columns: Sequence[str] = ()
+
+    def __init__(self, rows: Iterable[dict], many: bool = True):
+        self.rows = rows
+        self.many = many
+
+    @classmethod
+    def values(cls, queryset):
+        return queryset.values(*cls.columns)
+
+    @classmethod
+    def get_fields(cls) -> dict:
+        # Bound serializer fields are only read here, so they are built once
+        fields = cls.__dict__.get("_fields")
+        if fields is None:
+            fields = {
+                name: field
+                for name, field in cls.serializer_class().fields.items()
+                if not field.write_only
+            }
+            cls._fields = fields
+        return fields
+
+    def prepare(self, rows: list) -> None:
+        """Hook for loading anything shared by the whole page in one query"""
+
+    def to_representation(self, row: dict) -> dict:
+        representation = {}
+        for name, field in self.get_fields().items():
+            method = getattr(self, f"get_{name}", None)
+            if method is not None:
+                representation[name] = method(row)
+                continue
+            value = row[field.source]
+            representation[name] = (
+                None if value is None else field.to_representation(value)
+            )
+        return representation
+
+    @property
+    def data(self):
+        if not self.many:
+            self.prepare([self.rows])
+            return self.to_representation(self.rows)
+        rows = list(self.rows)
+        self.prepare(rows)
+        return [self.to_representation(row) for row in rows]
+
+    def stream(self, chunk_size: int = 2000) -> Iterator[dict]:
+        """Yield representations lazily, preparing one chunk of rows at a time"""
+        rows = iter(self.rows)
+        while chunk := list(islice(rows, chunk_size)):
+            self.prepare(chunk)
+            yield from (self.to_representation(row) for row in chunk)
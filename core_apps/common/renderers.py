@@ -4,10 +4,17 @@ from typing import Any, Optional, Union
 from django.utils.translation import gettext_lazy as _
 from rest_framework.renderers import JSONRenderer
 
-from core_apps.common.encoders import UUIDEncoder
+from core_apps.common.encoders import fast_dumps
 
 
 class GenericJSONRenderer(JSONRenderer):
+    """
+    Wrap response data as {"status_code": ..., <object_label>: data}.
+
+    Error responses are rendered as they are. Both are compact JSON with no
+    spaces after separators, the format DRF's JSONRenderer uses.
+    """
+
     charset = "utf-8"
     object_label = "object"
 
@@ -33,15 +40,21 @@ class GenericJSONRenderer(JSONRenderer):
 
         status_code = response.status_code
 
-        errors = data.get("errors", None)
+        errors = data.get("errors", None) if isinstance(data, dict) else None
 
         if errors is not None:
-            return super(GenericJSONRenderer, self).render(data)
-
-        return json.dumps(
-            {
-                "status_code": status_code,
-                object_label: data,
-            },
-            cls=UUIDEncoder,
-        ).encode(self.charset)
+            return fast_dumps(data)
+
+        # The envelope is written by hand so that only the payload goes
+        # through the encoder
+        return b"".join(
+            [
+                b'{"status_code":',
+                str(status_code).encode(self.charset),
+                b",",
+                json.dumps(object_label).encode(self.charset),
+                b":",
+                fast_dumps(data),
+                b"}",
+            ]
+        )
@@ -0,0 +1,24 @@
+from typing import Any
+
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from core_apps.common.middleware import time_queries
+
+
+@receiver(connection_created)
+def install_query_timer(
+    sender: Any, connection: BaseDatabaseWrapper, **kwargs: Any
+) -> None:
+    """
+    Keep time_queries among the connection's execute wrappers.
+
+    It is installed once per connection rather than with
+    connection.execute_wrapper() around each request, because looking the
+    connection up cost more than everything else RequestMetricsMiddleware
+    does. It goes first in the list so that execute_wrapper() blocks, which
+    pop the last wrapper, never remove it.
+    """
+    if time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, time_queries)
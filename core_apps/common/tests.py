@@ -0,0 +1,49 @@
+import json
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from .renderers import GenericJSONRenderer
+
+
+class GenericJSONRendererTests(SimpleTestCase):
+    """Payloads and errors render as the same compact JSON with either encoder"""
+
+    payload = {
+        "id": uuid.UUID(int=1),
+        "amount": Decimal("10.50"),
+        "created_at": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        "name": "Zoë",
+    }
+
+    def render(self, data, status_code=200) -> bytes:
+        context = {
+            "view": SimpleNamespace(object_label="account"),
+            "response": SimpleNamespace(status_code=status_code),
+        }
+        return GenericJSONRenderer().render(data, renderer_context=context)
+
+    def render_both(self, data, status_code=200) -> list[bytes]:
+        with_orjson = self.render(data, status_code)
+        with mock.patch("core_apps.common.encoders.orjson", None):
+            without_orjson = self.render(data, status_code)
+        return [with_orjson, without_orjson]
+
+    def test_payload_is_wrapped_in_compact_json(self):
+        expected = (
+            '{"status_code":200,"account":{"id":"00000000-0000-0000-0000-000000000001",'
+            '"amount":"10.50","created_at":"2024-01-02T03:04:05Z","name":"Zoë"}}'
+        ).encode()
+        for rendered in self.render_both(self.payload):
+            self.assertEqual(rendered, expected)
+
+    def test_errors_are_rendered_unwrapped_in_the_same_format(self):
+        errors = {"errors": {"amount": ["Ensure this value is greater than 0."]}}
+        for rendered in self.render_both(errors, status_code=400):
+            self.assertEqual(
+                rendered, json.dumps(errors, separators=(",", ":")).encode()
+            )
@@ -0,0 +1,23 @@
+from django.http import HttpResponse
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+from .metrics import EXPOSITION_CONTENT_TYPE, request_metrics
+from .permissions import HasMetricsScrapeToken
+
+
+class MetricsView(APIView):
+    """Request histograms of every worker, for Prometheus to scrape"""
+
+    # Scraped every few seconds with a static token, so it is left out of
+    # the JWT authentication and the per user daily throttle
+    authentication_classes = []
+    permission_classes = [HasMetricsScrapeToken]
+    throttle_classes = []
+    schema = None
+
+    def get(self, request: Request) -> HttpResponse:
+        request_metrics.flush()
+        return HttpResponse(
+            request_metrics.render(), content_type=EXPOSITION_CONTENT_TYPE
+        )
@@ -0,0 +1,18 @@
+from django.contrib import admin
+
+from .models import OutboxMessage, QueuedEmail
+
+
+@admin.register(QueuedEmail)
+class QueuedEmailAdmin(admin.ModelAdmin):
+    list_display = ["subject", "to", "status", "attempts", "next_attempt_at"]
+    list_filter = ["status"]
+    search_fields = ["subject", "to"]
+    readonly_fields = ["created_at", "updated_at"]
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ["handler", "status", "attempts", "next_attempt_at", "created_at"]
+    list_filter = ["status", "handler"]
+    readonly_fields = ["created_at", "updated_at"]
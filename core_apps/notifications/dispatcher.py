@@ -0,0 +1,132 @@
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+
+from .models import MissingArtifact, QueuedEmail
+
+DRAIN_SCHEDULED_KEY = "email-drain-scheduled"
+
+
+@dataclass
+class DispatchResult:
+    sent: int = 0
+    failed: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+
+def queue_email(message: EmailMessage, artifacts: Iterable[tuple] = ()) -> QueuedEmail:
+    """
+    Queue a message for the dispatcher instead of sending it.
+
+    Inside a transaction the message is queued with it, and the drain is
+    scheduled once it commits. artifacts are (filename, store, key,
+    mimetype) tuples, attached from the store when the message is sent.
+    """
+    queued = QueuedEmail.from_message(message, artifacts)
+    queued.save()
+    transaction.on_commit(schedule_drain)
+    return queued
+
+
+def queue_emails(messages: Iterable[EmailMessage]) -> list[QueuedEmail]:
+    queued = QueuedEmail.objects.bulk_create(
+        [QueuedEmail.from_message(message) for message in messages]
+    )
+    transaction.on_commit(schedule_drain)
+    return queued
+
+
+def send_now(message: EmailMessage) -> None:
+    """
+    Send a message straight away over the dispatch backend.
+
+    For messages that must never be stored, such as one-time codes, which
+    the queue would keep in plain text until they are sent or purged.
+    """
+    message.connection = dispatch_connection()
+    message.send()
+
+
+def schedule_drain() -> None:
+    """
+    Start a drain after EMAIL_DISPATCH_DELAY unless one is already due.
+
+    Everything queued in the meantime goes out with that drain, which is
+    what turns a burst of notifications into batches.
+    """
+    from .tasks import drain_email_queue
+
+    delay = settings.EMAIL_DISPATCH_DELAY
+    if cache.add(DRAIN_SCHEDULED_KEY, True, timeout=delay + 1):
+        drain_email_queue.apply_async(countdown=delay)
+
+
+def dispatch_connection():
+    return get_connection(settings.EMAIL_DISPATCH_BACKEND)
+
+
+def dispatch_queued_emails(batch_size: int = None, connection=None) -> DispatchResult:
+    """
+    Send due emails in batches over a single SMTP connection.
+
+    Each batch is locked with SKIP LOCKED, so concurrent drains share the
+    queue without sending anything twice, and is handed to send_messages()
+    in one call. A batch that fails is retried as a whole with exponential
+    backoff, and the drain stops, since the next batch would most likely
+    fail the same way. Delivery is at least once: a batch that fails part
+    way through is sent again in full.
+    """
+    batch_size = batch_size or settings.EMAIL_DISPATCH_BATCH_SIZE
+    connection = connection or dispatch_connection()
+    result = DispatchResult()
+    # Allow the next queued email to schedule a drain for whatever is left
+    cache.delete(DRAIN_SCHEDULED_KEY)
+
+    started = perf_counter()
+    try:
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    QueuedEmail.objects.due().select_for_update(skip_locked=True)[
+                        :batch_size
+                    ]
+                )
+                if not batch:
+                    break
+                result.batches += 1
+                messages = []
+                for queued in list(batch):
+                    try:
+                        messages.append(queued.to_message(connection))
+                    except MissingArtifact as e:
+                        # Only this email is affected, so the batch goes on
+                        QueuedEmail.back_off([queued], e)
+                        batch.remove(queued)
+                        result.failed += 1
+                try:
+                    # Opened once and kept open for every following batch
+                    connection.open()
+                    connection.send_messages(messages)
+                except Exception as e:
+                    connection.close()
+                    QueuedEmail.back_off(batch, e)
+                    result.failed += len(batch)
+                    break
+                QueuedEmail.objects.filter(
+                    pk__in=[queued.pk for queued in batch]
+                ).delete()
+                result.sent += len(batch)
+    finally:
+        connection.close()
+    result.elapsed = perf_counter() - started
+    return result
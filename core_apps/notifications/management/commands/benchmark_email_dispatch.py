@@ -0,0 +1,71 @@
+from time import perf_counter
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.management.base import BaseCommand
+
+from core_apps.notifications.dispatcher import dispatch_queued_emails
+from core_apps.notifications.models import QueuedEmail
+
+SMTP_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares one SMTP connection per email with the batched dispatcher "
+        "against an SMTP sink such as the local mailpit service"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=1000)
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--host", default=settings.EMAIL_HOST)
+        parser.add_argument("--port", type=int, default=settings.EMAIL_PORT)
+
+    def handle(self, *args, **options):
+        if QueuedEmail.objects.due().exists():
+            self.stderr.write("The email queue is not empty, drain it first")
+            return
+
+        count = options["messages"]
+        messages = [self.message(index) for index in range(count)]
+
+        started = perf_counter()
+        for message in messages:
+            message.connection = self.connection(options)
+            message.send()
+        elapsed = perf_counter() - started
+        self.stdout.write(
+            f"{'connection per email':>22}: {count / elapsed:8.1f} messages/sec"
+        )
+
+        started = perf_counter()
+        QueuedEmail.objects.bulk_create(
+            [QueuedEmail.from_message(message) for message in messages]
+        )
+        queued = perf_counter() - started
+        result = dispatch_queued_emails(
+            batch_size=options["batch_size"], connection=self.connection(options)
+        )
+        self.stdout.write(
+            f"{'batched dispatcher':>22}: {result.rate:8.1f} messages/sec "
+            f"({result.sent} sent in {result.batches} batches, {result.failed} failed, "
+            f"{queued / count * 1000:.3f} ms/email to queue)"
+        )
+
+    def connection(self, options):
+        return get_connection(SMTP_BACKEND, host=options["host"], port=options["port"])
+
+    def message(self, index: int) -> EmailMultiAlternatives:
+        html = (
+            f"<p>Dear benchmark user {index},</p>"
+            f"<p>Your deposit of <strong>$100.00</strong> was received.</p>"
+        )
+        message = EmailMultiAlternatives(
+            "Deposit Confirmation",
+            f"Dear benchmark user {index}, your deposit of $100.00 was received.",
+            settings.DEFAULT_FROM_EMAIL,
+            [f"benchmark-{index}@benchmark.invalid"],
+        )
+        message.attach_alternative(html, "text/html")
+        return message
@@ -0,0 +1,105 @@
+from datetime import timedelta
+from decimal import Decimal
+from time import perf_counter
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.test.utils import override_settings
+from django.utils.html import strip_tags
+
+from core_apps.notifications.rendering import EMAIL_TEMPLATE_DIR, render_email
+
+
+def legacy_render_email(name: str, context: dict) -> tuple[str, str]:
+    """The bodies as the email helpers built them before the .txt templates"""
+    html = render_to_string(f"{EMAIL_TEMPLATE_DIR}/{name}.html", context)
+    return strip_tags(html), html
+
+
+def sample_contexts() -> dict:
+    user = SimpleNamespace(
+        full_name="Benchmark User",
+        username="BM-000001",
+        security_question="maiden_name",
+        security_answer="benchmark",
+        profile=SimpleNamespace(
+            get_means_of_identification_display=lambda: "Driver's License"
+        ),
+    )
+    account = SimpleNamespace(
+        user=user,
+        account_number="1234567890123",
+        get_account_type_display=lambda: "Savings",
+        get_currency_display=lambda: "US Dollar",
+    )
+    money = {
+        "amount": Decimal("12345.67"),
+        "currency": "us_dollar",
+        "new_balance": Decimal("98765.43"),
+        "account_number": account.account_number,
+        "reference_number": "TRX-0123456789",
+    }
+    site = {"site_name": "Benchmark Bank"}
+    otp = {"otp": "123456", "expiry_time": timedelta(minutes=3), **site}
+    return {
+        "account_created": {"user": user, "account": account, **site},
+        "account_locked": {"user": user, "lockout_duration": 1, **site},
+        "bank_account_activated": {"account": account, **site},
+        "deposit_confirmation": {"user": user, **money, **site},
+        "otp_email": otp,
+        "suspicious_activity_alert": {
+            "suspicious_activities": [
+                f"Large transaction of 50000.00 by user {index}" for index in range(20)
+            ],
+            **site,
+        },
+        "transfer_notification": {
+            "user": user.full_name,
+            "is_sender": True,
+            "sender_name": user.full_name,
+            "receiver_name": "Receiving User",
+            "sender_account_number": account.account_number,
+            "receiver_account_number": "9876543210987",
+            **money,
+            **site,
+        },
+        "transfer_otp_email": otp,
+        "virtual_card_topup": {
+            "user_full_name": user.full_name,
+            "card_last_four": "4242",
+            **money,
+            **site,
+        },
+        "withdrawal_confirmation": {"user": user.full_name, **money, **site},
+    }
+
+
+class Command(BaseCommand):
+    help = "Times rendering one message of every email template"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        totals = [0.0, 0.0]
+        # Outside DEBUG, as in production, where compiled templates are kept
+        with override_settings(DEBUG=False):
+            for name, context in sample_contexts().items():
+                timings = []
+                for render in (legacy_render_email, render_email):
+                    render(name, context)
+                    started = perf_counter()
+                    for _ in range(iterations):
+                        render(name, context)
+                    timings.append((perf_counter() - started) / iterations * 1e6)
+                totals = [total + timing for total, timing in zip(totals, timings)]
+                self.stdout.write(
+                    f"{name:>26}: html + strip_tags {timings[0]:7.1f} us, "
+                    f"html + txt {timings[1]:7.1f} us ({timings[0] / timings[1]:.1f}x)"
+                )
+        self.stdout.write(
+            f"{'all templates':>26}: html + strip_tags {totals[0]:7.1f} us, "
+            f"html + txt {totals[1]:7.1f} us ({totals[0] / totals[1]:.1f}x)"
+        )
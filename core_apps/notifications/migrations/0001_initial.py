@@ -0,0 +1,75 @@
+# Generated by Django 4.2.15 on 2026-10-16 23:09
+
+from django.db import migrations, models
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="QueuedEmail",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("subject", models.CharField(max_length=255, verbose_name="Subject")),
+                ("body", models.TextField(verbose_name="Body")),
+                (
+                    "from_email",
+                    models.CharField(max_length=255, verbose_name="From Email"),
+                ),
+                ("to", models.JSONField(verbose_name="To")),
+                (
+                    "alternatives",
+                    models.JSONField(default=list, verbose_name="Alternatives"),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "Pending"), ("failed", "Failed")],
+                        default="pending",
+                        max_length=10,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Attempts"
+                    ),
+                ),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Next Attempt At",
+                    ),
+                ),
+                ("last_error", models.TextField(blank=True, verbose_name="Last Error")),
+            ],
+            options={
+                "verbose_name": "Queued Email",
+                "verbose_name_plural": "Queued Emails",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "next_attempt_at"],
+                        name="notificatio_status_7204d9_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.15 on 2026-10-16 23:12
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxMessage",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "Pending"), ("failed", "Failed")],
+                        default="pending",
+                        max_length=10,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Attempts"
+                    ),
+                ),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="Next Attempt At",
+                    ),
+                ),
+                ("last_error", models.TextField(blank=True, verbose_name="Last Error")),
+                ("handler", models.CharField(max_length=255, verbose_name="Handler")),
+                (
+                    "payload",
+                    models.JSONField(
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        verbose_name="Payload",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Outbox Message",
+                "verbose_name_plural": "Outbox Messages",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "next_attempt_at"],
+                        name="notificatio_status_6d08f9_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.15 on 2026-10-17 00:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0002_outboxmessage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="queuedemail",
+            name="artifacts",
+            field=models.JSONField(default=list, verbose_name="Artifacts"),
+        ),
+    ]
@@ -0,0 +1,181 @@
+from collections import defaultdict
+from typing import Iterable
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext_lazy as _
+from loguru import logger
+
+from core_apps.common.models import TimeStampedModel
+
+
+class DeliveryQuerySet(models.QuerySet):
+    def due(self):
+        """Pending rows whose next attempt is not in the future, oldest first"""
+        return self.filter(
+            status=DeliveryModel.DeliveryStatus.PENDING,
+            next_attempt_at__lte=timezone.now(),
+        ).order_by("next_attempt_at")
+
+    def expired(self):
+        """Failed rows created more than DELIVERY_FAILED_RETENTION ago"""
+        return self.filter(
+            status=DeliveryModel.DeliveryStatus.FAILED,
+            created_at__lt=timezone.now() - settings.DELIVERY_FAILED_RETENTION,
+        )
+
+
+class DeliveryModel(TimeStampedModel):
+    """
+    Abstract base for work that is retried until it is delivered.
+
+    Delivered rows are deleted, so a table only holds what is still pending
+    and what was given up on after EMAIL_DISPATCH_MAX_ATTEMPTS. Rows given
+    up on are purged once they are older than DELIVERY_FAILED_RETENTION.
+    """
+
+    class DeliveryStatus(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        FAILED = "failed", _("Failed")
+
+    status = models.CharField(
+        _("Status"),
+        max_length=10,
+        choices=DeliveryStatus.choices,
+        default=DeliveryStatus.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(_("Attempts"), default=0)
+    next_attempt_at = models.DateTimeField(_("Next Attempt At"), default=timezone.now)
+    last_error = models.TextField(_("Last Error"), blank=True)
+
+    objects = DeliveryQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def back_off(cls, rows, error: Exception) -> None:
+        """Reschedule failed rows exponentially, giving up on exhausted ones"""
+        by_attempts = defaultdict(list)
+        for row in rows:
+            by_attempts[row.attempts + 1].append(row.pk)
+
+        name = cls._meta.verbose_name_plural
+        for attempts, pks in by_attempts.items():
+            queryset = cls.objects.filter(pk__in=pks)
+            if attempts >= settings.EMAIL_DISPATCH_MAX_ATTEMPTS:
+                queryset.update(
+                    attempts=attempts,
+                    status=cls.DeliveryStatus.FAILED,
+                    last_error=str(error),
+                )
+                logger.error(
+                    f"Gave up on {len(pks)} {name} after {attempts} attempts: {error}"
+                )
+                continue
+            delay = settings.EMAIL_DISPATCH_RETRY_DELAY * 2 ** (attempts - 1)
+            queryset.update(
+                attempts=attempts,
+                next_attempt_at=timezone.now() + delay,
+                last_error=str(error),
+            )
+            logger.warning(
+                f"Failed to deliver {len(pks)} {name}, retrying in {delay}: {error}"
+            )
+
+
+class MissingArtifact(LookupError):
+    """An artifact attached to a queued email is no longer in its store"""
+
+
+class QueuedEmail(DeliveryModel):
+    """
+    An outbound email waiting to be sent by the dispatcher.
+
+    Large attachments are queued by reference, as (filename, store, key,
+    mimetype) entries in artifacts, where store is the function returning
+    the ArtifactStore that holds key, kept as its dotted path. Their bytes
+    are read from the store when the email is sent, so the row never holds
+    them.
+    """
+
+    subject = models.CharField(_("Subject"), max_length=255)
+    body = models.TextField(_("Body"))
+    from_email = models.CharField(_("From Email"), max_length=255)
+    to = models.JSONField(_("To"))
+    alternatives = models.JSONField(_("Alternatives"), default=list)
+    artifacts = models.JSONField(_("Artifacts"), default=list)
+
+    class Meta:
+        verbose_name = _("Queued Email")
+        verbose_name_plural = _("Queued Emails")
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self) -> str:
+        return f"{self.subject} to {', '.join(self.to)}"
+
+    @classmethod
+    def from_message(
+        cls, message: EmailMultiAlternatives, artifacts: Iterable[tuple] = ()
+    ) -> "QueuedEmail":
+        return cls(
+            subject=str(message.subject),
+            body=message.body,
+            from_email=message.from_email,
+            to=list(message.to),
+            alternatives=[
+                [content, mimetype]
+                for content, mimetype in getattr(message, "alternatives", [])
+            ],
+            artifacts=[
+                [filename, f"{store.__module__}.{store.__qualname__}", key, mimetype]
+                for filename, store, key, mimetype in artifacts
+            ],
+        )
+
+    def to_message(self, connection=None) -> EmailMultiAlternatives:
+        """
+        Rebuild the message, reading each attached artifact from its store.
+
+        Raises:
+            MissingArtifact: If an attached artifact has been evicted
+        """
+        message = EmailMultiAlternatives(
+            self.subject,
+            self.body,
+            self.from_email,
+            self.to,
+            alternatives=[tuple(alternative) for alternative in self.alternatives],
+            connection=connection,
+        )
+        for filename, store, key, mimetype in self.artifacts:
+            content = import_string(store)().get(key)
+            if content is None:
+                raise MissingArtifact(f"Artifact {key} for {filename} is gone")
+            message.attach(filename, content, mimetype)
+        return message
+
+
+class OutboxMessage(DeliveryModel):
+    """
+    A notification recorded in the same transaction as the change it
+    reports, and handed to its handler once that transaction has committed.
+
+    handler is the dotted path of a function that is called with payload as
+    keyword arguments.
+    """
+
+    handler = models.CharField(_("Handler"), max_length=255)
+    payload = models.JSONField(_("Payload"), encoder=DjangoJSONEncoder)
+
+    class Meta:
+        verbose_name = _("Outbox Message")
+        verbose_name_plural = _("Outbox Messages")
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self) -> str:
+        return self.handler
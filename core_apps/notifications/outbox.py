@@ -0,0 +1,77 @@
+from typing import Callable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import OutboxMessage
+
+RELAY_SCHEDULED_KEY = "outbox-relay-scheduled"
+
+
+def publish(handler: Callable, **payload) -> OutboxMessage:
+    """
+    Record a call to handler(**payload) to be made after the current
+    transaction commits.
+
+    Only ids and plain values belong in the payload. The message is written
+    with the caller's transaction, so nothing is delivered for a change
+    that is rolled back, and the handler's rendering and sending stay out
+    of the transaction.
+    """
+    message = OutboxMessage.objects.create(
+        handler=f"{handler.__module__}.{handler.__qualname__}", payload=payload
+    )
+    transaction.on_commit(schedule_relay)
+    return message
+
+
+def schedule_relay() -> None:
+    from .tasks import relay_outbox
+
+    if cache.add(RELAY_SCHEDULED_KEY, True, timeout=settings.EMAIL_DISPATCH_DELAY):
+        relay_outbox.delay()
+
+
+def relay_outbox_messages(batch_size: int = None) -> tuple[int, int]:
+    """
+    Call the handlers of due outbox messages.
+
+    Each batch is locked with SKIP LOCKED and relayed in one transaction,
+    so the emails a handler queues are committed together with the removal
+    of its message. A handler that raises is rolled back to its savepoint
+    and its message is retried with backoff.
+
+    Returns:
+        The number of messages relayed and the number that failed
+    """
+    batch_size = batch_size or settings.EMAIL_DISPATCH_BATCH_SIZE
+    # Allow the next published message to schedule a relay of its own
+    cache.delete(RELAY_SCHEDULED_KEY)
+
+    relayed = failed = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                OutboxMessage.objects.due().select_for_update(skip_locked=True)[
+                    :batch_size
+                ]
+            )
+            if not batch:
+                break
+            delivered = []
+            for message in batch:
+                try:
+                    with transaction.atomic():
+                        import_string(message.handler)(**message.payload)
+                except Exception as e:
+                    OutboxMessage.back_off([message], e)
+                    failed += 1
+                else:
+                    delivered.append(message.pk)
+            OutboxMessage.objects.filter(pk__in=delivered).delete()
+            relayed += len(delivered)
+        if len(batch) < batch_size:
+            break
+    return relayed, failed
@@ -0,0 +1,48 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.template.loader import get_template
+
+EMAIL_TEMPLATE_DIR = "emails"
+
+
+def _load_email_templates(name: str):
+    return (
+        get_template(f"{EMAIL_TEMPLATE_DIR}/{name}.txt"),
+        get_template(f"{EMAIL_TEMPLATE_DIR}/{name}.html"),
+    )
+
+
+_cached_email_templates = lru_cache(maxsize=None)(_load_email_templates)
+
+
+def email_templates(name: str):
+    """
+    The compiled plain text and HTML templates of an email.
+
+    They are compiled once per process. In DEBUG they are looked up on every
+    call instead, so that edited templates are picked up.
+    """
+    if settings.DEBUG:
+        return _load_email_templates(name)
+    return _cached_email_templates(name)
+
+
+def render_email(name: str, context: dict) -> tuple[str, str]:
+    """
+    Render the plain text and HTML bodies of emails/<name>.
+
+    The plain text body comes from its own .txt template rather than from
+    stripping the tags out of the HTML, which needed a full HTML parse of
+    every message.
+    """
+    text_template, html_template = email_templates(name)
+    return text_template.render(context), html_template.render(context)
+
+
+def build_email(subject, name: str, context: dict, to: list) -> EmailMultiAlternatives:
+    text, html = render_email(name, context)
+    message = EmailMultiAlternatives(subject, text, settings.DEFAULT_FROM_EMAIL, to)
+    message.attach_alternative(html, "text/html")
+    return message
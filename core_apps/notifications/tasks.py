@@ -0,0 +1,36 @@
+from celery import shared_task
+from loguru import logger
+
+from .dispatcher import dispatch_queued_emails
+from .models import OutboxMessage, QueuedEmail
+from .outbox import relay_outbox_messages
+
+
+@shared_task(name="drain_email_queue")
+def drain_email_queue():
+    result = dispatch_queued_emails()
+    if result.sent or result.failed:
+        logger.info(
+            f"Sent {result.sent} queued emails in {result.batches} batches "
+            f"({result.rate:.1f} messages/sec), {result.failed} failed"
+        )
+    return {"sent": result.sent, "failed": result.failed, "batches": result.batches}
+
+
+@shared_task(name="relay_outbox")
+def relay_outbox():
+    relayed, failed = relay_outbox_messages()
+    if relayed or failed:
+        logger.info(f"Relayed {relayed} outbox messages, {failed} failed")
+    return {"relayed": relayed, "failed": failed}
+
+
+@shared_task(name="purge_failed_deliveries")
+def purge_failed_deliveries():
+    purged = {
+        model._meta.model_name: model.objects.expired().delete()[0]
+        for model in (QueuedEmail, OutboxMessage)
+    }
+    if any(purged.values()):
+        logger.info(f"Purged failed deliveries: {purged}")
+    return purged
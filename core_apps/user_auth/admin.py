@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _
+from .lockout import clear_login_failures
 from .models import User
 from .forms import UserChangeForm, UserCreationForm
 
@@ -88,3 +89,12 @@ class CustomUserAdmin(UserAdmin):
     )
     search_fields = ["email", "username", "first_name", "last_name"]
     ordering = ["email"]
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if (
+            "account_status" in form.changed_data
+            and obj.account_status == User.AccountStatus.ACTIVE
+        ):
+            # Earlier failures would otherwise lock it again on the next one
+            clear_login_failures(obj.pk)
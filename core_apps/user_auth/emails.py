@@ -1,45 +1,48 @@
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 from django.utils.translation import gettext_lazy as _
 from loguru import logger
 
+from core_apps.notifications.dispatcher import queue_email, send_now
+from core_apps.notifications.rendering import build_email
+
 
 def send_otp_email(email, otp):
+  # Raises when sending fails, so that the send_otp task can retry
   subject = _('Your OTP code for Login')
-  from_email = settings.DEFAULT_FROM_EMAIL
   recipient_list = [email]
   context = {
     "otp":otp,
     "expiry_time": settings.OTP_EXPIRATION,
     "site_name": settings.SITE_NAME,
   }
-  html_email = render_to_string("emails/otp_email.html", context)
-  plain_email = strip_tags(html_email)
-  email = EmailMultiAlternatives(subject, plain_email, from_email, recipient_list)
-  email.attach_alternative(html_email, "text/html")
-  try:
-    email.send()
-    logger.info(f"OTP email sent successfully to: {email}")
-  except Exception as e:
-    logger.error(f"Failed to send OTP email to {email}: Error: {str(e)}")
+  email = build_email(subject, "otp_email", context, recipient_list)
+  send_now(email)
+  logger.info(f"OTP email sent successfully to: {email}")
+
+def send_transfer_otp_email(email, otp):
+  # Raises when sending fails, so that the send_otp task can retry
+  subject = _("Your OTP for Transfer Authorization")
+  recipient_list = [email]
+  context = {
+    "otp": otp,
+    "expiry_time": settings.OTP_EXPIRATION,
+    "site_name": settings.SITE_NAME,
+  }
+  email = build_email(subject, "transfer_otp_email", context, recipient_list)
+  send_now(email)
+  logger.info(f"Transfer OTP email sent to: {email}")
 
 def send_account_locked_email(self):
   subject = _("Your account has been locked")
-  from_email = settings.DEFAULT_FROM_EMAIL
   recipient_list = [self.email]
   context = {
     "user": self,
     "lockout_duration": int(settings.LOCKOUT_DURATION.total_seconds() // 60),
     "site_name": settings.SITE_NAME,
   }
-  html_email = render_to_string("emails/account_locked.html", context)
-  plain_email = strip_tags(html_email)
-  email = EmailMultiAlternatives(subject, plain_email, from_email, recipient_list)
-  email.attach_alternative(html_email, "text/html")
+  email = build_email(subject, "account_locked", context, recipient_list)
   try:
-    email.send()
-    logger.info(f"Account locked email sent to : {self.email}")
+    queue_email(email)
+    logger.info(f"Account locked email queued for {self.email}")
   except Exception as e:
     logger.error(f"Failed to send account locked email to {self.email}: Error: {str(e)}")
\ No newline at end of file
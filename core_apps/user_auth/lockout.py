@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.cache import cache
+
+LOGIN_FAILURES_KEY_PREFIX = "login-failures"
+
+
+def login_failures_key(user_id) -> str:
+    return f"{LOGIN_FAILURES_KEY_PREFIX}:{user_id}"
+
+
+def record_login_failure(user_id) -> int:
+    """
+    Count a failed login and return the number of recent failures.
+
+    The count is an atomic cache increment, so concurrent failures are
+    never lost and no database row is written. It expires
+    LOGIN_ATTEMPTS_WINDOW after the first failure.
+    """
+    key = login_failures_key(user_id)
+    cache.add(key, 0, timeout=settings.LOGIN_ATTEMPTS_WINDOW.total_seconds())
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Expired between add and incr; this failure starts a new window
+        cache.add(key, 1, timeout=settings.LOGIN_ATTEMPTS_WINDOW.total_seconds())
+        return 1
+
+
+def clear_login_failures(user_id) -> None:
+    cache.delete(login_failures_key(user_id))
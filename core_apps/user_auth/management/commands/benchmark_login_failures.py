@@ -0,0 +1,124 @@
+import threading
+from decimal import Decimal
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from core_apps.accounts.management.commands._fixtures import (
+    create_benchmark_accounts,
+    purge_benchmark_data,
+)
+from core_apps.user_auth.lockout import clear_login_failures, login_failures_key
+from core_apps.user_profile.models import Profile
+
+User = get_user_model()
+
+WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE")
+
+
+def legacy_handle_failed_login_attempts(user) -> None:
+    """User.handle_failed_login_attempts as it was before the cache counter"""
+    user.failed_login_attempts += 1
+    user.last_failed_login = timezone.now()
+    if user.failed_login_attempts >= settings.LOGIN_ATTEMPTS:
+        user.account_status = user.AccountStatus.LOCKED
+        user.save()
+    user.save()
+
+
+class Command(BaseCommand):
+    help = "Compares failed login handling with the previous save() based counter"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=4)
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument(
+            "--attempts", type=int, default=100, help="Failed logins per worker"
+        )
+
+    def handle(self, *args, **options):
+        tag = "lockout"
+        purge_benchmark_data(tag)
+        accounts = create_benchmark_accounts(
+            options["users"], balance=Decimal("0.00"), tag=tag
+        )
+        emails = [account.user.email for account in accounts]
+        # Every user save re-saves the profile, as it does in production
+        Profile.objects.bulk_create(
+            [Profile(user=account.user) for account in accounts]
+        )
+
+        expected = options["workers"] * options["attempts"]
+        # Nobody may lock, so both runs do the same work on every attempt
+        with override_settings(LOGIN_ATTEMPTS=expected + 1):
+            for label, handler in (
+                ("save() per failure", legacy_handle_failed_login_attempts),
+                ("cache counter", User.handle_failed_login_attempts),
+            ):
+                self.reset(emails)
+                elapsed, writes = self.run(handler, emails, options)
+                recorded = self.recorded(
+                    emails, legacy=handler is legacy_handle_failed_login_attempts
+                )
+                self.stdout.write(
+                    f"{label:>20}: {expected / elapsed:8.1f} failures/sec, "
+                    f"{writes / expected:.2f} writes/failure, "
+                    f"{recorded} of {expected} failures counted"
+                )
+
+        self.reset(emails)
+        Profile.objects.all_with_deleted().filter(user__email__in=emails).hard_delete()
+        purge_benchmark_data(tag)
+
+    def run(self, handler, emails, options):
+        writes = []
+        lock = threading.Lock()
+
+        def worker(index):
+            email = emails[index % len(emails)]
+            try:
+                with CaptureQueriesContext(connection) as queries:
+                    for _ in range(options["attempts"]):
+                        # The login view loads the user afresh on every attempt
+                        handler(User.objects.get(email=email))
+                count = sum(
+                    query["sql"].startswith(WRITE_PREFIXES)
+                    for query in queries.captured_queries
+                )
+            finally:
+                connection.close()
+            with lock:
+                writes.append(count)
+
+        threads = [
+            threading.Thread(target=worker, args=(index,))
+            for index in range(options["workers"])
+        ]
+        started = perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return perf_counter() - started, sum(writes)
+
+    def recorded(self, emails, legacy: bool) -> int:
+        users = User.objects.filter(email__in=emails)
+        if legacy:
+            return sum(user.failed_login_attempts for user in users)
+        return sum(cache.get(login_failures_key(user.pk), 0) for user in users)
+
+    def reset(self, emails) -> None:
+        users = User.objects.filter(email__in=emails)
+        for user in users:
+            clear_login_failures(user.pk)
+        users.update(
+            failed_login_attempts=0,
+            last_failed_login=None,
+            account_status=User.AccountStatus.ACTIVE,
+        )
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.15 on 2026-10-16 23:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user_auth", "0004_alter_user_role"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="user",
+            name="otp",
+        ),
+        migrations.RemoveField(
+            model_name="user",
+            name="otp_expiry_time",
+        ),
+        migrations.CreateModel(
+            name="OTPChallenge",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "purpose",
+                    models.CharField(
+                        choices=[("login", "Login"), ("transfer", "Transfer")],
+                        max_length=10,
+                        verbose_name="Purpose",
+                    ),
+                ),
+                (
+                    "code_hash",
+                    models.CharField(max_length=64, verbose_name="Code Hash"),
+                ),
+                (
+                    "attempts",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Attempts"
+                    ),
+                ),
+                (
+                    "expires_at",
+                    models.DateTimeField(db_index=True, verbose_name="Expires At"),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="otp_challenges",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "OTP Challenge",
+                "verbose_name_plural": "OTP Challenges",
+                "indexes": [
+                    models.Index(
+                        fields=["user", "purpose"],
+                        name="user_auth_o_user_id_5a9407_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -5,9 +5,13 @@ from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from core_apps.common.cache import bump_versions_on_commit
+from core_apps.common.cookie_auth import AUTH_VERSION_SCOPE
+
 from .emails import send_account_locked_email
+from .lockout import clear_login_failures, record_login_failure
 from .managers import UserManager
-from core_apps.common.models import SoftDeleteModel
+from core_apps.common.models import SoftDeleteModel, TimeStampedModel
 
 
 class User(AbstractUser, SoftDeleteModel):
@@ -63,8 +67,6 @@ class User(AbstractUser, SoftDeleteModel):
     )
     failed_login_attempts = models.PositiveSmallIntegerField(default=0)
     last_failed_login = models.DateTimeField(null=True, blank=True)
-    otp = models.CharField(_("OTP"), max_length=6, blank=True)
-    otp_expiry_time = models.DateTimeField(_("OTP Expiry Time"), null=True, blank=True)
 
     objects = UserManager()
     USERNAME_FIELD = "email"
@@ -76,29 +78,44 @@ class User(AbstractUser, SoftDeleteModel):
         "security_answer",
     ]
 
-    def set_otp(self, otp: str) -> None:
-        self.otp = otp
-        self.otp_expiry_time = timezone.now() + settings.OTP_EXPIRATION
-        self.save()
-
-    def verify_otp(self, otp: str) -> bool:
-        if self.otp == otp and self.otp_expiry_time > timezone.now():
-            self.otp = ""
-            self.otp_expiry_time = None
-            self.save()
-            return True
-        return False
-
     def handle_failed_login_attempts(self) -> None:
-        self.failed_login_attempts += 1
-        self.last_failed_login = timezone.now()
-        if self.failed_login_attempts >= settings.LOGIN_ATTEMPTS:
-            self.account_status = self.AccountStatus.LOCKED
-            self.save()
+        """
+        Count a failed login, locking the account at LOGIN_ATTEMPTS.
+
+        Failures are counted in the cache. Any failure at or past the limit
+        locks the account, with an update conditional on it not being locked
+        yet, so the row is written and the email sent once however many
+        failures arrive together.
+        """
+        self.failed_login_attempts = record_login_failure(self.pk)
+        if self.failed_login_attempts < settings.LOGIN_ATTEMPTS:
+            return
+
+        now = timezone.now()
+        locked = (
+            User.objects.filter(pk=self.pk)
+            .exclude(account_status=self.AccountStatus.LOCKED)
+            .update(
+                account_status=self.AccountStatus.LOCKED,
+                failed_login_attempts=self.failed_login_attempts,
+                last_failed_login=now,
+            )
+        )
+        self.account_status = self.AccountStatus.LOCKED
+        if locked:
+            self.last_failed_login = now
+            # update() sends no post_save, which drops cached auth users
+            bump_versions_on_commit(AUTH_VERSION_SCOPE, [self.pk])
             send_account_locked_email(self)
-        self.save()
 
     def reset_failed_login_attempts(self) -> None:
+        clear_login_failures(self.pk)
+        if (
+            self.account_status == self.AccountStatus.ACTIVE
+            and self.failed_login_attempts == 0
+            and self.last_failed_login is None
+        ):
+            return
         self.failed_login_attempts = 0
         self.last_failed_login = None
         self.account_status = self.AccountStatus.ACTIVE
@@ -106,6 +123,7 @@ class User(AbstractUser, SoftDeleteModel):
 
     def unlock_account(self) -> None:
         if self.account_status == self.AccountStatus.LOCKED:
+            clear_login_failures(self.pk)
             self.account_status = self.AccountStatus.ACTIVE
             self.failed_login_attempts = 0
             self.last_failed_login = None
@@ -139,3 +157,32 @@ class User(AbstractUser, SoftDeleteModel):
 
     def __str__(self) -> str:
         return f"{self.full_name} - {self.get_role_display()}"
+
+
+class OTPChallenge(TimeStampedModel):
+    """
+    A one-time code sent to a user, stored only as a keyed hash.
+
+    Challenges are looked up by id or by user and purpose, never by the code
+    itself, so identical codes issued to different users cannot collide.
+    """
+
+    class Purpose(models.TextChoices):
+        LOGIN = "login", _("Login")
+        TRANSFER = "transfer", _("Transfer")
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="otp_challenges"
+    )
+    purpose = models.CharField(_("Purpose"), max_length=10, choices=Purpose.choices)
+    code_hash = models.CharField(_("Code Hash"), max_length=64)
+    attempts = models.PositiveSmallIntegerField(_("Attempts"), default=0)
+    expires_at = models.DateTimeField(_("Expires At"), db_index=True)
+
+    class Meta:
+        verbose_name = _("OTP Challenge")
+        verbose_name_plural = _("OTP Challenges")
+        indexes = [models.Index(fields=["user", "purpose"])]
+
+    def __str__(self) -> str:
+        return f"{self.get_purpose_display()} OTP for {self.user_id}"
@@ -0,0 +1,136 @@
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+from loguru import logger
+
+from .models import OTPChallenge
+from .utils import generate_otp
+
+User = get_user_model()
+
+OTP_HASH_SALT = "core_apps.user_auth.otp"
+
+
+def hash_code(challenge_id, code: str) -> str:
+    """Keyed hash of a code, salted with its challenge id"""
+    return salted_hmac(
+        OTP_HASH_SALT, f"{challenge_id}:{code}", algorithm="sha256"
+    ).hexdigest()
+
+
+def issue_otp(user, purpose: str) -> OTPChallenge:
+    """
+    Create a challenge for the user and send its code once it commits.
+
+    The code is only drawn by the send_otp task, so neither the request nor
+    the task message ever holds it. Any earlier challenge for the same
+    purpose is withdrawn, so only the most recently sent code is accepted.
+    """
+    from .tasks import send_otp
+
+    challenge = OTPChallenge(
+        user=user,
+        purpose=purpose,
+        expires_at=timezone.now() + settings.OTP_EXPIRATION,
+    )
+    with transaction.atomic():
+        OTPChallenge.objects.filter(user=user, purpose=purpose).delete()
+        challenge.save()
+        transaction.on_commit(lambda: send_otp.delay(challenge.pk))
+    return challenge
+
+
+def draw_code(challenge_id) -> Optional[tuple[OTPChallenge, str]]:
+    """
+    Give a pending challenge a new code and return it with the plain code.
+
+    A code drawn again replaces the one before it, so a retried send never
+    leaves an earlier, undelivered code valid.
+
+    Returns:
+        The challenge and its code, or None when the challenge has expired
+        or been withdrawn since it was issued
+    """
+    code = generate_otp()
+    with transaction.atomic():
+        challenge = (
+            OTPChallenge.objects.filter(pk=challenge_id, expires_at__gt=timezone.now())
+            .select_related("user")
+            .select_for_update(of=("self",))
+            .first()
+        )
+        if challenge is None:
+            return None
+        challenge.code_hash = hash_code(challenge.pk, code)
+        OTPChallenge.objects.filter(pk=challenge.pk).update(
+            code_hash=challenge.code_hash
+        )
+    return challenge, code
+
+
+def pending_challenges(purpose: str, user=None, email=None, challenge_id=None):
+    """Unexpired challenges for a purpose, narrowed to one user or challenge"""
+    queryset = OTPChallenge.objects.filter(
+        purpose=purpose, expires_at__gt=timezone.now()
+    )
+    if challenge_id is not None:
+        return queryset.filter(pk=challenge_id)
+    if user is not None:
+        return queryset.filter(user=user)
+    if email is not None:
+        return queryset.filter(user__email=email, user__is_deleted=False)
+    return queryset.none()
+
+
+def verify_otp(
+    code: str, purpose: str, user=None, email=None, challenge_id=None
+) -> Optional[User]:
+    """
+    Check a code against the pending challenge and consume it on success.
+
+    Every wrong code counts against the challenge, and it is withdrawn once
+    OTP_MAX_ATTEMPTS is reached. The challenge row is locked while the code
+    is checked, so concurrent guesses are counted one after the other and
+    cannot all get past the limit, and a matched challenge is deleted before
+    the lock is released, so a code can be used only once.
+
+    Returns:
+        The challenge's user, or None when the code is not accepted
+    """
+    with transaction.atomic():
+        challenge = (
+            pending_challenges(
+                purpose, user=user, email=email, challenge_id=challenge_id
+            )
+            .select_related("user")
+            .select_for_update(of=("self",))
+            .order_by("-created_at")
+            .first()
+        )
+        if challenge is None:
+            return None
+
+        if not constant_time_compare(
+            challenge.code_hash, hash_code(challenge.pk, code)
+        ):
+            attempts = challenge.attempts + 1
+            if attempts >= settings.OTP_MAX_ATTEMPTS:
+                challenge.delete()
+                logger.warning(
+                    f"{challenge.get_purpose_display()} OTP for {challenge.user.email} withdrawn after {attempts} failed attempts"
+                )
+            else:
+                OTPChallenge.objects.filter(pk=challenge.pk).update(attempts=attempts)
+            return None
+
+        challenge.delete()
+    return challenge.user
+
+
+def purge_expired_challenges() -> int:
+    deleted, _ = OTPChallenge.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
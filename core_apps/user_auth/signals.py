@@ -0,0 +1,18 @@
+from typing import Any, Type
+
+from django.db.models.base import Model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from config.settings.base import AUTH_USER_MODEL
+from core_apps.common.cache import bump_versions_on_commit
+from core_apps.common.cookie_auth import AUTH_VERSION_SCOPE
+
+
+@receiver(post_save, sender=AUTH_USER_MODEL)
+@receiver(post_delete, sender=AUTH_USER_MODEL)
+def invalidate_cached_auth_user(
+    sender: Type[Model], instance: Model, **kwargs: Any
+) -> None:
+    # Lockouts, role and password changes and soft deletes are all saves
+    bump_versions_on_commit(AUTH_VERSION_SCOPE, [instance.pk])
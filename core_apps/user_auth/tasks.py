@@ -0,0 +1,38 @@
+from celery import shared_task
+from loguru import logger
+
+from .emails import send_otp_email, send_transfer_otp_email
+from .models import OTPChallenge
+from .otp import draw_code, purge_expired_challenges
+
+OTP_SENDERS = {
+    OTPChallenge.Purpose.LOGIN: send_otp_email,
+    OTPChallenge.Purpose.TRANSFER: send_transfer_otp_email,
+}
+
+
+@shared_task(name="send_otp", bind=True, max_retries=3, default_retry_delay=5)
+def send_otp(self, challenge_id):
+    """
+    Draw a code for a challenge and email it, retrying when sending fails.
+
+    The message carries only the challenge id. The code is drawn here and
+    kept in memory just long enough to send it.
+    """
+    issued = draw_code(challenge_id)
+    if issued is None:
+        logger.info(f"OTP challenge {challenge_id} expired or was withdrawn before it was sent")
+        return None
+    challenge, code = issued
+    try:
+        OTP_SENDERS[challenge.purpose](challenge.user.email, code)
+    except Exception as e:
+        logger.warning(f"Failed to send OTP for challenge {challenge_id}: {e}")
+        raise self.retry(exc=e)
+
+
+@shared_task(name="purge_expired_otp_challenges")
+def purge_expired_otp_challenges():
+    purged = purge_expired_challenges()
+    if purged:
+        logger.info(f"Purged {purged} expired OTP challenges")
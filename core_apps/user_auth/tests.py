@@ -0,0 +1,210 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from smtplib import SMTPException
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.admin.sites import AdminSite
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core_apps.accounts.tests import create_user
+from core_apps.common.cookie_auth import auth_user_key
+from core_apps.notifications.models import QueuedEmail
+
+from .admin import CustomUserAdmin
+from .lockout import login_failures_key, record_login_failure
+from .models import OTPChallenge, User
+from .otp import draw_code, hash_code, issue_otp, verify_otp
+
+
+def sent_code(message) -> str:
+    return re.search(r"Your OTP is:? (\d+)", message.body).group(1)
+
+
+class OTPDeliveryTests(TestCase):
+    """Codes are drawn and emailed by the send_otp task, never by the request"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+
+    def test_task_message_carries_only_the_challenge_id(self):
+        with mock.patch("core_apps.user_auth.tasks.send_otp.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                challenge = issue_otp(self.user, OTPChallenge.Purpose.LOGIN)
+        delay.assert_called_once_with(challenge.pk)
+        self.assertEqual(mail.outbox, [])
+
+    def test_emailed_code_verifies_against_the_challenge(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            challenge = issue_otp(self.user, OTPChallenge.Purpose.TRANSFER)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.user.email])
+
+        user = verify_otp(
+            sent_code(mail.outbox[0]),
+            OTPChallenge.Purpose.TRANSFER,
+            challenge_id=challenge.pk,
+        )
+        self.assertEqual(user, self.user)
+
+    def test_failed_send_is_retried_with_a_new_code(self):
+        sent_codes = []
+
+        def flaky_send(message):
+            sent_codes.append(sent_code(message))
+            if len(sent_codes) == 1:
+                raise SMTPException("Connection unexpectedly closed")
+            mail.outbox.append(message)
+
+        with mock.patch(
+            "core_apps.user_auth.otp.generate_otp", side_effect=["111111", "222222"]
+        ), mock.patch(
+            "core_apps.user_auth.emails.send_now", side_effect=flaky_send
+        ), self.captureOnCommitCallbacks(
+            execute=True
+        ):
+            challenge = issue_otp(self.user, OTPChallenge.Purpose.LOGIN)
+
+        self.assertEqual(sent_codes, ["111111", "222222"])
+        self.assertEqual(len(mail.outbox), 1)
+        # The code that never arrived was replaced by the one that did
+        self.assertIsNone(
+            verify_otp("111111", OTPChallenge.Purpose.LOGIN, challenge_id=challenge.pk)
+        )
+        self.assertEqual(
+            verify_otp("222222", OTPChallenge.Purpose.LOGIN, challenge_id=challenge.pk),
+            self.user,
+        )
+
+
+class OTPVerificationTests(TestCase):
+    """Codes are stored hashed and each challenge accepts one right code"""
+
+    purpose = OTPChallenge.Purpose.LOGIN
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+
+    def setUp(self):
+        with mock.patch("core_apps.user_auth.tasks.send_otp.delay"):
+            issued = issue_otp(self.user, self.purpose)
+        self.challenge, self.code = draw_code(issued.pk)
+        # A code of another length can never be the right one
+        self.wrong_code = f"{self.code}0"
+
+    def verify(self, code):
+        return verify_otp(code, self.purpose, challenge_id=self.challenge.pk)
+
+    def test_only_a_keyed_hash_of_the_code_is_stored(self):
+        stored = OTPChallenge.objects.get(pk=self.challenge.pk)
+        self.assertNotIn(self.code, stored.code_hash)
+        self.assertEqual(stored.code_hash, hash_code(stored.pk, self.code))
+
+    def test_expired_challenge_is_rejected(self):
+        OTPChallenge.objects.filter(pk=self.challenge.pk).update(
+            expires_at=timezone.now()
+        )
+        self.assertIsNone(self.verify(self.code))
+        self.assertIsNone(draw_code(self.challenge.pk))
+
+    def test_challenge_is_consumed_by_the_right_code(self):
+        self.assertEqual(self.verify(self.code), self.user)
+        self.assertIsNone(self.verify(self.code))
+
+    def test_each_wrong_code_uses_up_one_attempt(self):
+        self.assertIsNone(self.verify(self.wrong_code))
+        self.assertEqual(OTPChallenge.objects.get(pk=self.challenge.pk).attempts, 1)
+        self.assertEqual(self.verify(self.code), self.user)
+
+    def test_challenge_is_withdrawn_after_the_last_attempt(self):
+        for _ in range(settings.OTP_MAX_ATTEMPTS):
+            self.assertIsNone(self.verify(self.wrong_code))
+        self.assertFalse(OTPChallenge.objects.filter(pk=self.challenge.pk).exists())
+        self.assertIsNone(self.verify(self.code))
+
+
+class LoginLockoutTests(TestCase):
+    """Every failed login counts, and unlocking starts the count again"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_concurrent_failures_are_all_counted(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            counts = list(executor.map(record_login_failure, [self.user.pk] * 40))
+        self.assertEqual(sorted(counts), list(range(1, 41)))
+        self.assertEqual(cache.get(login_failures_key(self.user.pk)), 40)
+
+    def test_failures_from_stale_instances_lock_the_account_once(self):
+        # Each request loads its own copy of the user before failing
+        attempts = settings.LOGIN_ATTEMPTS + 2
+        users = [User.objects.get(pk=self.user.pk) for _ in range(attempts)]
+        for user in users:
+            user.handle_failed_login_attempts()
+
+        self.assertEqual(
+            [user.failed_login_attempts for user in users],
+            list(range(1, attempts + 1)),
+        )
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.account_status, User.AccountStatus.LOCKED)
+        self.assertEqual(QueuedEmail.objects.count(), 1)
+
+    def test_admin_unlock_clears_the_failure_count(self):
+        for _ in range(settings.LOGIN_ATTEMPTS):
+            self.user.handle_failed_login_attempts()
+        self.assertEqual(self.user.account_status, User.AccountStatus.LOCKED)
+
+        self.user.account_status = User.AccountStatus.ACTIVE
+        CustomUserAdmin(User, AdminSite()).save_model(
+            request=None,
+            obj=self.user,
+            form=SimpleNamespace(changed_data=["account_status"]),
+            change=True,
+        )
+        self.assertIsNone(cache.get(login_failures_key(self.user.pk)))
+
+        # The next failure starts a new count instead of locking again
+        self.user.handle_failed_login_attempts()
+        self.assertEqual(self.user.failed_login_attempts, 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.account_status, User.AccountStatus.ACTIVE)
+
+
+class CachedAuthUserTests(TestCase):
+    """Saving a user drops the copy cached for cookie authentication"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(1)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.client.cookies[settings.COOKIE_NAME] = str(AccessToken.for_user(self.user))
+
+    def test_deactivated_user_is_rejected_on_the_next_request(self):
+        url = reverse("all_accounts")
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertIsNotNone(cache.get(auth_user_key(self.user.pk)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        self.assertEqual(self.client.get(url).status_code, 401)
@@ -1,6 +1,7 @@
 from typing import Any, Optional
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
 from django.utils import timezone
 from djoser.views import TokenCreateView
 from djoser.views import User
@@ -13,8 +14,8 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenRefreshView
 
 
-from .emails import send_otp_email
-from .utils import generate_otp
+from .models import OTPChallenge
+from .otp import issue_otp, pending_challenges, verify_otp
 from .serializers import UserSerializer
 
 
@@ -59,15 +60,14 @@ class CustomTokenCreateView(TokenCreateView):
             )
         user.reset_failed_login_attempts()
 
-        otp = generate_otp()
-        user.set_otp(otp)
-        send_otp_email(user.email, otp)
+        challenge = issue_otp(user, OTPChallenge.Purpose.LOGIN)
 
         logger.info(f"OTP sent for login to user: {user.email}")
         return Response(
             {
                 "success": "OTP sent to your email",
                 "email": user.email,
+                "challenge_id": str(challenge.pk),
             },
             status=status.HTTP_200_OK,
         )
@@ -80,7 +80,7 @@ class CustomTokenCreateView(TokenCreateView):
             email = request.data.get("email")
             user = User.objects.filter(email=email).first()
             if user:
-                if user.otp and user.otp_expiry_time is not None:
+                if pending_challenges(OTPChallenge.Purpose.LOGIN, user=user).exists():
                     return self._action(serializer)
                 if not user.is_active:
                     return Response(
@@ -151,6 +151,8 @@ class OTPVerifyView(APIView):
 
     def post(self, request):
         otp = request.data.get("otp")
+        email = request.data.get("email")
+        challenge_id = request.data.get("challenge_id")
 
         if not otp:
             return Response(
@@ -158,7 +160,21 @@ class OTPVerifyView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        user = User.objects.filter(otp=otp, otp_expiry_time__gt=timezone.now()).first()
+        if not email and not challenge_id:
+            return Response(
+                {"error": "Email or challenge_id is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            user = verify_otp(
+                otp,
+                OTPChallenge.Purpose.LOGIN,
+                email=email or None,
+                challenge_id=challenge_id or None,
+            )
+        except ValidationError:
+            user = None
         if not user:
             return Response(
                 {"error": "Invalid or expired OTP"},
@@ -173,8 +189,6 @@ class OTPVerifyView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        user.verify_otp(otp)
-
         refresh = RefreshToken.for_user(user)
         access_token = str(refresh.access_token)
         refresh_token = str(refresh)
@@ -1,12 +1,13 @@
 from typing import Any, Type
 from django.db.models.base import Model
 
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from loguru import logger
 
 from config.settings.base import AUTH_USER_MODEL
-from core_apps.user_profile.models import Profile
+from core_apps.common.cache import bump_versions_on_commit
+from core_apps.user_profile.models import NextOfKin, Profile
 
 
 @receiver(post_save, sender=AUTH_USER_MODEL)
@@ -20,3 +21,19 @@ def create_user_profile(
 @receiver(post_save, sender=AUTH_USER_MODEL)
 def save_user_profile(sender: Type[Model], instance: Model, **kwargs: Any) -> None:
     instance.profile.save()
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_profile_cache(
+    sender: Type[Model], instance: Profile, **kwargs: Any
+) -> None:
+    bump_versions_on_commit("user", [instance.user_id])
+
+
+@receiver(post_save, sender=NextOfKin)
+@receiver(post_delete, sender=NextOfKin)
+def invalidate_next_of_kin_cache(
+    sender: Type[Model], instance: NextOfKin, **kwargs: Any
+) -> None:
+    bump_versions_on_commit("user", [instance.profile.user_id])
@@ -5,9 +5,6 @@ from django.contrib.contenttypes.models import ContentType
 from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_cookie, vary_on_headers
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, filters, generics, serializers
 from rest_framework.pagination import PageNumberPagination
@@ -16,6 +13,7 @@ from rest_framework.response import Response
 from rest_framework.request import Request
 from loguru import logger
 
+from core_apps.common.cache import versioned_cache
 from core_apps.common.models import ContentView
 from core_apps.common.permissions import IsBranchManager
 from core_apps.common.renderers import GenericJSONRenderer
@@ -48,9 +46,6 @@ class ProfileListAPIView(generics.ListAPIView):
             .exclude(user__is_superuser=True)
         )
 
-@method_decorator(cache_page(60 * 5), name="retrieve")  # Cache for 5 minutes
-@method_decorator(vary_on_headers("Authorization"), name="retrieve")
-@method_decorator(vary_on_cookie, name="retrieve")
 class ProfileDetailAPIView(generics.RetrieveUpdateAPIView):
     serializer_class = ProfileSerializer
     parser_classes = [MultiPartParser, FormParser, JSONParser]
@@ -144,6 +139,7 @@ class ProfileDetailAPIView(generics.RetrieveUpdateAPIView):
             ip = self.request.META.get("REMOTE_ADDR")
         return ip
 
+    @versioned_cache(timeout=60 * 60)
     def retrieve(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         instance = self.get_object()
         serializer = self.get_serializer(instance)